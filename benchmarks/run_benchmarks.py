@@ -0,0 +1,274 @@
+"""بنچمارک مسیرهای اصلی محاسبه‌گر: محاسبه، چیدمان، آمار و رسم.
+
+اجرا:
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --baseline bench.json --tolerance 0.25
+
+خروجی JSON شامل زمان (میانه چند تکرار)، بیشینه حافظه (tracemalloc) و تعداد کارت
+برای هر مورد است. با --baseline اگر مسیری بیش از tolerance کندتر شده باشد، برنامه
+با کد خروج 1 تمام می‌شود؛ در این حالت دست‌کم MIN_BASELINE_REPEAT تکرار اجرا می‌شود و
+موردهای کندشده پیش از گزارش در --recheck پروسه تازه دوباره اندازه‌گیری می‌شوند (سریع‌ترین
+میانه هر مورد می‌ماند)، چون زمان برخی مسیرها از یک پروسه به پروسه دیگر جابه‌جا می‌شود.
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+from videowall import (  # noqa: E402
+    dot_pitch_limits,
+    get_stats_from_grid,
+    load_catalog,
+    module_pixels,
+    optimize_layout,
+    route_cards,
+    videowall_calc,
+)
+from videowall.render import draw_module_layout  # noqa: E402
+from videowall.svg import render_layout_svg  # noqa: E402
+
+WALL_SIZES = [(4, 4), (15, 17), (40, 30), (100, 50), (200, 100), (300, 150)]
+QUICK_WALL_SIZES = [(4, 4), (15, 17), (100, 50)]
+BLOCK_SHAPES = [(1, 1), (2, 2), (2, 4), (2, 6), (3, 4), (4, 3), (4, 4), (6, 2)]
+# رسم جزئی برای دیوارهای بزرگ چند ده ثانیه طول می‌کشد
+MAX_DETAILED_MODULES = 1200
+# اختلاف‌های کمتر از این مقدار (ثانیه) نویز اندازه‌گیری حساب می‌شوند
+NOISE_FLOOR_S = 0.002
+# مقایسه با baseline با تکرار کمتر از این، کندشدن‌های ساختگی گزارش می‌کند
+MIN_BASELINE_REPEAT = 7
+RECHECK_RUNS = 2
+# موردهای کند پس از MIN_REPEAT تکرار و گذشت MAX_CASE_TIME_S ثانیه متوقف می‌شوند
+MIN_REPEAT = 3
+MAX_CASE_TIME_S = 1.0
+
+
+def measure(func, repeat):
+    """میانه زمان اجرا در چند تکرار و بیشینه حافظه در یک اجرای جداگانه.
+
+    پیش از زمان‌گیری یک اجرای گرم‌کننده انجام می‌شود و مانند timeit جمع‌آوری زباله
+    هنگام زمان‌گیری خاموش است تا هزینه آن به مورد دیگری نیفتد.
+    """
+    times = []
+    # اجرای گرم‌کننده (بارگذاری فونت، کش‌ها) جزو زمان نیست
+    result = func()
+    start = time.perf_counter()
+    gc.collect()
+    gc.disable()
+    try:
+        for i in range(repeat):
+            t0 = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - t0)
+            if i + 1 >= MIN_REPEAT and time.perf_counter() - start > MAX_CASE_TIME_S:
+                break
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, float(np.median(times)), peak
+
+
+def render_png(modules_x, modules_y, blocks, grid, renderer):
+    fig = draw_module_layout(modules_x, modules_y, blocks, grid, renderer=renderer)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    plt.close(fig)
+    return buf.getbuffer().nbytes
+
+
+def run(wall_sizes, repeat):
+    results = []
+
+    def record(case_id, stage, seconds, peak, **extra):
+        results.append({"id": case_id, "stage": stage, "time_s": seconds, "peak_bytes": peak, **extra})
+
+    module = load_catalog().module()
+    px_x, px_y = module_pixels(next(iter(module.pitches.values())).dot_pitch, module)
+    for modules_x, modules_y in wall_sizes:
+        wall_w, wall_h = modules_x * module.width_mm / 10, modules_y * module.height_mm / 10
+        for pitch_name, info in dot_pitch_limits.items():
+            pitch, max_modules = info["dot_pitch"], info["max_modules_per_card"]
+            tag = f"{modules_x}x{modules_y}/{pitch_name}"
+
+            calc, seconds, peak = measure(lambda: videowall_calc(wall_w, wall_h, dot_pitch_mm=pitch), repeat)
+            record(f"calc/{tag}", "videowall_calc", seconds, peak,
+                   modules_x=modules_x, modules_y=modules_y, pitch=pitch_name)
+
+            for block_w, block_h in BLOCK_SHAPES:
+                if block_w > max_modules or block_h > max_modules:
+                    continue
+                (blocks, grid), seconds, peak = measure(
+                    lambda: optimize_layout(modules_x, modules_y, block_w, block_h, max_modules), repeat
+                )
+                record(f"layout/{tag}/{block_w}x{block_h}", "optimize_layout", seconds, peak,
+                       modules_x=modules_x, modules_y=modules_y, pitch=pitch_name,
+                       block=[block_w, block_h], cards=len(blocks))
+
+                stats, seconds, peak = measure(
+                    lambda: get_stats_from_grid(grid, px_per_module=calc.px_per_module_total), repeat
+                )
+                record(f"stats/{tag}/{block_w}x{block_h}", "get_stats_from_grid", seconds, peak,
+                       modules_x=modules_x, modules_y=modules_y, pitch=pitch_name,
+                       block=[block_w, block_h], cards=stats.cards_used)
+
+            (blocks, grid), seconds, peak = measure(
+                lambda: optimize_layout(
+                    modules_x, modules_y, 2, 2, max_modules,
+                    mode="min_cards", px_per_module=calc.px_per_module_total
+                ),
+                repeat
+            )
+            record(f"layout_min_cards/{tag}", "optimize_layout[min_cards]", seconds, peak,
+                   modules_x=modules_x, modules_y=modules_y, pitch=pitch_name, cards=len(blocks))
+
+        # دیوار با بریدگی در (یک‌سوم میانی، نیمه پایین) و یک ستون
+        mask = np.ones((modules_y, modules_x), dtype=bool)
+        mask[modules_y // 2:, modules_x // 3:2 * modules_x // 3] = False
+        mask[:modules_y // 4, -max(1, modules_x // 10):] = False
+        for mode in ("fast", "min_cards"):
+            (blocks, grid), seconds, peak = measure(
+                lambda: optimize_layout(modules_x, modules_y, 2, 6, 13, mode=mode, mask=mask), repeat
+            )
+            record(f"layout_masked/{mode}/{modules_x}x{modules_y}", f"optimize_layout[{mode}, mask]", seconds, peak,
+                   modules_x=modules_x, modules_y=modules_y, modules=int(mask.sum()), cards=len(blocks))
+
+        blocks, grid = optimize_layout(modules_x, modules_y, 2, 6, 13)
+        renderers = ["fast"]
+        if modules_x * modules_y <= MAX_DETAILED_MODULES:
+            renderers.append("detailed")
+        for renderer in renderers:
+            png_bytes, seconds, peak = measure(
+                lambda: render_png(modules_x, modules_y, blocks, grid, renderer), repeat
+            )
+            record(f"render/{renderer}/{modules_x}x{modules_y}", f"draw_module_layout[{renderer}]",
+                   seconds, peak, modules_x=modules_x, modules_y=modules_y, png_bytes=png_bytes)
+
+        svg, seconds, peak = measure(lambda: render_layout_svg(grid), repeat)
+        record(f"render/svg/{modules_x}x{modules_y}", "render_layout_svg",
+               seconds, peak, modules_x=modules_x, modules_y=modules_y, svg_bytes=len(svg.encode("utf-8")))
+
+        # زمان مسیریابی با بودجه زمانی محدود می‌شود؛ طول کابل در برابر مسیر مارپیچ هم ثبت می‌شود
+        route, seconds, peak = measure(lambda: route_cards(grid, px_per_module=px_x * px_y, module=module), MIN_REPEAT)
+        record(f"routing/{modules_x}x{modules_y}", "route_cards", seconds, peak,
+               modules_x=modules_x, modules_y=modules_y, cards=len(route.order), ports=len(route.ports),
+               cable_m=round(route.total_length_m, 1), baseline_cable_m=round(route.baseline_length_m, 1))
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """موردهایی که نسبت به baseline بیش از tolerance کندتر شده‌اند"""
+    previous = {item["id"]: item for item in baseline["results"]}
+    regressions = []
+    for item in results:
+        old = previous.get(item["id"])
+        if old is None:
+            continue
+        slower = item["time_s"] - old["time_s"]
+        if slower > NOISE_FLOOR_S and item["time_s"] > old["time_s"] * (1 + tolerance):
+            regressions.append({
+                "id": item["id"],
+                "baseline_s": old["time_s"],
+                "time_s": item["time_s"],
+                "ratio": item["time_s"] / old["time_s"],
+            })
+    return regressions
+
+
+def run_in_subprocess(args):
+    """یک اجرای کامل در پروسه تازه؛ نتیجه‌ها از فایل JSON موقت خوانده می‌شوند"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.json")
+        command = [sys.executable, os.path.abspath(__file__), "--repeat", str(args.repeat), "--output", path]
+        if args.quick:
+            command.append("--quick")
+        subprocess.run(command, check=True)
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["results"]
+
+
+def keep_fastest(results, other):
+    """برای هر مورد، نتیجه اجرایی که میانه کمتری دارد"""
+    fastest = {item["id"]: item for item in other}
+    return [min(item, fastest.get(item["id"], item), key=lambda r: r["time_s"]) for item in results]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="بنچمارک محاسبه‌گر ویدئووال")
+    parser.add_argument("--output", help="مسیر فایل JSON خروجی (پیش‌فرض: stdout)")
+    parser.add_argument("--baseline", help="فایل JSON اجرای قبلی برای بررسی کندشدن")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="کندشدن مجاز نسبت به baseline")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="فقط دیوارهای کوچک و متوسط")
+    parser.add_argument("--recheck", type=int, default=RECHECK_RUNS,
+                        help="اجرای دوباره در پروسه تازه پیش از گزارش کندشدن")
+    args = parser.parse_args(argv)
+    if args.baseline and args.repeat < MIN_BASELINE_REPEAT:
+        print(f"--baseline: repeat raised to {MIN_BASELINE_REPEAT}", file=sys.stderr)
+        args.repeat = MIN_BASELINE_REPEAT
+
+    wall_sizes = QUICK_WALL_SIZES if args.quick else WALL_SIZES
+    results = run(wall_sizes, args.repeat)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for _ in range(args.recheck):
+            if not regressions:
+                break
+            results = keep_fastest(results, run_in_subprocess(args))
+            regressions = compare(results, baseline, args.tolerance)
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "matplotlib": matplotlib.__version__,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "statistic": "median",
+        },
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    for item in regressions:
+        print(
+            f"REGRESSION {item['id']}: {item['baseline_s'] * 1000:.2f} ms -> "
+            f"{item['time_s'] * 1000:.2f} ms (x{item['ratio']:.2f})",
+            file=sys.stderr
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,4 +4,9 @@ set -o errexit
 
 pip install -r requirements.txt
 
-streamlit run streamlit_app.py --server.port $PORT --server.address 0.0.0.0
+# VIDEOWALL_MODE=service سرویس JSON استعلام قیمت را به‌جای رابط Streamlit اجرا می‌کند
+if [ "${VIDEOWALL_MODE:-ui}" = "service" ]; then
+    python -m videowall.service --host 0.0.0.0 --port $PORT --quiet
+else
+    streamlit run streamlit_app.py --server.port $PORT --server.address 0.0.0.0
+fi
@@ -1,315 +1,583 @@
 import sys
 # sys.path.append(r"C:\Users\asus\AppData\Roaming\Python\Python313\site-packages")
 
-import streamlit as st
-import pandas as pd
-import math
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import matplotlib.pyplot as plt
-import matplotlib.patches as patches
 import numpy as np
+import streamlit as st
+import pandas as pd
 from datetime import datetime
 
+from videowall import (
+    CompactLayout,
+    LayoutCache,
+    LayoutEditor,
+    format_currency,
+    format_number,
+    get_jalali_date,
+    module_pixels,
+    videowall_calc,
+)
+from videowall.calc import mask_from_cutouts
+from videowall.catalog import load_catalog
+from videowall import get_default_prices as default_prices
+from videowall.export import (
+    XLSX_AVAILABLE,
+    ArtifactCache,
+    build_xlsx,
+    content_hash,
+    cost_rows,
+    encode_chunks,
+    iter_card_csv,
+    iter_cost_csv,
+    iter_layout_json,
+    iter_module_csv,
+)
+from videowall.jobs import FAILED, RUNNING, LayoutJobRunner
+from videowall.power import PSU_HEADROOM, modules_per_psu
+from videowall.project import Project, WallSpec
+from videowall.profiling import current_profile, profiled, stage, start_run
+from videowall.sweep import pareto_front, rank_results, sweep_options
+from videowall.raster import TileRaster, raster_cell_px
+from videowall.render import draw_module_layout
+from videowall.svg import render_layout_svg
+from videowall.validate import VIOLATION_LABELS
+
+
+CATALOG = load_catalog()
+
+LAYOUT_RENDERERS = {
+    "برداری (SVG)": "svg",
+    "سریع": "fast",
+    "جزئیات کامل": "detailed"
+}
+
 
-def gregorian_to_jalali(gy, gm, gd):
-    """تبدیل تاریخ میلادی به هجری شمسی"""
-    g_d_m = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334]
+def rerun_app():
+    """st.rerun با ثبت پروفایل اجرای جاری که نیمه‌کاره قطع می‌شود"""
+    profile = current_profile()
+    if profile is not None:
+        st.session_state.interrupted_profile = profile.finish()
+    st.rerun()
 
-    if (gm > 2):
-        gy2 = gy + 1
-    else:
-        gy2 = gy
-
-    days = 355666 + (365 * gy) + ((gy2 + 3) // 4) - ((gy2 + 99) // 100) + ((gy2 + 399) // 400) - 1
-    days += g_d_m[gm - 1] + gd
-
-    if (gm > 2):
-        if (((gy % 4 == 0 and gy % 100 != 0) or (gy % 400 == 0)) == False):
-            days -= 1
-
-    jy = -1595 + (33 * (days // 12053))
-    days %= 12053
-    jy += 4 * (days // 1461)
-    days %= 1461
-    if (days > 365):
-        jy += (days - 1) // 365
-        days = (days - 1) % 365
-
-    if (days < 186):
-        jm = 1 + (days // 31)
-        jd = 1 + (days % 31)
-    else:
-        jm = 7 + ((days - 186) // 30)
-        jd = 1 + ((days - 186) % 30)
 
-    return jy, jm, jd
+# بخش‌هایی که باید پس از تغییر خروجی هر fragment دوباره اجرا شوند
+FRAGMENT_DEPENDENTS = {
+    "prices": ["results", "project"],
+    "controller": ["results"],
+}
+
 
-def get_jalali_date():
-    """دریافت تاریخ هجری شمسی فعلی"""
-    now = datetime.now()
-    jy, jm, jd = gregorian_to_jalali(now.year, now.month, now.day)
-    return f"{jy}/{jm:02d}/{jd:02d} {now.hour:02d}:{now.minute:02d}:{now.second:02d}"
+def rerun_dependents(fragment_key):
+    """از داخل callback: اجرای مجدد همان fragment و fragmentهای وابسته به آن"""
+    scope = [fragment_key]
+    # نتایج فقط پس از محاسبه رسم می‌شوند؛ پروژه همیشه
+    calculated = st.session_state.get("calculation_performed", False)
+    scope += [key for key in FRAGMENT_DEPENDENTS.get(fragment_key, []) if key != "results" or calculated]
+    st.rerun(scope=scope)
 
-def videowall_calc(
-    wall_width_cm,
-    wall_height_cm,
-    dot_pitch_mm=1.8,
-    power_per_module_w=23,
-    receiving_card_capacity_px=512*512,
-    psu_watt=60
-):
-    module_width_cm = 32
-    module_height_cm = 16
 
-    wall_w_mm = wall_width_cm * 10
-    wall_h_mm = wall_height_cm * 10
-    module_w_mm = module_width_cm * 10
-    module_h_mm = module_height_cm * 10
+def memo(name, deps, compute):
+    """نتیجه compute را در session_state نگه می‌دارد تا وقتی deps تغییر نکرده"""
+    store = st.session_state.setdefault("memo", {})
+    entry = store.get(name)
+    if entry is None or entry[0] != deps:
+        entry = (deps, compute())
+        store[name] = entry
+    return entry[1]
 
-    modules_x = round(wall_w_mm / module_w_mm)
-    modules_y_round = round(wall_h_mm / module_h_mm)
 
-    px_per_module_x = round(module_w_mm / dot_pitch_mm)
-    px_per_module_y = round(module_h_mm / dot_pitch_mm)
-    px_per_module = px_per_module_x * px_per_module_y
+def render_layout_png(modules_x, modules_y, blocks, grid, renderer, raster=None, mask=None):
+    fig = draw_module_layout(modules_x, modules_y, blocks, grid, renderer=renderer, raster=raster, mask=mask)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    plt.close(fig)
+    return buf.getvalue()
 
-    width_px = modules_x * px_per_module_x
-    height_px_round = modules_y_round * px_per_module_y
 
-    total_px_round = width_px * height_px_round
+def render_layout_image(modules_x, modules_y, layout, editor, renderer, highlight=None):
+    """SVG بدون matplotlib مستقیماً ارسال می‌شود؛ بقیه حالت‌ها PNG هستند"""
+    if renderer == "svg":
+        return render_layout_svg(editor.grid, highlight=highlight, mask=editor.mask)
+    return render_layout_png(
+        modules_x, modules_y, layout.block_list(), editor.grid, renderer, raster=editor.raster, mask=editor.mask
+    )
 
-    cards_round = round(total_px_round / receiving_card_capacity_px)
 
-    total_modules_round = modules_x * modules_y_round
+@st.cache_resource
+def get_process_pool():
+    """process pool مشترک برای بررسی گزینه‌ها"""
+    return ProcessPoolExecutor(max_workers=int(os.environ.get("VIDEOWALL_WORKERS", os.cpu_count() or 1)))
 
-    total_power_round = total_modules_round * power_per_module_w
 
-    psu_count_round = round(total_power_round / psu_watt)
+@st.cache_data
+def get_default_prices():
+    return default_prices()
 
+
+@st.cache_resource
+def get_layout_cache():
+    """کش چیدمان مشترک بین همه نشست‌ها"""
+    return LayoutCache(
+        max_entries=int(os.environ.get("VIDEOWALL_LAYOUT_CACHE_SIZE", 256)),
+        disk_dir=os.environ.get("VIDEOWALL_LAYOUT_CACHE_DIR") or None
+    )
+
+
+# اگر حل چیدمان در این مدت تمام شود، نتیجه بدون نمایش پیشرفت ثبت می‌شود
+LAYOUT_INLINE_WAIT_S = 0.3
+
+
+@st.cache_resource
+def get_layout_runner():
+    """پردازه‌های کارگر حل چیدمان (spawn)، مشترک بین نشست‌ها و متصل به کش چیدمان"""
+    return LayoutJobRunner(
+        max_workers=int(os.environ.get("VIDEOWALL_LAYOUT_WORKERS", 2)),
+        cache=get_layout_cache(),
+        timeout_s=float(os.environ.get("VIDEOWALL_LAYOUT_TIMEOUT", 10))
+    )
+
+
+@st.cache_resource
+def get_export_cache():
+    """فایل‌های خروجی ساخته‌شده، با کلید هش محتوا و مشترک بین نشست‌ها"""
+    return ArtifactCache(max_bytes=int(os.environ.get("VIDEOWALL_EXPORT_CACHE_MB", 64)) * 1024 * 1024)
+
+
+def export_builder(kind, editor, costs, build):
+    """callable بدون آرگومان برای download_button؛ فقط هنگام کلیک و روی نخ جداگانه اجرا می‌شود"""
+    def run():
+        grid = editor.grid.copy()
+        key = content_hash(kind, grid, editor.mask, editor.px_per_module, editor.receiving_card_capacity_px, costs)
+        return get_export_cache().get_or_build(key, lambda: build(grid, editor.stats(), costs))
+    return run
+
+
+def save_prices():
+    """ذخیره قیمت‌های فرم و اجرای مجدد فقط بخش‌هایی که به قیمت وابسته‌اند"""
+    state = st.session_state
+    state.dollar_rate = state.dollar_input
+    state.prices = {
+        "module": state.module_price,
+        "receiver_card": state.receiver_price,
+        "power_supply_60w": state.psu_price,
+        "structure": state.structure_price,  # ✅ ذخیره قیمت هر متر مربع
+        "hdmi_cable": state.hdmi_price,
+        "cable_magnet": state.cable_price,
+        "module_unit": state.module_unit,
+        "receiver_unit": state.receiver_unit,
+        "power_unit": state.power_unit,
+        "structure_unit": state.structure_unit,
+        "hdmi_cable_unit": state.hdmi_cable_unit,
+        "cable_magnet_unit": state.cable_magnet_unit,
+        "controller_prices": {name: state[f"controller_{name}"] for name in CATALOG.controllers},
+        "controller_units": {name: state[f"unit_{name}"] for name in CATALOG.controllers}
+    }
+    state.prices_saved = True
+    rerun_dependents("prices")
+
+
+def selected_module():
+    """نوع ماژول انتخاب‌شده در ورودی‌ها (پیش از رسم انتخابگر، ماژول پیش‌فرض کاتالوگ)"""
+    return CATALOG.module(st.session_state.get("module_type"))
+
+
+def power_options():
+    """تنظیمات برق از session_state به‌صورت آرگومان‌های plan_power؛ پیش‌فرض‌ها از کاتالوگ ماژول"""
+    state = st.session_state
+    module = selected_module()
     return {
-        "modules_x": modules_x,
-        "modules_y_round": modules_y_round,
-        "px_per_module_x": px_per_module_x,
-        "px_per_module_y": px_per_module_y,
-        "px_per_module_total": px_per_module,
-        "resolution_round": (width_px, height_px_round),
-        "total_pixels_round": total_px_round,
-        "receiving_cards_round": cards_round,
-        "total_modules_round": total_modules_round,
-        "total_power_w_round": total_power_round,
-        "psu_60w_round": psu_count_round
+        "psu_watt": state.get(f"psu_watt_{module.id}", module.psu_watt),
+        "module_power_w": state.get(f"module_power_w_{module.id}", module.power_w),
+        "headroom": state.get("psu_headroom_percent", PSU_HEADROOM * 100) / 100,
+        "group_by_card": state.get("psu_group_by_card", False),
+        # پیش‌فرض نسبت ثابت کاتالوگ؛ با power_sizing تعداد ماژول هر پاور از توان حساب می‌شود
+        "per_psu": module.modules_per_psu,
+        "power_sizing": state.get("psu_power_sizing", False)
     }
 
-def optimize_layout(modules_x, modules_y, block_w, block_h, max_size):
-    blocks = []
-    grid = np.zeros((modules_y, modules_x), dtype=int)
-    card_id = 1
-
-    y = 0
-    while y + block_h <= modules_y:
-        x = 0
-        while x + block_w <= modules_x:
-            if np.all(grid[y:y+block_h, x:x+block_w] == 0):
-                blocks.append((x, y, block_w, block_h, card_id))
-                grid[y:y+block_h, x:x+block_w] = card_id
-                card_id += 1
-            x += block_w
-        y += block_h
-
-    user_max_block_size = block_w * block_h
-
-    for h in range(user_max_block_size, 0, -1):
-        for w in range(user_max_block_size, 0, -1):
-            if w * h > user_max_block_size:
-                continue
-            y = 0
-            while y < modules_y:
-                x = 0
-                while x < modules_x:
-                    if grid[y, x] == 0:
-                        can_place = True
-                        for dy in range(h):
-                            for dx in range(w):
-                                if y + dy >= modules_y or x + dx >= modules_x or grid[y + dy, x + dx] != 0:
-                                    can_place = False
-                                    break
-                            if not can_place:
-                                break
-                        if can_place:
-                            blocks.append((x, y, w, h, card_id))
-                            for dy in range(h):
-                                for dx in range(w):
-                                    grid[y + dy, x + dx] = card_id
-                            card_id += 1
-                            x += w
-                        else:
-                            x += 1
-                    else:
-                        x += 1
-                y += 1
-
-    return blocks, grid
-
-def draw_module_layout(modules_x, modules_y, blocks, grid):
-    fig, ax = plt.subplots(figsize=(modules_x * 0.6, modules_y * 0.4))
-
-    colors = [
-        '#2E86AB', '#A23B72', '#F18F01', '#C73E1D', '#6A994E',
-        '#BC4749', '#2A9D8F', '#E76F51', '#F4A261', '#E9C46A',
-        '#264653', '#6B5B95', '#88498F', '#C8B8DB', '#E5989B',
-        '#D4A5A5', '#9A8C98', '#C9ADA7', '#9A8B7A', '#B4A582',
-        '#FFB703', '#FB8500', '#8ECAE6', '#219EBC', '#023047',
-        '#FFB703', '#FB8500', '#37B7C3', '#048A81', '#54B3B0',
-        '#FFC857', '#E5323B', '#42A4BF', '#1D7874', '#14919B'
-    ]
-
-    for y in range(modules_y):
-        for x in range(modules_x):
-            card_id = grid[y, x]
-            color = colors[(card_id - 1) % len(colors)]
-            rect = patches.Rectangle(
-                (x * 32, (modules_y - 1 - y) * 16),
-                32, 16,
-                linewidth=1.5,
-                edgecolor='#333333',
-                facecolor=color,
-                alpha=0.85
+
+def power_settings():
+    # هر نوع ماژول کلیدهای جدا دارد تا با عوض شدن ماژول، مقدارهای کاتالوگ آن نشان داده شود
+    module = selected_module()
+    with st.expander("⚡ تنظیمات برق", expanded=False):
+        st.caption(module.name)
+        st.number_input(
+            "توان هر پاور (وات)", min_value=1.0, value=float(module.psu_watt), step=10.0,
+            key=f"psu_watt_{module.id}"
+        )
+        st.number_input(
+            "مصرف هر ماژول (وات)", min_value=0.1, value=float(module.power_w), step=1.0,
+            key=f"module_power_w_{module.id}"
+        )
+        power_sizing = st.checkbox(
+            "تعداد پاور بر اساس توان پاور و مصرف ماژول",
+            key="psu_power_sizing",
+            help=f"بدون این گزینه هر پاور {module.modules_per_psu} ماژول را تغذیه می‌کند (نسبت کاتالوگ)"
+        )
+        st.slider(
+            "حداکثر بار هر پاور (%)", min_value=50, max_value=100, value=int(PSU_HEADROOM * 100),
+            key="psu_headroom_percent", disabled=not power_sizing
+        )
+        st.checkbox("هر پاور فقط ماژول‌های یک کارت", key="psu_group_by_card")
+        options = power_options()
+        per_psu = options["per_psu"]
+        if options["power_sizing"]:
+            per_psu = modules_per_psu(options["psu_watt"], options["module_power_w"], options["headroom"])
+        st.caption(f"حداکثر {per_psu} ماژول روی هر پاور")
+
+
+@st.fragment(key="prices")
+def price_editor():
+    """ویرایشگر قیمت‌ها؛ تغییر هر ورودی فقط همین بخش را اجرا می‌کند"""
+    with st.expander("💰 تنظیم قیمت‌ها", expanded=False):
+        st.markdown("#### قیمت دلار")
+        current_dollar_rate = st.session_state.get("dollar_rate", 0)
+        new_dollar_rate = st.number_input(
+            "قیمت روز دلار (ریال)",
+            value=float(current_dollar_rate),
+            step=1000.0,
+            format="%.0f",
+            key="dollar_input"
+        )
+        st.info(f"💵 {int(new_dollar_rate):,} ریال")
+
+        prices = st.session_state.get("prices", get_default_prices())
+
+        st.markdown("#### قیمت مواد")
+
+        # --- ماژول ---
+        module_col1, module_col2 = st.columns([3, 1])  # نسبت ۳ به ۱ برای فضای بیشتر
+        with module_col1:
+            st.number_input(
+                "ماژول",
+                value=prices["module"],
+                step=0.01,
+                format="%.2f",
+                key="module_price"
             )
-            ax.add_patch(rect)
-            ax.text(
-                x * 32 + 16, (modules_y - 1 - y) * 16 + 8,
-                str(card_id),
-                ha='center', va='center',
-                fontsize=8, fontweight='bold', color='white'
+        with module_col2:
+            st.selectbox(
+                "واحد",
+                ["ریال", "دلار"],
+                index=0 if prices["module_unit"] == "ریال" else 1,
+                key="module_unit"
             )
 
-    for i in range(modules_x):
-        ax.text(i * 32 + 16, -5, str(i + 1), ha='center', va='top', fontsize=9, color='#555555', fontweight='bold')
-    for j in range(modules_y):
-        ax.text(-5, (modules_y - 1 - j) * 16 + 8, str(j + 1), ha='right', va='center', fontsize=9, color='#555555', fontweight='bold')
-
-    ax.set_xlim(-10, modules_x * 32)
-    ax.set_ylim(-10, modules_y * 16)
-    ax.set_title(f'{modules_x} × {modules_y} ', fontsize=14, fontweight='bold', pad=15)
-    ax.set_aspect('equal')
-    ax.axis('off')
-    plt.tight_layout()
-    return fig
-
-def get_stats_from_grid(grid):
-    """استخراج اطلاعات از گرید"""
-    unique_cards = np.unique(grid)
-    cards_used = len(unique_cards)
-    total_modules = grid.size
-
-    card_counts = {}
-    for card in unique_cards:
-        card_counts[card] = np.sum(grid == card)
+        # --- کارت گیرنده ---
+        receiver_col1, receiver_col2 = st.columns([3, 1])
+        with receiver_col1:
+            st.number_input(
+                "کارت گیرنده",
+                value=prices["receiver_card"],
+                step=0.01,
+                format="%.2f",
+                key="receiver_price"
+            )
+        with receiver_col2:
+            st.selectbox(
+                "واحد",
+                ["ریال", "دلار"],
+                index=0 if prices["receiver_unit"] == "ریال" else 1,
+                key="receiver_unit"
+            )
 
-    return {
-        'cards_used': cards_used,
-        'total_modules': total_modules,
-        'card_counts': card_counts
-    }
+        # --- پاور 60 وات ---
+        power_col1, power_col2 = st.columns([3, 1])
+        with power_col1:
+            st.number_input(
+                "پاور 60 وات",
+                value=prices["power_supply_60w"],
+                step=0.01,
+                format="%.2f",
+                key="psu_price"
+            )
+        with power_col2:
+            st.selectbox(
+                "واحد",
+                ["ریال", "دلار"],
+                index=0 if prices["power_unit"] == "ریال" else 1,
+                key="power_unit"
+            )
 
-@st.cache_data
-def get_default_prices():
-    default_controller_prices = {}
-    default_controller_units = {}
-    for name in CONTROLLERS.keys():
-        default_controller_prices[name] = 100.0
-        default_controller_units[name] = "ریال"
+        # --- سازه ---
+        structure_col1, structure_col2 = st.columns([3, 1])
+        with structure_col1:
+            st.number_input(
+                "سازه (قیمت هر متر مربع)",  # ✅ تغییر لیبل
+                value=prices["structure"],
+                step=0.01,
+                format="%.2f",
+                key="structure_price"
+            )
+        with structure_col2:
+            st.selectbox(
+                "واحد",
+                ["ریال", "دلار"],
+                index=0 if prices["structure_unit"] == "ریال" else 1,
+                key="structure_unit"
+            )
 
-    return {
-        "module": 100.0,
-        "receiver_card": 200.0,
-        "power_supply_60w": 50.0,
-        "structure": 100.0,  # ✅ این الان قیمت هر متر مربع هست
-        "hdmi_cable": 100.0,
-        "cable_magnet": 100.0,
-        "module_unit": "ریال",
-        "receiver_unit": "ریال",
-        "power_unit": "ریال",
-        "structure_unit": "ریال",
-        "hdmi_cable_unit": "ریال",
-        "cable_magnet_unit": "ریال",
-        "controller_prices": default_controller_prices,
-        "controller_units": default_controller_units
+        # --- کابل HDMI ---
+        hdmi_col1, hdmi_col2 = st.columns([3, 1])
+        with hdmi_col1:
+            st.number_input(
+                "کابل HDMI",
+                value=prices["hdmi_cable"],
+                step=0.01,
+                format="%.2f",
+                key="hdmi_price"
+            )
+        with hdmi_col2:
+            st.selectbox(
+                "واحد",
+                ["ریال", "دلار"],
+                index=0 if prices["hdmi_cable_unit"] == "ریال" else 1,
+                key="hdmi_cable_unit"
+            )
+
+        # --- کابل و مگنت ---
+        cable_col1, cable_col2 = st.columns([3, 1])
+        with cable_col1:
+            st.number_input(
+                "کابل و مگنت",
+                value=prices["cable_magnet"],
+                step=0.01,
+                format="%.2f",
+                key="cable_price"
+            )
+        with cable_col2:
+            st.selectbox(
+                "واحد",
+                ["ریال", "دلار"],
+                index=0 if prices["cable_magnet_unit"] == "ریال" else 1,
+                key="cable_magnet_unit"
+            )
+
+        # --- قیمت کنترلرها ---
+        st.markdown("#### قیمت کنترلرها")
+
+        controller_prices = prices.get("controller_prices", {})
+        controller_units = prices.get("controller_units", {})
+
+        for name in CATALOG.controllers:
+            col_price, col_unit = st.columns([3, 1])
+
+            with col_price:
+                st.markdown(f"**{name}**")
+                price = controller_prices.get(name, 100.0)
+                st.number_input(
+                    "قیمت",
+                    value=price,
+                    step=0.01,
+                    format="%.2f",
+                    key=f"controller_{name}",
+                    label_visibility="collapsed"
+                )
+
+            with col_unit:
+                unit = controller_units.get(name, "ریال")
+                st.selectbox(
+                    "واحد",
+                    ["ریال", "دلار"],
+                    index=0 if unit == "ریال" else 1,
+                    key=f"unit_{name}",
+                    label_visibility="collapsed"
+                )
+
+        # --- ذخیره قیمت‌ها ---
+        st.button("💾 ذخیره قیمت‌ها", width="stretch", on_click=save_prices)
+        if st.session_state.pop("prices_saved", False):
+            st.success("✓ قیمت‌ها ذخیره شدند!")
+
+
+def select_controller():
+    """ثبت کنترلر انتخاب‌شده و اجرای مجدد نتایج"""
+    name = st.session_state.controller_selector.split(" (")[0]
+    st.session_state.selected_controller_info = {
+        "name": name,
+        "max_resolution": CATALOG.controller(name).max_resolution,
+        "price": name
     }
+    rerun_dependents("controller")
 
-def format_number(amount):
-    """فرمت کردن اعداد با جداکننده سه رقمی"""
-    if amount == 0:
-        return "0"
-    amount_int = int(amount)
-    formatted = f"{amount_int:,}".replace(",", ".")
-    return formatted
-
-def format_currency(amount):
-    """فرمت کردن اعداد با جداکننده سه رقمی و واحد ریال"""
-    if amount == 0:
-        return "0 ریال"
-    amount_int = int(amount)
-    formatted = f"{amount_int:,}".replace(",", ".")
-    return f"{formatted} ریال"
 
+@st.fragment(key="controller")
+def controller_selector(total_resolution):
+    """انتخاب کنترلر؛ تغییر آن فقط همین بخش و نتایج را دوباره اجرا می‌کند"""
+    st.subheader("🎮 انتخاب کنترلر")
+
+    # کنترلرهای کافی از کوچک به بزرگ (جست‌وجوی دودویی در کاتالوگ)
+    available_controllers = {c.name: c for c in CATALOG.controllers_for(total_resolution)}
+
+    if not available_controllers:
+        st.error("❌ هیچ کنترلری برای این رزولوشن موجود نیست!")
+        selected_controller = None
+    else:
+        controller_options = []
+        for name, info in available_controllers.items():
+            option_text = f"{name} (حداکثر: {format_number(info.max_resolution)})"  # ✅ اصلاح
+            controller_options.append(option_text)
+
+        default_controller_index = 0
+        selected_controller_info = st.session_state.get("selected_controller_info", {})
+        if selected_controller_info:
+            default_controller_name = selected_controller_info.get("name", "")
+            try:
+                default_controller_index = list(available_controllers.keys()).index(default_controller_name)
+            except ValueError:
+                default_controller_index = 0
+
+        selected_option_text = st.selectbox(
+            "کنترلر مناسب:",
+            options=controller_options,
+            index=default_controller_index,
+            key="controller_selector",
+            on_change=select_controller
+        )
+
+        selected_controller_name = selected_option_text.split(" (")[0]
+        selected_controller = available_controllers[selected_controller_name]
+        st.session_state.selected_controller_info = {
+            "name": selected_controller_name,
+            "max_resolution": selected_controller.max_resolution,
+            "price": selected_controller_name
+        }
+
+
+def apply_module_edit():
+    """اعمال ویرایش فرم؛ پس از آن فقط fragment نتایج دوباره اجرا می‌شود"""
+    state = st.session_state
+    edit_row, edit_col, new_card = state.edit_row, state.edit_col, int(state.new_card_for_single)
+    if not state.layout_editor.is_installed(edit_row - 1, edit_col - 1):
+        state.edit_message = f"ماژول ({edit_col}, {edit_row}) در بریدگی دیوار است و نصب نمی‌شود"
+        return
+    state.layout_editor.set_module(edit_row - 1, edit_col - 1, new_card)
+    state.edit_message = f"ماژول ({edit_col}, {edit_row}) به کارت {new_card} تغییر یافت"
+
+
+BULK_SELECTIONS = {
+    "مستطیل": "rect",
+    "یک ردیف": "row",
+    "یک ستون": "col",
+    "ماژول‌های یک کارت": "card",
+    "کل دیوار": "all"
+}
+
+BULK_OPERATIONS = {
+    "تخصیص به کارت الف": "assign",
+    "جابه‌جایی کارت الف و ب": "swap",
+    "ادغام کارت ب در کارت الف": "merge"
+}
+
+
+def apply_bulk_edit():
+    """ویرایش گروهی با یک عمل برداری؛ آمار و هزینه فقط یک بار دوباره حساب می‌شوند"""
+    state = st.session_state
+    editor = state.layout_editor
+    kind = BULK_SELECTIONS[state.bulk_kind]
+    row0, col0 = state.bulk_row0 - 1, state.bulk_col0 - 1
+    if kind == "rect":
+        selection = editor.select_rect(row0, col0, state.bulk_row1 - 1, state.bulk_col1 - 1)
+    elif kind == "row":
+        selection = editor.select_row(row0)
+    elif kind == "col":
+        selection = editor.select_col(col0)
+    elif kind == "card":
+        selection = editor.select_card(int(state.bulk_source_card))
+    else:
+        selection = editor.select_all()
+
+    operation = BULK_OPERATIONS[state.bulk_operation]
+    card_a, card_b = int(state.bulk_card_a), int(state.bulk_card_b)
+    if operation == "assign":
+        changed = editor.assign(selection, card_a)
+    elif operation == "swap":
+        changed = editor.swap(card_a, card_b, selection)
+    else:
+        changed = editor.merge([card_b], card_a, selection)
+    state.edit_message = f"{changed} ماژول در یک عمل تغییر کرد"
+
+
+def undo_edit():
+    if st.session_state.layout_editor.undo():
+        st.session_state.edit_message = "آخرین ویرایش برگردانده شد"
+
+
+def redo_edit():
+    if st.session_state.layout_editor.redo():
+        st.session_state.edit_message = "ویرایش دوباره اعمال شد"
+
+
+def run_layout_analysis():
+    """بهینه‌ساز مسیر کابل و بررسی کامل چیدمان؛ فقط پس از حل چیدمان یا با درخواست کاربر"""
+    state = st.session_state
+    editor = state.layout_editor
+    editor.route()
+    editor.validate(state.get("max_modules_per_card"))
+
+
+def layout_analysis_is_current(editor):
+    return editor.route_is_current and editor.report_is_current
+
+
+# بیش از این تعداد ایراد در جدول فهرست نمی‌شود (ویرایش گروهی ممکن است هزاران ایراد بسازد)
+MAX_LISTED_VIOLATIONS = 200
+
+
+@st.fragment(key="results")
 def show_results_and_edit():
     """نمایش نتایج و فرم ویرایش"""
     # --- خواندن عرض و ارتفاع از session_state ---
     wall_width_cm = st.session_state.wall_width_cm
     wall_height_cm = st.session_state.wall_height_cm
 
-    stats = get_stats_from_grid(st.session_state.module_grid)
-    cards_needed = stats['cards_used']
-    total_modules = stats['total_modules']
-
-    psu_count = int(np.ceil(total_modules / 6))
-
-    px_per_module_x = round(320 / dot_pitch)
-    px_per_module_y = round(160 / dot_pitch)
+    px_per_module_x, px_per_module_y = module_pixels(dot_pitch, module_type)
     resolution_x = modules_x * px_per_module_x
     resolution_y = modules_y_round * px_per_module_y
     total_resolution = resolution_x * resolution_y
     module_resolution = px_per_module_x * px_per_module_y
 
-    prices = st.session_state.get("prices", get_default_prices())
-
-    def convert_to_rial(price, unit, dollar_rate):
-        if unit == "دلار":
-            return price * dollar_rate
-        else:
-            return price
+    editor = st.session_state.layout_editor
+    cards_needed = editor.cards_used
+    total_modules = editor.total_modules
 
+    prices = st.session_state.get("prices", get_default_prices())
     dollar_rate = st.session_state.get("dollar_rate", 0)
 
-    module_cost = total_modules * convert_to_rial(prices["module"], prices["module_unit"], dollar_rate)
-    receiver_cost = cards_needed * convert_to_rial(prices["receiver_card"], prices["receiver_unit"], dollar_rate)
-    power_cost = psu_count * convert_to_rial(prices["power_supply_60w"], prices["power_unit"], dollar_rate)
-
     controller_info = st.session_state.get("selected_controller_info", {})
     selected_controller_name = controller_info.get("name", "")
 
-    controller_price = 0.0
-    controller_unit = "ریال"
-    if selected_controller_name and selected_controller_name in prices["controller_prices"]:
-        controller_price = prices["controller_prices"][selected_controller_name]
-        controller_unit = prices["controller_units"].get(selected_controller_name, "ریال")
-
-    controller_cost = convert_to_rial(controller_price, controller_unit, dollar_rate)
-
-    # ✅ اصلاح: ضرب قیمت سازه در مساحت گرد شده
-    wall_area_m2 = (wall_width_cm / 100) * (wall_height_cm / 100)
-    wall_area_m2_rounded = round(wall_area_m2)  # ✅ گرد کردن مساحت
-    structure_price_per_sqm = prices.get("structure", 100.0)
-    structure_unit = prices.get("structure_unit", "ریال")
-    structure_cost_per_sqm_rial = convert_to_rial(structure_price_per_sqm, structure_unit, dollar_rate)
-    structure_cost = structure_cost_per_sqm_rial * wall_area_m2_rounded  # ✅ ضرب در مساحت گرد شده
-
-    hdmi_cable_cost = convert_to_rial(prices["hdmi_cable"], prices["hdmi_cable_unit"], dollar_rate)
-    cable_magnet_cost = convert_to_rial(prices["cable_magnet"], prices["cable_magnet_unit"], dollar_rate)
-
-    total_cost = module_cost + receiver_cost + power_cost + controller_cost + structure_cost + hdmi_cable_cost + cable_magnet_cost
+    # پس از هر ویرایش فقط شمارش‌ها و هزینه به‌روز می‌شوند؛ مسیر کابل، بررسی کامل، آمار
+    # کارت‌ها و برنامه برق تا درخواست کاربر (run_layout_analysis) از آخرین نسخه بررسی‌شده‌اند
+    options = power_options()
+    analysis_current = layout_analysis_is_current(editor)
+    route = editor.last_route
+    report = editor.last_report if analysis_current else None
+    stats = power = None
+    if analysis_current:
+        with stage("results.stats"):
+            stats = editor.stats()
+        with stage("results.power"):
+            power = editor.power_plan(**options)
+
+    with stage("results.costs"):
+        costs = editor.costs(
+            wall_width_cm,
+            wall_height_cm,
+            prices,
+            dollar_rate=dollar_rate,
+            controller_name=selected_controller_name,
+            route=route,
+            psu_count=editor.psu_count(**options)
+        )
+    psu_count = costs.psu_count
+    total_cost = costs.total
 
-    tab1, tab2, tab3 = st.tabs(["📊 نتایج", "💰 هزینه‌ها", "✏️ ویرایش"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📊 نتایج", "💰 هزینه‌ها", "✏️ ویرایش", "📥 خروجی"])
 
     with tab1:
         col_l, col_r = st.columns(2)
@@ -328,7 +596,7 @@ def show_results_and_edit():
 
         col_l2, col_r2 = st.columns(2)
         with col_l2:
-            st.metric("پاور 60 وات", f"{format_number(psu_count)} عدد")  # ✅ اصلاح
+            st.metric(f"پاور {options['psu_watt']:g} وات", f"{format_number(psu_count)} عدد")  # ✅ اصلاح
         with col_r2:
             controller_display = selected_controller_name if selected_controller_name else "انتخاب نشده"
             st.metric("کنترلر انتخاب شده", controller_display)
@@ -336,22 +604,123 @@ def show_results_and_edit():
         if "max_resolution" in controller_info:
             st.info(f"حداکثر رزولوشن پشتیبانی‌شده: {format_number(controller_info['max_resolution'])}")  # ✅ اصلاح
 
+        if not analysis_current:
+            col_a1, col_a2 = st.columns([3, 1])
+            col_a1.info("مسیر کابل، بررسی ایرادها، جزئیات کارت‌ها و برنامه برق پس از آخرین ویرایش به‌روز نشده‌اند.")
+            col_a2.button("🔍 بررسی کامل چیدمان", key="run_analysis", on_click=run_layout_analysis, width="stretch")
+
         st.subheader("چیدمان ماژول‌ها")
-        fig = draw_module_layout(modules_x, modules_y_round, blocks, st.session_state.module_grid)
-        st.pyplot(fig, use_container_width=True)
+        renderer_label = st.radio(
+            "نوع نمایش",
+            options=list(LAYOUT_RENDERERS.keys()),
+            horizontal=True,
+            key="layout_renderer"
+        )
+        renderer = LAYOUT_RENDERERS[renderer_label]
+        highlight = (
+            renderer == "svg" and report is not None and not report.ok
+            and st.checkbox("برجسته‌سازی ایرادها", value=True, key="highlight_violations")
+        )
+        with stage("draw_module_layout"):
+            layout_image = memo(
+                "layout_image",
+                (id(editor), editor.version, renderer, highlight),
+                lambda: render_layout_image(
+                    modules_x, modules_y_round, st.session_state.layout, editor, renderer,
+                    highlight=report.highlight_mask() if highlight else None
+                )
+            )
+        with stage("st.image"):
+            st.image(layout_image, width="stretch")
+
+        if report is not None and not report.ok:
+            counts = {}
+            for violation in report.violations:
+                counts[violation.kind] = counts.get(violation.kind, 0) + 1
+            st.warning(
+                "⚠️ ایرادهای چیدمان: "
+                + "، ".join(f"{VIOLATION_LABELS[kind]} ({count})" for kind, count in counts.items())
+            )
+            with st.expander("جزئیات ایرادها"):
+                shown = report.violations[:MAX_LISTED_VIOLATIONS]
+                st.dataframe(pd.DataFrame({
+                    "نوع": [VIOLATION_LABELS[v.kind] for v in shown],
+                    "کارت": ["" if v.card is None else str(v.card) for v in shown],
+                    "شرح": [v.message for v in shown],
+                    "ماژول‌های مشکل‌دار": [len(v.cells) for v in shown]
+                }), hide_index=True, width="stretch")
+                if len(report.violations) > len(shown):
+                    st.caption(f"{len(shown)} مورد از {len(report.violations)} ایراد نمایش داده شده است.")
+
+        with st.expander("جزئیات کارت‌ها"):
+            if stats is None:
+                st.caption("برای نمایش، «بررسی کامل چیدمان» را بزنید.")
+            else:
+                df_cards = pd.DataFrame({
+                    "کارت": list(stats.card_counts.keys()),
+                    "تعداد ماژول": list(stats.card_counts.values()),
+                    "پیکسل": list(stats.card_pixels.values()),
+                    "بار (%)": [round(load * 100, 1) for load in stats.card_load.values()],
+                    "محدوده (ستون، ردیف، عرض، ارتفاع)": [
+                        f"{x + 1}، {y + 1}، {w}×{h}" for x, y, w, h in stats.card_bboxes.values()
+                    ],
+                    "بیش از ظرفیت": [card in stats.over_capacity for card in stats.card_counts]
+                })
+                st.dataframe(df_cards, hide_index=True, width="stretch")
+
+        with st.expander("مسیر کابل شبکه کارت‌ها"):
+            if route is None:
+                st.caption("برای نمایش، «بررسی کامل چیدمان» را بزنید.")
+            elif not editor.route_is_current:
+                st.caption("⚠️ این مسیر مربوط به پیش از آخرین ویرایش است.")
+            if route is not None:
+                col_c1, col_c2, col_c3 = st.columns(3)
+                col_c1.metric("پورت‌های کنترلر", f"{len(route.ports)} عدد")
+                col_c2.metric("کابل شبکه", f"{format_number(route.cable_count)} عدد")
+                col_c3.metric(
+                    "طول کل کابل",
+                    f"{route.total_length_m:,.1f} متر",
+                    delta=f"{route.total_length_m - route.baseline_length_m:,.1f} متر نسبت به مسیر مارپیچ",
+                    delta_color="inverse"
+                )
+                st.dataframe(pd.DataFrame({
+                    "پورت": range(1, len(route.ports) + 1),
+                    "ترتیب کارت‌ها": [" → ".join(str(card) for card in port) for port in route.ports],
+                    "پیکسل": [format_number(px) for px in route.port_pixels]
+                }), hide_index=True, width="stretch")
+                st.caption(f"مسیر از گوشه پایین چپ دیوار (محل کنترلر) شروع می‌شود؛ زمان محاسبه {route.elapsed_s:.2f} ثانیه")
+
+        with st.expander("برنامه برق پاورها"):
+            if power is None:
+                st.caption("برای نمایش، «بررسی کامل چیدمان» را بزنید.")
+            else:
+                col_p1, col_p2, col_p3 = st.columns(3)
+                col_p1.metric("توان کل", f"{format_number(round(power.total_power_w))} وات")
+                if power.sized_by_power:
+                    col_p2.metric("بیشترین بار پاور", f"{power.psu_load_fraction.max(initial=0) * 100:.0f}%")
+                    col_p3.metric("کمترین بار پاور", f"{power.psu_load_fraction.min(initial=1) * 100:.0f}%")
+                    if power.overloaded.size:
+                        st.warning(
+                            f"⚠️ مصرف هر ماژول از {power.headroom * 100:.0f}% توان پاور بیشتر است؛ "
+                            f"{power.overloaded.size} پاور بیش از حد مجاز بار دارند."
+                        )
+                    psu_table = {
+                        "پاور": np.arange(1, power.psu_count + 1),
+                        "ماژول": power.psu_modules,
+                        "بار (وات)": power.psu_load_w,
+                        "بار (%)": np.round(power.psu_load_fraction * 100, 1)
+                    }
+                else:
+                    # با نسبت ثابت، بار اسمی (مصرف حداکثر ماژول) معیار درستی برای پاور نیست
+                    col_p2.metric("ماژول روی هر پاور", f"{power.per_psu} عدد")
+                    psu_table = {"پاور": np.arange(1, power.psu_count + 1), "ماژول": power.psu_modules}
+                st.dataframe(pd.DataFrame(psu_table), hide_index=True, width="stretch")
 
     with tab2:
         st.subheader("تفکیک هزینه‌ها")
 
-        cost_data = {
-            "ماژول‌ها": module_cost,
-            "کارت‌های گیرنده": receiver_cost,
-            "پاورها": power_cost,
-            "کنترلر": controller_cost,
-            "سازه": structure_cost,  # ✅ این الان هزینه کل سازه (قیمت × مساحت گرد شده) هست
-            "کابل HDMI": hdmi_cable_cost,
-            "کابل و مگنت": cable_magnet_cost
-        }
+        # سازه: هزینه کل سازه (قیمت × مساحت گرد شده)
+        cost_data = {label: amount for item, label, amount in cost_rows(costs) if item != "total"}
 
         col1, col2 = st.columns([1, 1])
 
@@ -368,12 +737,17 @@ def show_results_and_edit():
 
             st.divider()
 
-            df_costs = pd.DataFrame({
-                "مورد": list(cost_data.keys()),
-                "هزینه (ریال)": [format_currency(cost) for cost in cost_data.values()]  # ✅ اصلاح
-            })
+            with stage("cost_table"):
+                df_costs = pd.DataFrame({
+                    "مورد": list(cost_data.keys()),
+                    "هزینه (ریال)": [format_currency(cost) for cost in cost_data.values()]  # ✅ اصلاح
+                })
 
-            st.dataframe(df_costs, hide_index=True, use_container_width=True)
+                st.dataframe(df_costs, hide_index=True, width="stretch")
+            st.caption(
+                f"کابل و مگنت برای {costs.cable_count} کابل شبکه (یکی برای هر کارت) حساب شده است؛ "
+                f"طول کابل ({costs.cable_length_m:,.1f} متر) از آخرین مسیر بررسی‌شده است."
+            )
 
     with tab3:
         st.subheader("ویرایش جداگانه ماژول‌ها")
@@ -388,8 +762,8 @@ def show_results_and_edit():
                 edit_col = st.number_input("ستون", min_value=1, max_value=modules_x, step=1, key="edit_col")
 
             with col_e3:
-                current_card = int(st.session_state.module_grid[edit_row-1, edit_col-1])
-                new_card = st.number_input(
+                current_card = int(editor.grid[edit_row-1, edit_col-1])
+                st.number_input(
                     "کارت جدید",
                     min_value=1,
                     max_value=cards_needed if cards_needed > 0 else 1,
@@ -398,38 +772,124 @@ def show_results_and_edit():
                     key="new_card_for_single"
                 )
 
-            submit_button = st.form_submit_button("✓ اعمال تغییر")
-
-        if submit_button:
-            row_idx = edit_row - 1
-            col_idx = edit_col - 1
-            st.session_state.module_grid[row_idx, col_idx] = int(new_card)
-            st.success(f"ماژول ({edit_col}, {edit_row}) به کارت {new_card} تغییر یافت")
-            st.rerun()
-
-
-CONTROLLERS = {
-    "x100 pro 4u": {"max_resolution": 26000000},
-    "x10pro 7u": {"max_resolution": 52000000},
-    "x40 m": {"max_resolution": 26000000},
-    "x26m": {"max_resolution": 17000000},
-    "x12": {"max_resolution": 7800000},
-    "x7": {"max_resolution": 5200000},
-    "x6": {"max_resolution": 3900000},
-    "x4": {"max_resolution": 2600000},
-    "x2": {"max_resolution": 1300000},
-    "vx1000": {"max_resolution": 6500000},
-    "vx600": {"max_resolution": 3900000},
-    "vx4s": {"max_resolution": 2300000}
-}
+            st.form_submit_button("✓ اعمال تغییر", on_click=apply_module_edit)
+
+        st.subheader("ویرایش گروهی")
+        with st.form(key="bulk_edit_form"):
+            col_b1, col_b2 = st.columns(2)
+            with col_b1:
+                st.selectbox("محدوده", options=list(BULK_SELECTIONS.keys()), key="bulk_kind")
+            with col_b2:
+                st.selectbox("عملیات", options=list(BULK_OPERATIONS.keys()), key="bulk_operation")
+
+            st.caption("برای «یک ردیف» و «یک ستون» فقط ردیف/ستون شروع استفاده می‌شود.")
+            col_r1, col_r2, col_r3, col_r4 = st.columns(4)
+            with col_r1:
+                st.number_input("ردیف شروع", min_value=1, max_value=modules_y_round, step=1, key="bulk_row0")
+            with col_r2:
+                st.number_input("ستون شروع", min_value=1, max_value=modules_x, step=1, key="bulk_col0")
+            with col_r3:
+                st.number_input("ردیف پایان", min_value=1, max_value=modules_y_round, step=1, key="bulk_row1")
+            with col_r4:
+                st.number_input("ستون پایان", min_value=1, max_value=modules_x, step=1, key="bulk_col1")
+
+            max_card = max(cards_needed, int(editor.grid.max()), 1)
+            col_c1, col_c2, col_c3 = st.columns(3)
+            with col_c1:
+                st.number_input("کارت محدوده", min_value=1, max_value=max_card, step=1, key="bulk_source_card")
+            with col_c2:
+                st.number_input("کارت الف", min_value=1, max_value=max_card, step=1, key="bulk_card_a")
+            with col_c3:
+                st.number_input("کارت ب", min_value=1, max_value=max_card, step=1, key="bulk_card_b")
+
+            st.form_submit_button("✓ اعمال ویرایش گروهی", on_click=apply_bulk_edit)
+
+        history = editor.history
+        col_u1, col_u2, col_u3 = st.columns([1, 1, 2])
+        with col_u1:
+            st.button("↩️ برگرداندن", key="undo_edit", on_click=undo_edit,
+                      disabled=not history.can_undo, width="stretch")
+        with col_u2:
+            st.button("↪️ انجام دوباره", key="redo_edit", on_click=redo_edit,
+                      disabled=not history.can_redo, width="stretch")
+        with col_u3:
+            st.caption(f"تاریخچه: {len(history)} ویرایش | قابل انجام دوباره: {history.redo_count}")
+
+        edit_message = st.session_state.pop("edit_message", None)
+        if edit_message:
+            st.success(edit_message)
+
+    with tab4:
+        st.subheader("دریافت خروجی")
+        st.caption("فایل‌ها فقط هنگام کلیک ساخته می‌شوند و تا تغییر چیدمان یا قیمت‌ها در کش می‌مانند.")
+        base_name = f"videowall_{modules_x}x{modules_y_round}"
+        meta = {
+            "wall_width_cm": wall_width_cm,
+            "wall_height_cm": wall_height_cm,
+            "controller": selected_controller_name,
+        }
+        exports = [
+            ("🧩 نقشه ماژول به کارت (CSV)", "modules.csv", "text/csv",
+             lambda grid, stats, costs: encode_chunks(iter_module_csv(grid, mask=editor.mask))),
+            ("🗂️ خلاصه کارت‌ها (CSV)", "cards.csv", "text/csv",
+             lambda grid, stats, costs: encode_chunks(iter_card_csv(stats))),
+            ("💰 تفکیک هزینه‌ها (CSV)", "costs.csv", "text/csv",
+             lambda grid, stats, costs: encode_chunks(iter_cost_csv(costs))),
+            ("📄 همه اطلاعات (JSON)", "layout.json", "application/json",
+             lambda grid, stats, costs: encode_chunks(iter_layout_json(grid, stats, costs, meta))),
+        ]
+        if XLSX_AVAILABLE:
+            exports.append((
+                "📊 فایل اکسل (XLSX)", "layout.xlsx",
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                lambda grid, stats, costs: build_xlsx(grid, stats, costs, mask=editor.mask)
+            ))
+        else:
+            st.caption("برای خروجی اکسل، بسته openpyxl را نصب کنید.")
+
+        col_x1, col_x2 = st.columns(2)
+        for i, (label, suffix, mime, build) in enumerate(exports):
+            with (col_x1 if i % 2 == 0 else col_x2):
+                st.download_button(
+                    label,
+                    data=export_builder(suffix + str(meta), editor, costs, build),
+                    file_name=f"{base_name}_{suffix}",
+                    mime=mime,
+                    key=f"export_{suffix}",
+                    width="stretch"
+                )
+        # PNG همان تصویر نمایش‌داده‌شده در زبانه نتایج است؛ فقط در نمایش SVG همان تصویر
+        # حالت سریع (از raster نگه‌داشته‌شده ویرایشگر) ساخته می‌شود
+        png_renderer = "fast" if renderer == "svg" else renderer
+        layout = st.session_state.layout
+
+        def build_png(grid, stats, costs):
+            if renderer != "svg":
+                return layout_image
+            return render_layout_image(modules_x, modules_y_round, layout, editor, "fast")
+
+        with col_x1:
+            st.download_button(
+                "🖼️ تصویر چیدمان (PNG)",
+                data=export_builder(f"layout.{png_renderer}.png", editor, costs, build_png),
+                file_name=f"{base_name}.png",
+                mime="image/png",
+                key="export_png",
+                width="stretch"
+            )
+        with col_x2:
+            st.download_button(
+                "✒️ تصویر برداری چیدمان (SVG)",
+                data=export_builder(
+                    "layout.svg", editor, costs,
+                    lambda grid, stats, costs: render_layout_svg(grid, mask=editor.mask).encode("utf-8")
+                ),
+                file_name=f"{base_name}.svg",
+                mime="image/svg+xml",
+                key="export_svg",
+                width="stretch"
+            )
 
-dot_pitch_limits = {
-    "1.5 داخلی": {"dot_pitch": 1.5, "max_modules_per_card": 8},
-    "1.8 داخلی": {"dot_pitch": 1.8, "max_modules_per_card": 13},
-    "2.5 داخلی": {"dot_pitch": 2.5, "max_modules_per_card": 16},
-    "2.5 خارجی": {"dot_pitch": 2.5, "max_modules_per_card": 8},
-    "4 خارجی": {"dot_pitch": 4.0, "max_modules_per_card": 12}
-}
 
 st.set_page_config(
     page_title="محاسبه‌گر ویدئووال",
@@ -567,6 +1027,16 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+profiling_enabled = (
+    os.environ.get("VIDEOWALL_PROFILE") == "1"
+    or st.session_state.get("profiling_enabled", False)
+)
+start_run(
+    profiling_enabled,
+    log_path=os.environ.get("VIDEOWALL_PROFILE_LOG", "videowall_profile.jsonl"),
+    session=id(st.session_state)
+)
+
 jalali_date = get_jalali_date()
 current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -582,186 +1052,14 @@ st.markdown(f"""
 if 'calculation_performed' not in st.session_state:
     st.session_state.calculation_performed = False
 
-with st.sidebar:
-    st.markdown("### ⚙️ تنظیمات")
-
-    with st.expander("💰 تنظیم قیمت‌ها", expanded=False):
-        st.markdown("#### قیمت دلار")
-        current_dollar_rate = st.session_state.get("dollar_rate", 0)
-        new_dollar_rate = st.number_input(
-            "قیمت روز دلار (ریال)",
-            value=float(current_dollar_rate),
-            step=1000.0,
-            format="%.0f",
-            key="dollar_input"
-        )
-        st.info(f"💵 {int(new_dollar_rate):,} ریال")
-
-        prices = st.session_state.get("prices", get_default_prices())
+with stage("sidebar_prices"):
+    with st.sidebar:
+        st.markdown("### ⚙️ تنظیمات")
 
-        st.markdown("#### قیمت مواد")
+        price_editor()
+        power_settings()
 
-        # --- ماژول ---
-        module_col1, module_col2 = st.columns([3, 1])  # نسبت ۳ به ۱ برای فضای بیشتر
-        with module_col1:
-            module_price = st.number_input(
-                "ماژول",
-                value=prices["module"],
-                step=0.01,
-                format="%.2f",
-                key="module_price"
-            )
-        with module_col2:
-            module_unit = st.selectbox(
-                "واحد",
-                ["ریال", "دلار"],
-                index=0 if prices["module_unit"] == "ریال" else 1,
-                key="module_unit"
-            )
-
-        # --- کارت گیرنده ---
-        receiver_col1, receiver_col2 = st.columns([3, 1])
-        with receiver_col1:
-            receiver_price = st.number_input(
-                "کارت گیرنده",
-                value=prices["receiver_card"],
-                step=0.01,
-                format="%.2f",
-                key="receiver_price"
-            )
-        with receiver_col2:
-            receiver_unit = st.selectbox(
-                "واحد",
-                ["ریال", "دلار"],
-                index=0 if prices["receiver_unit"] == "ریال" else 1,
-                key="receiver_unit"
-            )
-
-        # --- پاور 60 وات ---
-        power_col1, power_col2 = st.columns([3, 1])
-        with power_col1:
-            psu_price = st.number_input(
-                "پاور 60 وات",
-                value=prices["power_supply_60w"],
-                step=0.01,
-                format="%.2f",
-                key="psu_price"
-            )
-        with power_col2:
-            power_unit = st.selectbox(
-                "واحد",
-                ["ریال", "دلار"],
-                index=0 if prices["power_unit"] == "ریال" else 1,
-                key="power_unit"
-            )
-
-        # --- سازه ---
-        structure_col1, structure_col2 = st.columns([3, 1])
-        with structure_col1:
-            structure_price = st.number_input(
-                "سازه (قیمت هر متر مربع)",  # ✅ تغییر لیبل
-                value=prices["structure"],
-                step=0.01,
-                format="%.2f",
-                key="structure_price"
-            )
-        with structure_col2:
-            structure_unit = st.selectbox(
-                "واحد",
-                ["ریال", "دلار"],
-                index=0 if prices["structure_unit"] == "ریال" else 1,
-                key="structure_unit"
-            )
-
-        # --- کابل HDMI ---
-        hdmi_col1, hdmi_col2 = st.columns([3, 1])
-        with hdmi_col1:
-            hdmi_price = st.number_input(
-                "کابل HDMI",
-                value=prices["hdmi_cable"],
-                step=0.01,
-                format="%.2f",
-                key="hdmi_price"
-            )
-        with hdmi_col2:
-            hdmi_unit = st.selectbox(
-                "واحد",
-                ["ریال", "دلار"],
-                index=0 if prices["hdmi_cable_unit"] == "ریال" else 1,
-                key="hdmi_cable_unit"
-            )
-
-        # --- کابل و مگنت ---
-        cable_col1, cable_col2 = st.columns([3, 1])
-        with cable_col1:
-            cable_price = st.number_input(
-                "کابل و مگنت",
-                value=prices["cable_magnet"],
-                step=0.01,
-                format="%.2f",
-                key="cable_price"
-            )
-        with cable_col2:
-            cable_unit = st.selectbox(
-                "واحد",
-                ["ریال", "دلار"],
-                index=0 if prices["cable_magnet_unit"] == "ریال" else 1,
-                key="cable_magnet_unit"
-            )
-
-        # --- قیمت کنترلرها ---
-        st.markdown("#### قیمت کنترلرها")
-
-        controller_prices = prices.get("controller_prices", {})
-        controller_units = prices.get("controller_units", {})
-
-        for name, info in CONTROLLERS.items():
-            col_price, col_unit = st.columns([3, 1])
-
-            with col_price:
-                st.markdown(f"**{name}**")
-                price = controller_prices.get(name, 100.0)
-                new_price = st.number_input(
-                    "قیمت",
-                    value=price,
-                    step=0.01,
-                    format="%.2f",
-                    key=f"controller_{name}",
-                    label_visibility="collapsed"
-                )
-                controller_prices[name] = new_price
-
-            with col_unit:
-                unit = controller_units.get(name, "ریال")
-                new_unit = st.selectbox(
-                    "واحد",
-                    ["ریال", "دلار"],
-                    index=0 if unit == "ریال" else 1,
-                    key=f"unit_{name}",
-                    label_visibility="collapsed"
-                )
-                controller_units[name] = new_unit
-
-        # --- ذخیره قیمت‌ها ---
-        if st.button("💾 ذخیره قیمت‌ها", use_container_width=True):
-            st.session_state.dollar_rate = new_dollar_rate
-            st.session_state.prices = {
-                "module": module_price,
-                "receiver_card": receiver_price,
-                "power_supply_60w": psu_price,
-                "structure": structure_price,  # ✅ ذخیره قیمت هر متر مربع
-                "hdmi_cable": hdmi_price,
-                "cable_magnet": cable_price,
-                "module_unit": module_unit,
-                "receiver_unit": receiver_unit,
-                "power_unit": power_unit,
-                "structure_unit": structure_unit,
-                "hdmi_cable_unit": hdmi_unit,
-                "cable_magnet_unit": cable_unit,
-                "controller_prices": controller_prices,
-                "controller_units": controller_units
-            }
-            st.success("✓ قیمت‌ها ذخیره شدند!")
+        st.toggle("🐞 نمایش زمان‌بندی مراحل", key="profiling_enabled")
 
 # ... (بقیه کد بدون تغییر)
 
@@ -769,7 +1067,7 @@ st.markdown('<div class="input-section">', unsafe_allow_html=True)
 
 st.subheader("📐 ورودی‌های ویدئووال")
 
-col1, col2, col3 = st.columns(3)
+col1, col2, col3, col4 = st.columns(4)
 
 with col1:
     wall_w = st.number_input(
@@ -788,16 +1086,29 @@ with col2:
     )
 
 with col3:
+    module_id = st.selectbox(
+        "نوع ماژول / کابینت",
+        options=list(CATALOG.modules),
+        format_func=lambda module_id: CATALOG.modules[module_id].name,
+        key="module_type"
+    )
+    module_type = CATALOG.module(module_id)
+
+with col4:
+    pitch_names = list(module_type.pitches)
     selected_option = st.selectbox(
         "دات‌پیچ و نوع نصب",
-        options=list(dot_pitch_limits.keys()),
-        index=1
+        options=pitch_names,
+        index=min(1, len(pitch_names) - 1)
     )
-    dot_pitch_info = dot_pitch_limits[selected_option]
-    dot_pitch = dot_pitch_info["dot_pitch"]
-    max_modules_per_card = dot_pitch_info["max_modules_per_card"]
+    dot_pitch_info = module_type.pitch(selected_option)
+    dot_pitch = dot_pitch_info.dot_pitch
+    max_modules_per_card = dot_pitch_info.max_modules_per_card
 
-st.info(f"📊 حداکثر ماژول در هر کارت: **{max_modules_per_card}**")
+st.info(
+    f"📊 حداکثر ماژول در هر کارت: **{max_modules_per_card}** | "
+    f"ابعاد ماژول: {module_type.width_mm:g}×{module_type.height_mm:g} میلی‌متر"
+)
 
 # --- اصلاح شده ---
 st.subheader("🎛️ تنظیمات بلوک")
@@ -809,7 +1120,7 @@ with col_block1:
         "ماژول در عرض بلوک",
         min_value=1,
         max_value=max_modules_per_card,
-        value=2,
+        value=min(2, max_modules_per_card),
         step=1
     )
 
@@ -818,10 +1129,47 @@ with col_block2:
         "ماژول در ارتفاع بلوک",
         min_value=1,
         max_value=max_modules_per_card,
-        value=6,
+        value=min(6, max_modules_per_card),
         step=1
     )
 
+LAYOUT_MODES = {
+    "سریع (بلوکی)": "fast",
+    "کمترین تعداد کارت": "min_cards"
+}
+
+layout_mode_label = st.radio(
+    "روش چیدمان",
+    options=list(LAYOUT_MODES.keys()),
+    horizontal=True
+)
+layout_mode = LAYOUT_MODES[layout_mode_label]
+
+CUTOUT_COLUMNS = ["از چپ (cm)", "از بالا (cm)", "عرض (cm)", "ارتفاع (cm)"]
+
+with st.expander("✂️ بریدگی‌های دیوار (در، ستون، لبه پله‌ای)"):
+    st.caption("هر ردیف یک مستطیل از گوشه بالا چپ دیوار است؛ ماژولی که مرکزش داخل آن باشد نصب نمی‌شود.")
+    cutouts_df = st.data_editor(
+        pd.DataFrame(columns=CUTOUT_COLUMNS, dtype=float),
+        num_rows="dynamic",
+        key="cutouts",
+        width="stretch"
+    )
+cutouts = tuple(tuple(float(v) for v in row) for row in cutouts_df.dropna().itertuples(index=False))
+
+
+def wall_mask(modules_x, modules_y):
+    """mask ماژول‌های نصب‌شونده از بریدگی‌ها؛ None برای دیوار مستطیل کامل"""
+    mask = mask_from_cutouts(modules_x, modules_y, cutouts, module=module_type)
+    return None if mask.all() else mask
+
+
+if cutouts:
+    preview = videowall_calc(wall_w, wall_h, dot_pitch_mm=dot_pitch, module=module_type)
+    preview_mask = wall_mask(preview.modules_x, preview.modules_y_round)
+    removed = 0 if preview_mask is None else int(preview_mask.size - preview_mask.sum())
+    st.info(f"✂️ {removed} ماژول به‌خاطر بریدگی‌ها نصب نمی‌شود.")
+
 st.markdown('</div>', unsafe_allow_html=True)
 
 # --- ذخیره عرض و ارتفاع در session_state ---
@@ -830,97 +1178,337 @@ st.session_state.wall_height_cm = wall_h
 
 # ... (بقیه کد بدون تغییر)
 
-modules_x = None
-modules_y_round = None
-blocks = None
-
-def perform_calculation():
-    global modules_x, modules_y_round, blocks
-    res = videowall_calc(wall_w, wall_h, dot_pitch_mm=dot_pitch)
-    modules_x = res['modules_x']
-    modules_y_round = res['modules_y_round']
-
-    total_modules = modules_x * modules_y_round
-    blocks, grid = optimize_layout(modules_x, modules_y_round, block_w, block_h, max_modules_per_card)
+def input_signature():
+    """ورودی‌هایی که چیدمان به آن‌ها وابسته است؛ با تغییرشان حل در حال اجرا لغو می‌شود"""
+    return (wall_w, wall_h, module_type.id, dot_pitch, block_w, block_h, layout_mode, cutouts)
+
+
+def finish_calculation(job):
+    """ثبت نتیجه کار حل چیدمان در session_state"""
+    pending = st.session_state.pop("pending_calc")
+    st.session_state.pop("layout_job", None)
+    modules_x = pending["modules_x"]
+    modules_y_round = pending["modules_y_round"]
+    blocks, grid = job.result()
+    layout = CompactLayout.from_blocks(modules_x, modules_y_round, blocks)
+    if job.is_fallback:
+        st.session_state.layout_notice = (
+            f"حل چیدمان بیش از {job.timeout_s:.0f} ثانیه طول کشید؛ چیدمان بلوکی ساده نمایش داده شده است."
+        )
 
-    if 'module_grid' not in st.session_state:
-        st.session_state.module_grid = grid.copy()
-    else:
-        if st.session_state.module_grid.shape == grid.shape:
-            st.session_state.module_grid = grid.copy()
-        else:
-            st.session_state.module_grid = grid.copy()
+    # در نشست فقط بلوک‌های فشرده و گرید قابل ویرایش با کوچک‌ترین dtype نگه داشته می‌شود
+    previous = st.session_state.get("layout_editor")
+    editor = LayoutEditor(
+        grid,
+        px_per_module=pending["px_per_module"],
+        receiving_card_capacity_px=CATALOG.receiving_card_capacity_px,
+        mask=pending["mask"],
+        module=pending["module"]
+    )
+    # ویرایش‌های دستی روی چیدمان تازه با همان ابعاد دوباره اعمال می‌شوند
+    if previous is not None and len(previous.history) and previous.grid.shape == grid.shape:
+        applied, skipped = editor.replay(previous.history)
+        st.session_state.edit_message = (
+            f"{applied} ویرایش دستی روی چیدمان جدید دوباره اعمال شد"
+            + (f"؛ {skipped} مورد به‌دلیل تفاوت چیدمان کنار گذاشته شد" if skipped else "")
+        )
+    st.session_state.layout = layout
+    st.session_state.layout_editor = editor
 
     st.session_state.modules_x = modules_x
     st.session_state.modules_y_round = modules_y_round
-    st.session_state.blocks = blocks
+    st.session_state.max_modules_per_card = pending["max_modules_per_card"]
     st.session_state.calculation_performed = True
+    run_layout_analysis()
 
-    px_per_module_x = round(320 / dot_pitch)
-    px_per_module_y = round(160 / dot_pitch)
-    total_resolution = (modules_x * px_per_module_x) * (modules_y_round * px_per_module_y)
+    px_per_module_x, px_per_module_y = module_pixels(pending["dot_pitch"], pending["module"])
+    st.session_state.total_resolution = (modules_x * px_per_module_x) * (modules_y_round * px_per_module_y)
 
-    st.session_state.total_resolution = total_resolution
+
+def cancel_layout_job():
+    job = st.session_state.pop("layout_job", None)
+    st.session_state.pop("pending_calc", None)
+    if job is not None:
+        job.cancel()
+
+
+@profiled("perform_calculation")
+def perform_calculation():
+    """شروع حل چیدمان در پس‌زمینه؛ اگر سریع تمام شود نتیجه همین‌جا ثبت می‌شود"""
+    options = power_options()
+    res = videowall_calc(
+        wall_w, wall_h, dot_pitch_mm=dot_pitch,
+        power_per_module_w=options["module_power_w"],
+        psu_watt=options["psu_watt"],
+        psu_headroom=options["headroom"],
+        power_sizing=options["power_sizing"],
+        receiving_card_capacity_px=CATALOG.receiving_card_capacity_px,
+        module=module_type
+    )
+    mask = wall_mask(res.modules_x, res.modules_y_round)
+    # فقط دیوار با بریدگی mask دارد تا کلید کش دیوارهای مستطیلی مثل قبل بماند
+    mask_option = {} if mask is None else {"mask": mask}
+    cancel_layout_job()
+    with stage("optimize_layout"):
+        job = get_layout_runner().submit(
+            res.modules_x, res.modules_y_round, block_w, block_h, max_modules_per_card,
+            signature=input_signature(),
+            mode=layout_mode,
+            px_per_module=res.px_per_module_total,
+            **mask_option
+        )
+        st.session_state.layout_job = job
+        st.session_state.pending_calc = {
+            "modules_x": res.modules_x,
+            "modules_y_round": res.modules_y_round,
+            "px_per_module": res.px_per_module_total,
+            "max_modules_per_card": max_modules_per_card,
+            "mask": mask,
+            "module": module_type,
+            "dot_pitch": dot_pitch
+        }
+        job.wait(LAYOUT_INLINE_WAIT_S)
+    if job.done and job.status != FAILED:
+        finish_calculation(job)
+
+
+@st.fragment(run_every=0.5)
+def layout_job_monitor():
+    """نمایش پیشرفت و نتیجه نیمه‌کاره حل چیدمان تا پایان آن"""
+    job = st.session_state.get("layout_job")
+    if job is None:
+        return
+    status = job.poll()
+    if status == FAILED:
+        st.error(f"خطا در حل چیدمان: {job.error}")
+        cancel_layout_job()
+        return
+    if status != RUNNING:
+        finish_calculation(job)
+        rerun_app()
+
+    st.progress(
+        job.fraction,
+        text=f"⏳ در حال حل چیدمان… {job.filled:,} از {job.total:,} ماژول ({job.elapsed:.1f} ثانیه)"
+    )
+    st.button("⏹️ لغو", key="cancel_layout_job", on_click=cancel_layout_job)
+    partial = job.partial_grid()
+    if partial is not None:
+        st.image(
+            TileRaster(partial, raster_cell_px(partial.shape[1]), mask=job.mask).image,
+            caption="چیدمان نیمه‌کاره",
+            width="stretch"
+        )
+
+
+job = st.session_state.get("layout_job")
+if job is not None and job.signature != input_signature():
+    cancel_layout_job()
+    st.session_state.layout_notice = "ورودی‌ها تغییر کرد؛ حل چیدمان قبلی لغو شد."
 
 col_button1, col_button2, col_button3 = st.columns([1, 1, 2])
 
 with col_button1:
     if not st.session_state.get("calculation_performed", False):
-        if st.button("🔢 محاسبه", use_container_width=True):
+        if st.button("🔢 محاسبه", width="stretch"):
             perform_calculation()
-            st.rerun()
+            rerun_app()
     else:
-        if st.button("🔄 محاسبه مجدد", use_container_width=True):
+        if st.button("🔄 محاسبه مجدد", width="stretch"):
             perform_calculation()
-            st.rerun()
+            rerun_app()
+
+with col_button3:
+    cache_stats = get_layout_cache().stats()
+    st.caption(
+        f"کش چیدمان: {cache_stats['entries']} مورد | "
+        f"hit {cache_stats['hits']} | miss {cache_stats['misses']} | "
+        f"حذف {cache_stats['evictions']} | دیسک {cache_stats['disk_hits']}"
+    )
 
-if st.session_state.get("calculation_performed", False):
-    modules_x = st.session_state.get("modules_x")
-    modules_y_round = st.session_state.get("modules_y_round")
-    blocks = st.session_state.get("blocks")
-    total_resolution = st.session_state.get("total_resolution", 0)
+notice = st.session_state.pop("layout_notice", None)
+if notice:
+    st.warning(notice)
 
-    st.divider()
+if st.session_state.get("layout_job") is not None:
+    layout_job_monitor()
 
-    st.subheader("🎮 انتخاب کنترلر")
+def sweep_rows(results):
+    return pd.DataFrame({
+        "دات‌پیچ": [r.pitch_option for r in results],
+        "بلوک": ["بهینه (کمترین کارت)" if r.mode == "min_cards" else f"{r.block_w}×{r.block_h}" for r in results],
+        "کارت": [r.cards for r in results],
+        "کنترلر": [r.controller or "—" for r in results],
+        "هزینه کل (ریال)": [r.total_cost for r in results]
+    })
 
-    available_controllers = {}
-    for name, info in CONTROLLERS.items():
-        if info["max_resolution"] >= total_resolution:
-            available_controllers[name] = info
 
-    if not available_controllers:
-        st.error("❌ هیچ کنترلری برای این رزولوشن موجود نیست!")
-        selected_controller = None
-    else:
-        controller_options = []
-        for name, info in available_controllers.items():
-            option_text = f"{name} (حداکثر: {format_number(info['max_resolution'])})"  # ✅ اصلاح
-            controller_options.append(option_text)
+with st.expander("🔍 بررسی همه گزینه‌ها (دات‌پیچ × شکل بلوک)", expanded=False):
+    if st.button("▶️ اجرای بررسی", key="run_sweep"):
+        prices = st.session_state.get("prices", get_default_prices())
+        results = []
+        progress = st.empty()
+        table = st.empty()
+        for result in sweep_options(
+            wall_w, wall_h, prices,
+            dollar_rate=st.session_state.get("dollar_rate", 0),
+            executor=get_process_pool(),
+            module=module_type
+        ):
+            results.append(result)
+            if len(results) % 10 == 0:
+                progress.caption(f"{len(results)} گزینه بررسی شد…")
+                table.dataframe(sweep_rows(rank_results(results)), hide_index=True, width="stretch")
+        progress.caption(f"{len(results)} گزینه بررسی شد.")
+        table.dataframe(sweep_rows(rank_results(results)), hide_index=True, width="stretch")
+        st.session_state.sweep_results = results
+
+    results = st.session_state.get("sweep_results")
+    if results:
+        front = pareto_front(results)
+        st.markdown("#### مرز پارتو (هزینه در برابر تعداد کارت)")
+        st.dataframe(sweep_rows(front), hide_index=True, width="stretch")
+        st.scatter_chart(
+            pd.DataFrame({
+                "کارت": [r.cards for r in results],
+                "هزینه کل": [r.total_cost for r in results],
+                "پارتو": ["پارتو" if r in front else "سایر" for r in results]
+            }),
+            x="کارت",
+            y="هزینه کل",
+            color="پارتو"
+        )
 
-        default_controller_index = 0
-        selected_controller_info = st.session_state.get("selected_controller_info", {})
-        if selected_controller_info:
-            default_controller_name = selected_controller_info.get("name", "")
-            try:
-                default_controller_index = list(available_controllers.keys()).index(default_controller_name)
-            except ValueError:
-                default_controller_index = 0
 
-        selected_option_text = st.selectbox(
-            "کنترلر مناسب:",
-            options=controller_options,
-            index=default_controller_index,
-            key="controller_selector"
+PROJECT_COLUMNS = ["نام دیوار", "عرض (cm)", "ارتفاع (cm)", "ماژول", "دات‌پیچ", "روش چیدمان"]
+PITCH_NAMES = sorted({name for module in CATALOG.modules.values() for name in module.pitches})
+
+
+def get_project():
+    """پروژه چند دیواری نشست؛ چیدمان‌ها از کش مشترک چیدمان خوانده می‌شوند"""
+    if "project" not in st.session_state:
+        st.session_state.project = Project(cache=get_layout_cache())
+    return st.session_state.project
+
+
+def project_specs(walls_df):
+    """WallSpec هر ردیف کامل جدول دیوارها"""
+    specs = []
+    for row in walls_df.dropna().itertuples(index=False):
+        name, width, height, module_id, pitch_option, mode_label = row
+        specs.append(WallSpec(
+            name=str(name),
+            wall_width_cm=float(width),
+            wall_height_cm=float(height),
+            module=module_id,
+            pitch_option=pitch_option,
+            mode=LAYOUT_MODES[mode_label]
+        ))
+    return specs
+
+
+@st.fragment(key="project")
+def project_section():
+    """پروژه چند دیواری؛ با ذخیره قیمت‌ها همراه نتایج دوباره اجرا می‌شود"""
+    with st.expander("📁 پروژه چند دیواری", expanded=False):
+        st.caption(
+            "هر ردیف یک دیوار است. فقط دیوارهای تغییرکرده دوباره چیده می‌شوند و تغییر قیمت‌ها "
+            "یا نرخ دلار فقط هزینه‌ها را دوباره حساب می‌کند."
+        )
+        walls_df = st.data_editor(
+            pd.DataFrame([["دیوار ۱", 480.0, 270.0, CATALOG.default_module_id, "1.8 داخلی", "سریع (بلوکی)"]],
+                         columns=PROJECT_COLUMNS),
+            num_rows="dynamic",
+            key="project_walls",
+            width="stretch",
+            column_config={
+                "ماژول": st.column_config.SelectboxColumn(options=list(CATALOG.modules), required=True),
+                "دات‌پیچ": st.column_config.SelectboxColumn(options=PITCH_NAMES, required=True),
+                "روش چیدمان": st.column_config.SelectboxColumn(options=list(LAYOUT_MODES), required=True),
+            }
         )
 
-        selected_controller_name = selected_option_text.split(" (")[0]
-        selected_controller = available_controllers[selected_controller_name]
-        st.session_state.selected_controller_info = {
-            "name": selected_controller_name,
-            "max_resolution": selected_controller["max_resolution"],
-            "price": selected_controller_name
-        }
+        project = get_project()
+        project.set_prices(
+            st.session_state.get("prices", get_default_prices()),
+            st.session_state.get("dollar_rate", 0)
+        )
+        try:
+            project.set_walls(project_specs(walls_df))
+        except ValueError:
+            st.error("نام دیوارها باید یکتا باشد.")
+        else:
+            for name in list(project.walls):
+                try:
+                    with stage("project.layout"):
+                        project.wall_layout(name)
+                except ValueError as exc:
+                    st.warning(f"دیوار {name}: {exc}")
+                    project.remove_wall(name)
+
+            rows = total = None
+            if project.walls:
+                try:
+                    with stage("project.costs"):
+                        rows = project.summary_rows()
+                        total = project.total_costs()
+                except ValueError as exc:
+                    st.error(f"محاسبه هزینه پروژه ممکن نشد: {exc}")
+            if rows is not None:
+                st.dataframe(pd.DataFrame({
+                    "دیوار": [r["name"] for r in rows],
+                    "ماژول": [CATALOG.modules[r["module"]].name for r in rows],
+                    "دات‌پیچ": [r["pitch"] for r in rows],
+                    "تعداد ماژول": [r["modules"] for r in rows],
+                    "کارت": [r["cards"] for r in rows],
+                    "کنترلر": [r["controller"] or "—" for r in rows],
+                    "هزینه": [format_currency(r["total_cost"]) for r in rows]
+                }), hide_index=True, width="stretch")
+
+                col_total, col_walls = st.columns(2)
+                col_total.metric("هزینه کل پروژه", format_currency(total.total))
+                col_walls.metric("تعداد دیوار", f"{len(project.walls)} عدد")
+
+                st.markdown("#### فهرست مواد")
+                bom = project.bom()
+                st.dataframe(
+                    pd.DataFrame({"قلم": list(bom), "تعداد": list(bom.values())}),
+                    hide_index=True,
+                    width="stretch"
+                )
+                st.caption(f"حل‌های چیدمان در این نشست: {project.solves}")
 
 
+project_section()
+
+if st.session_state.get("calculation_performed", False):
+    modules_x = st.session_state.get("modules_x")
+    modules_y_round = st.session_state.get("modules_y_round")
+    total_resolution = st.session_state.get("total_resolution", 0)
+
+    st.divider()
+
+    with stage("controller_selection"):
+        controller_selector(total_resolution)
+
     show_results_and_edit()
+
+profile = current_profile()
+if profile is not None:
+    summary = profile.finish()
+    with st.expander("🐞 زمان‌بندی مراحل این اجرا", expanded=False):
+        summaries = [("اجرای فعلی", summary)]
+        interrupted = st.session_state.pop("interrupted_profile", None)
+        if interrupted is not None:
+            summaries.insert(0, ("اجرای قبلی (قطع‌شده با rerun)", interrupted))
+        for title, item in summaries:
+            st.caption(f"{title} — کل: {item['total_seconds'] * 1000:.1f} ms")
+            st.dataframe(
+                pd.DataFrame({
+                    "مرحله": ["  " * r["depth"] + r["stage"] for r in item["stages"]],
+                    "زمان (ms)": [round(r["seconds"] * 1000, 2) for r in item["stages"]],
+                    "بلوک‌های حافظه": [r["alloc_blocks"] for r in item["stages"]]
+                }),
+                hide_index=True,
+                width="stretch"
+            )
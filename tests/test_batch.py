@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from videowall import batch_quote, compute_costs, get_default_prices, load_catalog, videowall_calc
+
+WIDTHS = [320, 480, 655.5, 1000]
+HEIGHTS = [160, 270, 333, 500]
+
+
+def scalar_quote(width, height, prices, dollar_rate=0, controller="", module=None, dot_pitch_mm=1.8):
+    calc = videowall_calc(width, height, dot_pitch_mm=dot_pitch_mm, module=module)
+    cards = calc.receiving_cards_round
+    return calc, compute_costs(calc.total_modules_round, cards, width, height, prices, dollar_rate=dollar_rate,
+                               controller_name=controller, cable_count=cards, psu_count=calc.psu_count)
+
+
+def test_matches_scalar_calc_and_costs():
+    prices = {**get_default_prices(), "module_unit": "دلار", "receiver_card": 12.0}
+    result = batch_quote(WIDTHS, HEIGHTS, prices=prices, dollar_rate=3, controller="x7")
+    for i, (width, height) in enumerate(zip(WIDTHS, HEIGHTS)):
+        calc, costs = scalar_quote(width, height, prices, dollar_rate=3, controller="x7")
+        assert result["modules_x"][i] == calc.modules_x
+        assert result["modules_y_round"][i] == calc.modules_y_round
+        assert result["total_pixels_round"][i] == calc.total_pixels_round
+        assert result["receiving_cards_round"][i] == calc.receiving_cards_round
+        assert result["psu_count"][i] == calc.psu_count
+        assert result["total_cost"][i] == pytest.approx(costs.total)
+
+
+def test_scalars_broadcast_against_arrays():
+    result = batch_quote(np.array(WIDTHS), 270, dot_pitch_mm=[1.8, 2.5, 1.8, 2.5])
+    assert all(value.shape == (len(WIDTHS),) for value in result.values())
+    assert (result["modules_y_round"] == result["modules_y_round"][0]).all()
+    assert result["px_per_module_x"][0] > result["px_per_module_x"][1]
+
+
+def test_dataframe_columns_and_per_row_modules():
+    frame = pd.DataFrame({
+        "wall_width_cm": [480, 500],
+        "wall_height_cm": [270, 500],
+        "module_id": ["320x160", "500x500"],
+        "dot_pitch_mm": [1.8, 3.9],
+        "controller": ["x7", ""],
+        "module": [10.0, 20.0],
+    }, index=["a", "b"])
+    result = batch_quote(frame)
+    assert isinstance(result, pd.DataFrame) and list(result.index) == ["a", "b"]
+    prices = get_default_prices()
+    for i, row in enumerate(frame.itertuples()):
+        calc, costs = scalar_quote(row.wall_width_cm, row.wall_height_cm, {**prices, "module": row.module},
+                                   controller=row.controller, module=load_catalog().module(row.module_id),
+                                   dot_pitch_mm=row.dot_pitch_mm)
+        assert result["total_modules_round"].iloc[i] == calc.total_modules_round
+        assert result["total_cost"].iloc[i] == pytest.approx(costs.total)
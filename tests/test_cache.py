@@ -0,0 +1,75 @@
+import threading
+
+import numpy as np
+
+from videowall import LayoutCache, cached_optimize_layout, optimize_layout
+
+
+def key(cache, modules_x):
+    return cache.make_key(modules_x, 4, 2, 2, 8, mode="fast")
+
+
+def put(cache, modules_x):
+    blocks, grid = optimize_layout(modules_x, 4, 2, 2, 8)
+    cache.put(key(cache, modules_x), blocks, grid)
+    return grid
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LayoutCache(max_entries=2)
+    put(cache, 4)
+    put(cache, 6)
+    assert cache.get(key(cache, 4)) is not None
+    put(cache, 8)
+    assert cache.get(key(cache, 6)) is None
+    assert cache.get(key(cache, 4)) is not None
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1 and stats["misses"] == 1
+
+
+def test_returned_grids_are_independent_copies():
+    cache = LayoutCache()
+    grid = put(cache, 6)
+    blocks, cached = cache.get(key(cache, 6))
+    cached[:] = 99
+    assert np.array_equal(cache.get(key(cache, 6))[1], grid)
+
+    first = cached_optimize_layout(cache, 10, 6, 2, 3, 6)
+    first[1][0, 0] = 123
+    second = cached_optimize_layout(cache, 10, 6, 2, 3, 6)
+    assert second[1][0, 0] != 123
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    grid = put(LayoutCache(disk_dir=tmp_path), 6)
+    cache = LayoutCache(disk_dir=tmp_path)
+    blocks, loaded = cache.get(key(cache, 6))
+    assert np.array_equal(loaded, grid)
+    assert cache.stats()["disk_hits"] == 1
+    cache.get(key(cache, 6))
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_read_does_not_block_memory_hits(tmp_path, monkeypatch):
+    cache = LayoutCache(disk_dir=tmp_path)
+    put(cache, 6)
+    reading, release = threading.Event(), threading.Event()
+
+    def slow_load(k):
+        reading.set()
+        release.wait(5)
+        return None
+
+    monkeypatch.setattr(cache, "_load_from_disk", slow_load)
+    reader = threading.Thread(target=cache.get, args=(key(cache, 8),))
+    reader.start()
+    assert reading.wait(5)
+    try:
+        hit = []
+        other = threading.Thread(target=lambda: hit.append(cache.get(key(cache, 6))))
+        other.start()
+        other.join(2)
+        assert hit and hit[0] is not None
+    finally:
+        release.set()
+        reader.join()
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from videowall import batch_quote, videowall_calc
+from videowall.catalog import CATALOG_PATH, Catalog, load_catalog
+
+
+@pytest.fixture
+def catalog_data():
+    with open(CATALOG_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_smallest_controller_matches_linear_scan():
+    catalog = load_catalog()
+    controllers = list(catalog.controllers.values())
+    resolutions = sorted({c.max_resolution for c in controllers})
+    for resolution in [0, 1] + [r + d for r in resolutions for d in (-1, 0, 1)]:
+        fitting = [c for c in controllers if c.max_resolution >= resolution]
+        expected = min(fitting, key=lambda c: (c.max_resolution, c.name)) if fitting else None
+        assert catalog.smallest_controller(resolution) == expected
+        assert catalog.controllers_for(resolution) == sorted(fitting, key=lambda c: (c.max_resolution, c.name))
+
+
+def test_lookups_and_errors():
+    catalog = load_catalog()
+    assert catalog.module() is catalog.module(catalog.default_module_id)
+    module = catalog.module("500x500")
+    assert module.pitch(next(iter(module.pitches))).max_modules_per_card >= 1
+    with pytest.raises(ValueError):
+        catalog.module("no-such-module")
+    with pytest.raises(ValueError):
+        module.pitch("no-such-pitch")
+    assert catalog.controller("no-such-controller") is None
+
+
+def test_unknown_default_module_is_rejected(catalog_data):
+    catalog_data["default_module"] = "missing"
+    with pytest.raises(ValueError):
+        Catalog.from_dict(catalog_data)
+
+
+def test_card_capacity_defaults_to_catalog(monkeypatch, catalog_data):
+    catalog_data["receiving_card_capacity_px"] = 256 * 256
+    small = Catalog.from_dict(catalog_data)
+    monkeypatch.setattr("videowall.calc.load_catalog", lambda: small)
+    monkeypatch.setattr("videowall.batch.load_catalog", lambda: small)
+
+    calc = videowall_calc(480, 270)
+    assert calc.receiving_cards_round == videowall_calc(480, 270, receiving_card_capacity_px=256 * 256).receiving_cards_round
+    assert batch_quote([480], [270])["receiving_cards_round"][0] == calc.receiving_cards_round
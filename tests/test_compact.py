@@ -0,0 +1,45 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from videowall import CompactLayout, LayoutEditor, optimize_layout
+from videowall.compact import compact_optimize_layout
+
+
+@pytest.mark.parametrize("mode", ["fast", "min_cards"])
+def test_round_trip_through_blocks(mode):
+    blocks, grid = optimize_layout(23, 11, 2, 6, 13, mode=mode)
+    layout = CompactLayout.from_blocks(23, 11, blocks)
+    assert layout.shape == grid.shape
+    assert layout.cards_used == len(blocks)
+    assert np.array_equal(layout.grid(), grid)
+    assert layout.block_list() == sorted(blocks, key=lambda b: (b[4], b[1], b[0]))
+
+
+def test_round_trip_through_grid_after_edits():
+    _, grid = optimize_layout(15, 17, 2, 6, 13)
+    editor = LayoutEditor(grid.astype(np.int64))
+    editor.assign(editor.select_rect(0, 0, 4, 4), 99)
+    editor.set_module(10, 10, 1)
+    layout = CompactLayout.from_grid(editor.grid)
+    assert np.array_equal(layout.grid(), editor.grid)
+    assert CompactLayout.from_grid(layout.grid()) == layout
+    assert len(layout) < editor.grid.size
+
+
+def test_masked_layout_and_pickle():
+    mask = np.ones((9, 14), dtype=bool)
+    mask[4:, 5:9] = False
+    layout = compact_optimize_layout(14, 9, 2, 2, 4, mask=mask)
+    grid = layout.grid()
+    assert np.all(grid[~mask] == 0)
+    restored = pickle.loads(pickle.dumps(layout))
+    assert restored == layout
+    assert np.array_equal(restored.grid(), grid)
+
+
+def test_empty_grid():
+    layout = CompactLayout.from_grid(np.zeros((0, 0), dtype=np.uint8))
+    assert len(layout) == 0
+    assert layout.grid().shape == (0, 0)
@@ -0,0 +1,151 @@
+import numpy as np
+
+from videowall import LayoutEditor, get_default_prices, get_stats_from_grid, optimize_layout
+from videowall.history import EditDelta, EditHistory
+
+
+def make_editor(modules_x=15, modules_y=17, **options):
+    _, grid = optimize_layout(modules_x, modules_y, 2, 6, 13)
+    return LayoutEditor(grid.astype(np.int64), **options)
+
+
+def assert_counts_match(editor):
+    """شمارش‌های به‌روزشده ویرایشگر با محاسبه کامل از گرید یکی باشند"""
+    stats = get_stats_from_grid(editor.grid)
+    assert editor.cards_used == stats.cards_used
+    for card, count in stats.card_counts.items():
+        assert editor.card_count(card) == count
+
+
+def test_undo_redo_restore_every_step():
+    editor = make_editor()
+    snapshots = [editor.grid.copy()]
+    editor.set_module(0, 0, 5)
+    snapshots.append(editor.grid.copy())
+    editor.assign(editor.select_rect(2, 2, 6, 8), 40)
+    snapshots.append(editor.grid.copy())
+    editor.swap(1, 2)
+    snapshots.append(editor.grid.copy())
+    editor.merge([3, 4], 3)
+    snapshots.append(editor.grid.copy())
+    editor.apply_edits([(16, 14, 7), (16, 13, 7), (16, 14, 8)])
+    snapshots.append(editor.grid.copy())
+
+    for expected in reversed(snapshots[:-1]):
+        assert editor.undo()
+        assert np.array_equal(editor.grid, expected)
+        assert_counts_match(editor)
+    assert not editor.undo()
+
+    for expected in snapshots[1:]:
+        assert editor.redo()
+        assert np.array_equal(editor.grid, expected)
+        assert_counts_match(editor)
+    assert not editor.redo()
+
+
+def test_new_edit_clears_redo():
+    editor = make_editor()
+    editor.set_module(1, 1, 9)
+    editor.undo()
+    assert editor.history.can_redo
+    editor.set_module(2, 2, 9)
+    assert not editor.history.can_redo
+    assert not editor.redo()
+
+
+def test_noop_edits_are_not_recorded():
+    editor = make_editor()
+    card = int(editor.grid[3, 3])
+    assert not editor.set_module(3, 3, card)
+    assert editor.assign(editor.select_card(card), card) == 0
+    assert len(editor.history) == 0
+
+
+def test_replay_on_recomputed_layout():
+    editor = make_editor()
+    editor.assign(editor.select_row(0), 50)
+    editor.set_module(5, 5, 1)
+    edited = editor.grid.copy()
+
+    fresh = make_editor()
+    applied, skipped = fresh.replay(editor.history)
+    assert skipped == 0
+    assert applied > 0
+    assert np.array_equal(fresh.grid, edited)
+    assert_counts_match(fresh)
+
+
+def test_replay_skips_cells_that_no_longer_match():
+    editor = make_editor()
+    editor.assign(editor.select_rect(0, 0, 1, 20), 60)
+
+    # دیوار کوچک‌تر: خانه‌های بیرون از گرید و خانه‌هایی که کارت قبلی‌شان فرق دارد رد می‌شوند
+    smaller = make_editor(10, 17)
+    smaller.set_module(0, 0, 77)
+    applied, skipped = smaller.replay(editor.history)
+    assert skipped > 0
+    assert smaller.grid[0, 0] == 77
+    assert np.all(smaller.grid[0:2, 1:10] == 60)
+
+
+def test_mask_cells_are_never_edited():
+    mask = np.ones((17, 15), dtype=bool)
+    mask[0:3, 0:3] = False
+    _, grid = optimize_layout(15, 17, 2, 6, 13, mask=mask)
+    editor = LayoutEditor(grid.astype(np.int64), mask=mask)
+    editor.assign(editor.select_all(), 1)
+    assert np.all(editor.grid[~mask] == 0)
+    editor.undo()
+    assert np.array_equal(editor.grid, grid)
+
+
+def test_history_keeps_newest_oversized_edit():
+    history = EditHistory(max_cells=10)
+    big = EditDelta.from_cells(range(20), [0] * 20, [1] * 20, [2] * 20)
+    history.record(big)
+    assert len(history) == 1
+    small = EditDelta.from_cells([0], [1], [1], [3])
+    history.record(small)
+    assert history.deltas() == [small]
+
+
+def test_oversized_edit_can_be_undone():
+    editor = make_editor(history=EditHistory(max_cells=8))
+    before = editor.grid.copy()
+    editor.assign(editor.select_rect(0, 0, 10, 10), 50)
+    assert editor.undo()
+    assert np.array_equal(editor.grid, before)
+    assert_counts_match(editor)
+
+
+def test_edits_keep_last_route_and_update_costs_from_counts():
+    editor = make_editor()
+    route = editor.route()
+    assert editor.route_is_current
+    editor.merge([3], 2)
+    assert not editor.route_is_current and editor.last_route is route
+    prices = get_default_prices()
+    costs = editor.costs(480, 270, prices, route=editor.last_route)
+    assert costs.cable_count == editor.cards_used == route.cable_count - 1
+    assert editor.costs(480, 270, prices, route=editor.last_route) is costs
+    assert editor.route() is not route and editor.route_is_current
+
+
+def test_validate_runs_once_per_version():
+    editor = make_editor()
+    report = editor.validate(13)
+    assert editor.validate(13) is report
+    editor.set_module(0, 0, 40)
+    assert not editor.report_is_current and editor.last_report is report
+    assert editor.validate(13) is not report
+
+
+def test_psu_count_matches_plan_power():
+    mask = np.ones((17, 15), dtype=bool)
+    mask[:4, :5] = False
+    _, grid = optimize_layout(15, 17, 2, 6, 13, mask=mask)
+    editor = LayoutEditor(grid.astype(np.int64), mask=mask)
+    editor.merge([2, 3], 1)
+    for options in ({}, {"group_by_card": True, "per_psu": 4}, {"power_sizing": True, "psu_watt": 100}):
+        assert editor.psu_count(**options) == editor.power_plan(**options).psu_count
@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+
+import numpy as np
+import pytest
+
+from videowall import compute_costs, get_default_prices, get_stats_from_grid, optimize_layout
+from videowall.export import (
+    CSV_BOM,
+    XLSX_AVAILABLE,
+    ArtifactCache,
+    build_xlsx,
+    content_hash,
+    encode_chunks,
+    iter_card_csv,
+    iter_cost_csv,
+    iter_layout_json,
+    iter_module_csv,
+)
+
+
+@pytest.fixture
+def layout():
+    _, grid = optimize_layout(9, 7, 3, 2, 6)
+    stats = get_stats_from_grid(grid)
+    costs = compute_costs(stats.total_modules, stats.cards_used, 288, 112, get_default_prices())
+    return grid, stats, costs
+
+
+def read_csv(chunks):
+    text = encode_chunks(chunks).decode("utf-8")
+    assert text.startswith(CSV_BOM)
+    return list(csv.reader(io.StringIO(text[len(CSV_BOM):])))
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 3, 256])
+def test_module_csv_lists_every_cell(layout, chunk_rows):
+    grid = layout[0]
+    rows = read_csv(iter_module_csv(grid, chunk_rows=chunk_rows))
+    assert rows[0] == ["row", "col", "card"]
+    assert len(rows) - 1 == grid.size
+    for y, x, card in rows[1:]:
+        assert grid[int(y) - 1, int(x) - 1] == int(card)
+
+
+def test_module_csv_skips_cells_outside_mask(layout):
+    grid = layout[0]
+    mask = np.ones(grid.shape, dtype=bool)
+    mask[0, :4] = False
+    rows = read_csv(iter_module_csv(grid, chunk_rows=2, mask=mask))
+    assert len(rows) - 1 == mask.sum()
+    assert ("1", "1") not in {(y, x) for y, x, _ in rows[1:]}
+
+
+def test_card_and_cost_csv(layout):
+    _, stats, costs = layout
+    cards = read_csv(iter_card_csv(stats))
+    assert [int(row[0]) for row in cards[1:]] == list(stats.card_counts)
+    totals = read_csv(iter_cost_csv(costs))
+    assert totals[-1][0] == "total"
+    assert float(totals[-1][2]) == pytest.approx(costs.total)
+
+
+def test_layout_json_round_trips(layout):
+    grid, stats, costs = layout
+    data = json.loads(encode_chunks(iter_layout_json(grid, stats, costs, meta={"name": "دیوار"})))
+    assert data["name"] == "دیوار"
+    assert (data["modules_x"], data["modules_y"]) == (grid.shape[1], grid.shape[0])
+    assert np.array_equal(np.array(data["grid"]), grid)
+    assert len(data["cards"]) == stats.cards_used
+    assert data["costs"]["total"] == pytest.approx(costs.total)
+
+
+@pytest.mark.skipif(not XLSX_AVAILABLE, reason="openpyxl is not installed")
+def test_xlsx_sheets(layout):
+    from openpyxl import load_workbook
+
+    grid, stats, costs = layout
+    workbook = load_workbook(io.BytesIO(build_xlsx(grid, stats, costs)), read_only=True)
+    assert workbook.sheetnames == ["modules", "cards", "costs"]
+    assert sum(1 for _ in workbook["modules"].iter_rows()) == grid.size + 1
+
+
+def test_content_hash_tracks_array_bytes_and_dtype():
+    grid = np.arange(6).reshape(2, 3)
+    assert content_hash(grid, "csv") == content_hash(grid.copy(), "csv")
+    assert content_hash(grid, "csv") != content_hash(grid.reshape(3, 2), "csv")
+    assert content_hash(grid, "csv") != content_hash(grid.astype(np.int16), "csv")
+    assert content_hash(grid, "csv") != content_hash(grid, "json")
+
+
+def test_artifact_cache_builds_once_and_evicts_by_size():
+    cache = ArtifactCache(max_bytes=10)
+    calls = []
+
+    def build(data):
+        return lambda: calls.append(data) or data
+
+    assert cache.get_or_build("a", build(b"aaaa")) == b"aaaa"
+    assert cache.get_or_build("a", build(b"xxxx")) == b"aaaa"
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.get_or_build("b", build(b"bbbb"))
+    cache.get_or_build("c", build(b"cccc"))
+    cache.get_or_build("a", build(b"aaaa"))
+    assert calls == [b"aaaa", b"bbbb", b"cccc", b"aaaa"]
+
+
+def test_artifact_cache_skips_oversized_entries():
+    cache = ArtifactCache(max_bytes=4)
+    cache.get_or_build("big", lambda: b"12345")
+    cache.get_or_build("big", lambda: b"12345")
+    assert cache.misses == 2
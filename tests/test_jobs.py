@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from videowall import LayoutCache, optimize_layout
+from videowall.jobs import CANCELLED, DONE, TIMED_OUT, LayoutJobRunner
+from videowall.layout import block_grid_layout
+
+# حل سریع این دیوار چند ثانیه طول می‌کشد
+SLOW = (2000, 1000, 7, 9, 63)
+
+
+@pytest.fixture
+def runner():
+    # حل روی نخ تا آزمون‌ها پروسه کارگر spawn نکنند؛ مسیر پردازه در test_process_runner است
+    executor = ThreadPoolExecutor(max_workers=1)
+    runner = LayoutJobRunner(cache=LayoutCache(), timeout_s=10, executor=executor)
+    yield runner
+    runner.shutdown()
+    executor.shutdown()
+
+
+def wait_done(job, timeout=10):
+    # بدون poll، تا مشخص شود سقف زمانی در خود کارگر اعمال می‌شود
+    deadline = time.perf_counter() + timeout
+    while not job.done and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    return job.status
+
+
+def test_result_is_cached(runner):
+    job = runner.submit(15, 17, 2, 6, 13)
+    assert job.wait(10) == DONE
+    blocks, grid = job.result()
+    assert np.array_equal(grid, optimize_layout(15, 17, 2, 6, 13)[1])
+    again = runner.submit(15, 17, 2, 6, 13)
+    assert again.done and again._future is None
+
+
+def test_timeout_stops_the_solve_and_falls_back(runner):
+    started = time.perf_counter()
+    job = runner.submit(*SLOW, timeout_s=0.2)
+    assert wait_done(job) == TIMED_OUT
+    assert time.perf_counter() - started < 2
+    assert job._future.done()
+    assert np.array_equal(job.result()[1], block_grid_layout(*SLOW[:4])[1])
+
+
+def test_cancel_stops_the_worker(runner):
+    job = runner.submit(*SLOW)
+    time.sleep(0.2)
+    job.cancel()
+    assert job.status == CANCELLED
+    job._future.exception(timeout=2)
+    assert job.result() is None
+
+
+def test_process_runner():
+    runner = LayoutJobRunner(max_workers=1, timeout_s=30)
+    try:
+        job = runner.submit(15, 17, 2, 6, 13)
+        assert job.wait(60) == DONE
+        assert np.array_equal(job.result()[1], optimize_layout(15, 17, 2, 6, 13)[1])
+        job = runner.submit(*SLOW, timeout_s=0.3)
+        assert wait_done(job) == TIMED_OUT
+        job._future.exception(timeout=5)
+    finally:
+        runner.shutdown()
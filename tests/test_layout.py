@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from videowall import get_stats_from_grid, optimize_layout, videowall_calc
+from videowall.catalog import load_catalog
+from videowall.layout import clamp_block_shape
+
+SIZES = [(1, 1), (4, 4), (7, 5), (15, 17), (23, 11)]
+BLOCKS = [(1, 1), (2, 2), (2, 6), (3, 4), (4, 3)]
+
+
+@pytest.mark.parametrize("modules_x, modules_y", SIZES)
+@pytest.mark.parametrize("block_w, block_h", BLOCKS)
+def test_fast_matches_reference(modules_x, modules_y, block_w, block_h):
+    max_size = block_w * block_h
+    fast_blocks, fast_grid = optimize_layout(modules_x, modules_y, block_w, block_h, max_size)
+    ref_blocks, ref_grid = optimize_layout(modules_x, modules_y, block_w, block_h, max_size, mode="reference")
+    assert fast_blocks == ref_blocks
+    assert np.array_equal(fast_grid, ref_grid)
+
+
+@pytest.mark.parametrize("pitch_name", list(load_catalog().module().pitches))
+@pytest.mark.parametrize("wall_w, wall_h", [(480, 270), (1000, 300), (320, 800)])
+def test_min_cards_respects_card_limits(pitch_name, wall_w, wall_h):
+    catalog = load_catalog()
+    pitch = catalog.module().pitch(pitch_name)
+    calc = videowall_calc(wall_w, wall_h, dot_pitch_mm=pitch.dot_pitch)
+    capacity = catalog.receiving_card_capacity_px
+    blocks, grid = optimize_layout(
+        calc.modules_x, calc.modules_y_round, 2, 6, pitch.max_modules_per_card,
+        mode="min_cards", px_per_module=calc.px_per_module_total, receiving_card_capacity_px=capacity
+    )
+
+    assert np.all(grid > 0)
+    assert len(np.unique(grid)) == len(blocks)
+    for x, y, w, h, card in blocks:
+        assert w * h <= pitch.max_modules_per_card
+        assert w * h * calc.px_per_module_total <= capacity
+        assert np.all(grid[y:y+h, x:x+w] == card)
+
+    stats = get_stats_from_grid(grid, px_per_module=calc.px_per_module_total, receiving_card_capacity_px=capacity)
+    assert not stats.over_capacity
+    # چیدمان سریع با بلوک مجاز یکی از جواب‌های اولیه است
+    block_w, block_h = clamp_block_shape(2, 6, pitch.max_modules_per_card, calc.px_per_module_total, capacity)
+    fast_blocks, _ = optimize_layout(calc.modules_x, calc.modules_y_round, block_w, block_h, pitch.max_modules_per_card)
+    assert stats.cards_used <= len(fast_blocks)
+
+
+def test_min_cards_with_mask_leaves_holes_empty():
+    mask = np.ones((10, 12), dtype=bool)
+    mask[5:, 4:8] = False
+    blocks, grid = optimize_layout(12, 10, 2, 6, 8, mode="min_cards", mask=mask)
+    assert np.all(grid[~mask] == 0)
+    assert np.all(grid[mask] > 0)
+    assert all(w * h <= 8 for _, _, w, h, _ in blocks)
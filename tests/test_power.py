@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from videowall import load_catalog, optimize_layout, plan_power, psu_count_for_modules, videowall_calc
+from videowall.power import modules_per_psu
+
+
+def test_default_ratio_comes_from_catalog():
+    per_psu = load_catalog().module().modules_per_psu
+    assert psu_count_for_modules(255) == -(-255 // per_psu)
+    assert psu_count_for_modules(255, per_psu=1) == 255
+    assert psu_count_for_modules(255, power_sizing=True) == -(-255 // modules_per_psu())
+    assert list(psu_count_for_modules(np.array([0, 1, 7]), per_psu=6)) == [0, 1, 2]
+
+
+def test_calc_psu_count_and_deprecated_alias():
+    calc = videowall_calc(480, 270)
+    assert calc.psu_count == psu_count_for_modules(calc.total_modules_round)
+    with pytest.warns(DeprecationWarning):
+        assert calc.psu_60w_round == calc.psu_count
+
+
+def test_plan_power_balances_contiguous_groups():
+    _, grid = optimize_layout(15, 17, 4, 4, 16)
+    plan = plan_power(grid)
+    assert plan.psu_count == psu_count_for_modules(grid.size)
+    assert plan.psu_modules.sum() == grid.size
+    assert plan.psu_modules.max() - plan.psu_modules.min() <= 1
+    assert plan.psu_modules.max() <= plan.per_psu
+    assert set(np.unique(plan.psu_grid)) == set(range(1, plan.psu_count + 1))
+    assert not plan.sized_by_power
+
+
+def test_plan_power_group_by_card_and_mask():
+    _, grid = optimize_layout(12, 8, 3, 2, 6)
+    mask = np.ones(grid.shape, dtype=bool)
+    mask[:2, :3] = False
+    plan = plan_power(grid, group_by_card=True, mask=mask, per_psu=4)
+    assert (plan.psu_grid[~mask] == 0).all()
+    assert plan.psu_modules.sum() == mask.sum()
+    for psu in range(1, plan.psu_count + 1):
+        assert np.unique(grid[plan.psu_grid == psu]).size == 1
+    assert plan.psu_modules.max() <= 4
+
+
+def test_power_sizing_respects_headroom():
+    _, grid = optimize_layout(10, 10, 2, 2, 4)
+    plan = plan_power(grid, psu_watt=100, module_power_w=23, headroom=0.8, power_sizing=True)
+    assert plan.sized_by_power and plan.per_psu == 3
+    assert plan.overloaded.size == 0
+    assert (plan.psu_load_w <= 100 * 0.8).all()
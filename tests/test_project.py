@@ -0,0 +1,65 @@
+import pytest
+
+from videowall import LayoutCache, Project, WallSpec, get_default_prices
+
+
+def make_project(**kwargs):
+    project = Project(**kwargs)
+    project.set_walls([
+        WallSpec("lobby", 480, 270),
+        WallSpec("hall", 640, 320, cutouts=((0, 0, 64, 32),)),
+    ])
+    return project
+
+
+def test_totals_and_bom_match_walls():
+    project = make_project()
+    rows = project.summary_rows()
+    total = project.total_costs()
+    assert [r["name"] for r in rows] == ["lobby", "hall"]
+    assert total.total == pytest.approx(sum(r["total_cost"] for r in rows))
+    bom = project.bom()
+    assert bom["کارت گیرنده"] == sum(r["cards"] for r in rows)
+    assert bom["کابل شبکه"] == bom["کارت گیرنده"]
+    hall = project.wall_layout("hall")
+    assert hall.calc.total_modules_round < hall.calc.modules_x * hall.calc.modules_y_round
+
+
+def test_only_changed_walls_are_solved_again():
+    project = make_project()
+    project.summary_rows()
+    assert project.solves == 2
+    project.set_prices({**get_default_prices(), "module": 999.0}, dollar_rate=5)
+    project.summary_rows()
+    assert project.solves == 2
+    project.update_wall("lobby", wall_width_cm=512)
+    project.summary_rows()
+    assert project.solves == 3
+
+
+def test_shared_cache_avoids_repeat_solves():
+    cache = LayoutCache()
+    make_project(cache=cache).total_costs()
+    other = make_project(cache=cache)
+    other.total_costs()
+    assert other.solves == 0
+
+
+@pytest.mark.parametrize("spec", [
+    WallSpec("tiny", 10, 5),
+    WallSpec("covered", 480, 270, cutouts=((0, 0, 480, 270),)),
+])
+def test_walls_without_modules_are_rejected(spec):
+    project = Project()
+    project.set_walls([spec])
+    with pytest.raises(ValueError):
+        project.wall_layout(spec.name)
+    with pytest.raises(ValueError):
+        project.summary_rows()
+    with pytest.raises(ValueError):
+        project.total_costs()
+
+
+def test_duplicate_names_are_rejected():
+    with pytest.raises(ValueError):
+        Project().set_walls([WallSpec("a", 480, 270), WallSpec("a", 320, 160)])
@@ -0,0 +1,72 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+
+from videowall import optimize_layout
+from videowall.raster import EMPTY_RGBA, HOLE_RGBA, TileRaster, raster_cell_px
+from videowall.render import draw_module_layout
+
+
+def random_grid(seed, shape=(9, 14)):
+    return np.random.default_rng(seed).integers(0, 6, size=shape)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_update_matches_fresh_raster(seed):
+    rng = np.random.default_rng(seed)
+    grid = random_grid(seed)
+    raster = TileRaster(grid, 3)
+    for _ in range(40):
+        row, col = rng.integers(grid.shape[0]), rng.integers(grid.shape[1])
+        grid[row, col] = rng.integers(0, 6)
+        raster.update(row, col)
+    assert np.array_equal(raster.image, TileRaster(grid.copy(), 3).image)
+
+
+def test_update_region_matches_fresh_raster():
+    grid = random_grid(3)
+    raster = TileRaster(grid, 2)
+    grid[2:6, 4:10] = 5
+    raster.update_region(2, 6, 4, 10)
+    assert np.array_equal(raster.image, TileRaster(grid.copy(), 2).image)
+
+
+def test_mask_cells_are_transparent_and_empty_cells_grey():
+    grid = np.zeros((4, 5), dtype=np.int64)
+    mask = np.ones_like(grid, dtype=bool)
+    mask[1, 2] = False
+    raster = TileRaster(grid, 2, mask=mask)
+    assert np.array_equal(raster.image[2, 8], HOLE_RGBA)
+    assert np.array_equal(raster.image[0, 0], EMPTY_RGBA)
+
+
+def test_cell_size_keeps_image_width_bounded():
+    assert raster_cell_px(10) == 8
+    assert raster_cell_px(1000) == 2
+    assert 2 * raster_cell_px(300) * 300 <= 2400
+
+
+@pytest.mark.parametrize("renderer", ["fast", "detailed"])
+def test_draw_module_layout_returns_figure(renderer):
+    blocks, grid = optimize_layout(8, 6, 4, 3, 12)
+    fig = draw_module_layout(8, 6, blocks, grid, renderer=renderer)
+    assert isinstance(fig, Figure)
+    plt.close("all")
+
+
+def test_fast_renderer_reuses_given_raster():
+    blocks, grid = optimize_layout(8, 6, 4, 3, 12)
+    raster = TileRaster(grid, raster_cell_px(8))
+    fig = draw_module_layout(8, 6, blocks, grid, raster=raster)
+    assert np.array_equal(np.asarray(fig.axes[0].images[0].get_array()), raster.image)
+
+
+def test_unknown_renderer_is_rejected():
+    blocks, grid = optimize_layout(4, 4, 2, 2, 4)
+    with pytest.raises(ValueError):
+        draw_module_layout(4, 4, blocks, grid, renderer="vector")
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from videowall import optimize_layout, route_cards
+from videowall.routing import split_ports
+
+
+@pytest.mark.parametrize("shape", [(12, 9, 3, 2, 6), (20, 14, 4, 4, 16), (7, 5, 2, 3, 6)])
+def test_every_card_gets_one_cable(shape):
+    _, grid = optimize_layout(*shape)
+    route = route_cards(grid, px_per_module=128 * 64, time_budget_s=0.2)
+    cards = np.unique(grid[grid != 0])
+    assert sorted(route.order.tolist()) == cards.tolist()
+    assert [card for port in route.ports for card in port] == route.order.tolist()
+    assert route.cable_count == cards.size
+    assert route.total_length_m <= route.baseline_length_m + 1e-9
+
+
+def test_ports_respect_pixel_capacity():
+    _, grid = optimize_layout(24, 16, 4, 4, 16)
+    px_per_module = 128 * 64
+    capacity = 3 * 16 * px_per_module
+    route = route_cards(grid, px_per_module=px_per_module, port_capacity_px=capacity, time_budget_s=0.1)
+    counts = np.bincount(grid.ravel())
+    assert all(pixels <= capacity for pixels in route.port_pixels)
+    for port, pixels in zip(route.ports, route.port_pixels):
+        assert pixels == counts[list(port)].sum() * px_per_module
+
+
+def test_empty_grid_has_no_route():
+    route = route_cards(np.zeros((3, 4), dtype=np.int64))
+    assert route.cable_count == 0
+    assert route.ports == ()
+
+
+def test_split_ports_keeps_order_and_opens_new_port_when_full():
+    order = np.array([2, 0, 1, 3])
+    pixels = np.array([30, 50, 40, 20])
+    ports, port_pixels = split_ports(order, pixels, port_capacity_px=80)
+    assert ports == [[2, 0], [1, 3]]
+    assert port_pixels == [70, 70]
+
+
+def test_split_ports_gives_oversized_card_its_own_port():
+    ports, port_pixels = split_ports(np.array([0, 1, 2]), np.array([10, 500, 10]), port_capacity_px=100)
+    assert ports == [[0], [1], [2]]
+    assert port_pixels == [10, 500, 10]
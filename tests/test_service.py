@@ -0,0 +1,131 @@
+import http.client
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from videowall import batch_quote, compute_costs, get_default_prices
+from videowall.service import MAX_WALL_CM, QuoteService, make_server
+
+WALL = {"wall_width_cm": 480, "wall_height_cm": 270}
+
+
+@pytest.fixture(scope="module")
+def server():
+    # حل چیدمان روی نخ‌ها تا آزمون‌ها پروسه کارگر spawn نکنند
+    executor = ThreadPoolExecutor(max_workers=2)
+    service = QuoteService(executor=executor)
+    server = make_server(service, port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    executor.shutdown()
+
+
+def post(server, path, body):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=30)
+    data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    connection.request("POST", path, data, {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    payload = json.loads(response.read())
+    connection.close()
+    return response.status, payload
+
+
+def test_quote(server):
+    status, payload = post(server, "/quote", {**WALL, "pitch_option": "1.8 داخلی"})
+    assert status == 200
+    assert payload["cards"] > 0
+    assert payload["total"] == payload["costs"]["module"] + sum(
+        payload["costs"][item] for item in ("receiver", "power", "controller", "structure", "hdmi_cable", "cable_magnet")
+    )
+
+
+@pytest.mark.parametrize("size", [(480, 270), (800, 400), (320, 160)])
+def test_batch_prices_match_quote(server, size):
+    prices = {**get_default_prices(), "receiver_card": 7.0, "cable_magnet": 3.0}
+    body = {"wall_width_cm": size[0], "wall_height_cm": size[1], "controller": "x26m",
+            "prices": {"receiver_card": 7.0, "cable_magnet": 3.0}}
+    status, payload = post(server, "/quote", body)
+    assert status == 200
+    batch = batch_quote([size[0]], [size[1]], prices=prices, controller="x26m")
+    quote = payload["costs"]
+    # کارت /quote از چیدمان حل‌شده و کارت batch از ظرفیت پیکسلی است؛ بقیه اقلام یکی‌اند
+    for item in ("module", "power", "controller", "structure", "hdmi_cable"):
+        assert batch[f"{item}_cost"][0] == quote[item]
+    assert quote["cable_count"] == payload["cards"]
+    assert quote["cable_magnet"] == payload["cards"] * 3.0
+    assert batch["cable_count"][0] == batch["receiving_cards_round"][0]
+    assert batch["cable_magnet_cost"][0] == batch["receiving_cards_round"][0] * 3.0
+
+    cards = int(batch["receiving_cards_round"][0])
+    costs = compute_costs(int(batch["total_modules_round"][0]), cards, size[0], size[1], prices,
+                          controller_name="x26m", cable_count=cards, psu_count=int(batch["psu_count"][0]))
+    assert batch["total_cost"][0] == costs.total
+
+
+@pytest.mark.parametrize("body", [
+    {"wall_width_cm": 100, "wall_height_cm": 5},
+    {"wall_width_cm": 0, "wall_height_cm": 270},
+    {"wall_width_cm": MAX_WALL_CM + 1, "wall_height_cm": 270},
+    {"wall_width_cm": "wide", "wall_height_cm": 270},
+    {"wall_height_cm": 270},
+    {**WALL, "prices": [1, 2]},
+    {**WALL, "prices": {"module": "expensive"}},
+    {**WALL, "prices": {"module": -1}},
+    {**WALL, "prices": {"module_unit": "euro"}},
+    {**WALL, "prices": {"controller_prices": 5}},
+    {**WALL, "prices": {"unknown": 1}},
+    {**WALL, "controller": ["x7"]},
+    {**WALL, "module": "no-such-module"},
+    {**WALL, "pitch_option": "no-such-pitch"},
+    {**WALL, "mode": "slow"},
+    {**WALL, "block_w": 0},
+    {**WALL, "block_w": 4, "block_h": 6},
+    {"wall_width_cm": 320, "wall_height_cm": 160, "cutouts": [[0, 0, 400, 400]]},
+    {**WALL, "cutouts": [[0, 0, 10]]},
+    [1, 2, 3],
+])
+def test_invalid_input_is_400(server, body):
+    status, payload = post(server, "/quote", body)
+    assert status == 400
+    assert payload["error"]
+
+
+def test_invalid_json_is_400(server):
+    status, payload = post(server, "/quote", b"{not json")
+    assert status == 400
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5"])
+def test_bad_content_length_is_400(server, length):
+    with socket.create_connection(("127.0.0.1", server.server_port), timeout=30) as sock:
+        sock.sendall(b"POST /quote HTTP/1.1\r\nHost: localhost\r\nContent-Length: " + length + b"\r\n\r\n{}")
+        status_line = sock.recv(4096).split(b"\r\n", 1)[0]
+    assert status_line.split()[1] == b"400"
+
+
+def test_unknown_path_is_404(server):
+    status, _ = post(server, "/nope", WALL)
+    assert status == 404
+
+
+def test_concurrent_identical_requests_share_one_solve():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        service = QuoteService(executor=executor)
+        bodies = [{"wall_width_cm": 800, "wall_height_cm": 400}, {"wall_width_cm": 600, "wall_height_cm": 300}]
+        barrier = threading.Barrier(16)
+
+        def request(i):
+            barrier.wait()
+            return service.quote(bodies[i % 2])["cards"]
+
+        with ThreadPoolExecutor(max_workers=16) as clients:
+            cards = list(clients.map(request, range(16)))
+        assert len(set(cards[0::2])) == 1 and len(set(cards[1::2])) == 1
+        assert service.solved == 2
+        assert service.health()["inflight"] == 0
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from videowall import get_stats_from_grid, optimize_layout
+
+
+def naive_stats(grid):
+    """شمارش و محدوده هر کارت با پیمایش ساده خانه‌ها"""
+    counts, cells = {}, {}
+    for (y, x), card in np.ndenumerate(grid):
+        if card:
+            counts[int(card)] = counts.get(int(card), 0) + 1
+            cells.setdefault(int(card), []).append((x, y))
+    bboxes = {}
+    for card, points in cells.items():
+        xs, ys = zip(*points)
+        bboxes[card] = (min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1)
+    return counts, bboxes
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_naive_scan(seed):
+    grid = np.random.default_rng(seed).integers(0, 9, size=(13, 21))
+    stats = get_stats_from_grid(grid)
+    counts, bboxes = naive_stats(grid)
+    assert stats.card_counts == counts
+    assert stats.card_bboxes == bboxes
+    assert stats.cards_used == len(counts)
+    assert stats.total_modules == grid.size
+
+
+def test_pixel_load_and_over_capacity():
+    _, grid = optimize_layout(15, 17, 2, 6, 13)
+    stats = get_stats_from_grid(grid, px_per_module=1000, receiving_card_capacity_px=8000)
+    for card, count in stats.card_counts.items():
+        assert stats.card_pixels[card] == count * 1000
+        assert stats.card_load[card] == pytest.approx(count / 8)
+    assert set(stats.over_capacity) == {card for card, count in stats.card_counts.items() if count > 8}
+    assert stats.has_over_capacity
+    assert get_stats_from_grid(grid).card_pixels == {}
+
+
+def test_mask_excludes_holes():
+    mask = np.ones((6, 8), dtype=bool)
+    mask[:2, :3] = False
+    _, grid = optimize_layout(8, 6, 2, 2, 8, mask=mask)
+    stats = get_stats_from_grid(grid, mask=mask)
+    assert stats.total_modules == mask.sum() == sum(stats.card_counts.values())
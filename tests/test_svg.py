@@ -0,0 +1,59 @@
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from videowall import optimize_layout, render_layout_svg
+from videowall.svg import MAX_VECTOR_CARDS, static_layer
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+def parse(svg):
+    return ET.fromstring(svg)
+
+
+def card_labels(root):
+    return sorted(
+        int(text.text) for group in root.iter(SVG + "g") if group.get("fill") == "white"
+        for text in group.iter(SVG + "text")
+    )
+
+
+def test_document_is_valid_and_labels_each_card_once():
+    _, grid = optimize_layout(15, 17, 2, 6, 13)
+    root = parse(render_layout_svg(grid))
+    cards = sorted(int(card) for card in np.unique(grid) if card)
+    assert card_labels(root) == cards
+    assert not list(root.iter(SVG + "image"))
+
+
+def test_static_layer_is_cached_per_size():
+    static_layer.cache_clear()
+    grid_a = np.ones((5, 7), dtype=np.int64)
+    grid_b = np.arange(35).reshape(5, 7)
+    render_layout_svg(grid_a)
+    render_layout_svg(grid_b)
+    info = static_layer.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
+
+
+def test_many_cards_fall_back_to_image():
+    side = int(np.ceil(np.sqrt(MAX_VECTOR_CARDS + 1)))
+    grid = np.arange(1, side * side + 1).reshape(side, side)
+    root = parse(render_layout_svg(grid))
+    assert len(list(root.iter(SVG + "image"))) == 1
+    assert card_labels(root) == []
+
+
+def test_highlight_and_hole_layers():
+    _, grid = optimize_layout(6, 4, 2, 2, 4)
+    plain = render_layout_svg(grid)
+    highlight = np.zeros(grid.shape, dtype=bool)
+    highlight[1, 2:4] = True
+    mask = np.ones(grid.shape, dtype=bool)
+    mask[0, 0] = False
+    svg = render_layout_svg(grid, highlight=highlight, mask=mask)
+    parse(svg)
+    assert "#E5323B" in svg and "#E5323B" not in plain
+    assert 'fill="white"/>' in svg and svg.index('fill="white"/>') > svg.index('url(#modules)')
+    assert render_layout_svg(grid, highlight=np.zeros(grid.shape, dtype=bool)) == plain
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from videowall import SweepResult, get_default_prices, pareto_front, rank_results, sweep_options
+from videowall.sweep import MIN_CARDS, legal_block_shapes, solve_card_count
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """اجرای هم‌پروسه با شمارش کارهای ارسال‌شده"""
+
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.keys = []
+
+    def submit(self, fn, key):
+        self.keys.append(key)
+        return super().submit(fn, key)
+
+
+@pytest.fixture(scope="module")
+def sweep():
+    with CountingExecutor() as executor:
+        results = list(sweep_options(320, 160, get_default_prices(), executor=executor))
+    return results, executor.keys
+
+
+def test_identical_geometries_are_solved_once(sweep):
+    results, keys = sweep
+    assert len(keys) == len(set(keys))
+    assert len(keys) < len(results)
+    shapes = {(r.mode, r.modules_x, r.modules_y, r.block_w, r.block_h) for r in results if r.mode != MIN_CARDS}
+    assert sum(key[0] != MIN_CARDS for key in keys) == len(shapes)
+
+
+def test_results_cover_every_pitch_and_shape(sweep):
+    results, _ = sweep
+    for pitch in {r.pitch_option for r in results}:
+        rows = [r for r in results if r.pitch_option == pitch]
+        assert sum(r.mode == MIN_CARDS for r in rows) == 1
+        fast = {(r.block_w, r.block_h) for r in rows if r.mode != MIN_CARDS}
+        assert len(fast) == len(rows) - 1
+    for r in results:
+        if r.mode != MIN_CARDS:
+            assert r.cards == solve_card_count(("fast", r.modules_x, r.modules_y, r.block_w, r.block_h))
+
+
+def test_legal_block_shapes_respect_limit():
+    shapes = legal_block_shapes(6, receiving_card_capacity_px=10**9)
+    assert all(w * h <= 6 for w, h in shapes)
+    assert (6, 1) in shapes and (2, 3) in shapes and (3, 3) not in shapes
+    assert legal_block_shapes(100, px_per_module=1000, receiving_card_capacity_px=4000) == \
+        legal_block_shapes(4, receiving_card_capacity_px=10**9)
+
+
+def option(cards, cost, controller="x"):
+    return SweepResult("p", 1, 1, "fast", 1, 1, cards, 0, controller, cost)
+
+
+def test_pareto_front_drops_dominated_options():
+    a, b, c, d = option(3, 90), option(4, 80), option(4, 95), option(5, 85)
+    assert pareto_front([d, c, b, a]) == [a, b]
+
+
+def test_rank_results_puts_missing_controller_last():
+    a, b, c = option(2, 50, controller=""), option(3, 40), option(3, 30)
+    assert rank_results([a, b, c]) == [c, b, a]
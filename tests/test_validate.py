@@ -0,0 +1,57 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from videowall import label_components, optimize_layout, validate_layout
+from videowall.validate import NON_CONTIGUOUS
+
+
+def reference_labels(grid):
+    """برچسب‌گذاری با BFS: هر مؤلفه کوچک‌ترین اندیس مسطح خود را می‌گیرد"""
+    rows, cols = grid.shape
+    labels = np.full(grid.shape, -1, dtype=np.int64)
+    for start in range(grid.size):
+        y, x = divmod(start, cols)
+        if grid[y, x] == 0 or labels[y, x] != -1:
+            continue
+        labels[y, x] = start
+        queue = deque([(y, x)])
+        while queue:
+            cy, cx = queue.popleft()
+            for ny, nx in ((cy - 1, cx), (cy + 1, cx), (cy, cx - 1), (cy, cx + 1)):
+                if 0 <= ny < rows and 0 <= nx < cols and labels[ny, nx] == -1 and grid[ny, nx] == grid[y, x]:
+                    labels[ny, nx] = start
+                    queue.append((ny, nx))
+    return labels
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("cards", [1, 2, 4])
+def test_matches_reference_on_random_grids(seed, cards):
+    rng = np.random.default_rng(seed)
+    grid = rng.integers(0, cards + 1, size=(rng.integers(1, 25), rng.integers(1, 25)))
+    assert np.array_equal(label_components(grid), reference_labels(grid))
+
+
+def test_matches_reference_on_spirals():
+    # مؤلفه‌های مارپیچ و طولانی بیشترین دور union-find را لازم دارند
+    grid = np.ones((21, 21), dtype=np.int64)
+    for ring in range(1, 10, 2):
+        grid[ring, ring - 1:21 - ring] = 2
+        grid[ring:21 - ring, 20 - ring] = 2
+    assert np.array_equal(label_components(grid), reference_labels(grid))
+
+
+def test_engine_layouts_are_valid():
+    blocks, grid = optimize_layout(23, 11, 2, 6, 13)
+    report = validate_layout(grid, max_modules_per_card=13)
+    assert report.ok
+    assert len(np.unique(label_components(grid))) == len(blocks)
+
+
+def test_split_card_is_reported():
+    grid = np.array([[1, 2, 1], [1, 2, 1]])
+    report = validate_layout(grid)
+    assert [v.card for v in report.by_kind(NON_CONTIGUOUS)] == [1]
+    assert report.components == 3
@@ -0,0 +1,87 @@
+"""هسته محاسباتی ویدئووال، مستقل از Streamlit.
+
+این پکیج streamlit، matplotlib و pandas را import نمی‌کند؛ رسم چیدمان در
+videowall.render قرار دارد و باید جداگانه import شود.
+"""
+
+from .batch import batch_quote
+from .cache import LayoutCache, cached_optimize_layout
+from .catalog import Catalog, Controller, ModuleType, PitchOption, load_catalog
+from .calc import WallCalcResult, mask_from_cutouts, module_pixels, videowall_calc
+from .compact import CompactLayout, compact_optimize_layout
+from .constants import CONTROLLERS, dot_pitch_limits
+from .editing import LayoutEditor
+from .formatting import format_currency, format_number, get_jalali_date, gregorian_to_jalali
+from .jobs import LayoutJob, LayoutJobRunner
+from .layout import (
+    LayoutCancelled,
+    block_grid_layout,
+    mask_rectangles,
+    optimize_layout,
+    optimize_layout_min_cards,
+    optimize_layout_reference,
+)
+from .power import PowerPlan, modules_per_psu, plan_power, psu_count_for_modules
+from .project import Project, WallLayout, WallSpec
+from .pricing import CostBreakdown, compute_costs, convert_to_rial, get_default_prices
+from .routing import CableRoute, route_cards
+from .stats import GridStats, get_stats_from_grid
+from .svg import render_layout_svg
+from .sweep import SweepResult, pareto_front, rank_results, sweep_options
+from .validate import ValidationReport, Violation, label_components, validate_layout
+
+__all__ = [
+    "CONTROLLERS",
+    "CableRoute",
+    "Catalog",
+    "CompactLayout",
+    "Controller",
+    "CostBreakdown",
+    "GridStats",
+    "LayoutCache",
+    "LayoutCancelled",
+    "LayoutEditor",
+    "LayoutJob",
+    "LayoutJobRunner",
+    "ModuleType",
+    "PitchOption",
+    "PowerPlan",
+    "Project",
+    "SweepResult",
+    "ValidationReport",
+    "Violation",
+    "WallCalcResult",
+    "WallLayout",
+    "WallSpec",
+    "batch_quote",
+    "block_grid_layout",
+    "cached_optimize_layout",
+    "compact_optimize_layout",
+    "compute_costs",
+    "convert_to_rial",
+    "dot_pitch_limits",
+    "format_currency",
+    "format_number",
+    "get_default_prices",
+    "get_jalali_date",
+    "get_stats_from_grid",
+    "gregorian_to_jalali",
+    "label_components",
+    "load_catalog",
+    "mask_from_cutouts",
+    "mask_rectangles",
+    "module_pixels",
+    "modules_per_psu",
+    "optimize_layout",
+    "optimize_layout_min_cards",
+    "optimize_layout_reference",
+    "pareto_front",
+    "plan_power",
+    "psu_count_for_modules",
+    "rank_results",
+    "render_layout_svg",
+    "route_cards",
+    "sweep_options",
+    "validate_layout",
+    "videowall_calc",
+]
@@ -0,0 +1,173 @@
+"""قیمت‌گذاری دسته‌ای: محاسبه videowall_calc و هزینه‌ها روی آرایه‌ای از ابعاد دیوار"""
+
+import numpy as np
+
+from .catalog import ModuleType, load_catalog
+from .power import PSU_HEADROOM, psu_count_for_modules
+from .pricing import get_default_prices
+
+# ستون‌های ورودی قابل قبول وقتی DataFrame داده می‌شود
+INPUT_COLUMNS = ("wall_width_cm", "wall_height_cm", "dot_pitch_mm", "dollar_rate", "controller", "module_id")
+# ستون "module" قیمت ماژول است (_PRICE_KEYS)؛ نوع ماژول در ستون module_id می‌آید
+
+_PRICE_KEYS = (
+    ("module", "module_unit"),
+    ("receiver_card", "receiver_unit"),
+    ("power_supply_60w", "power_unit"),
+    ("structure", "structure_unit"),
+    ("hdmi_cable", "hdmi_cable_unit"),
+    ("cable_magnet", "cable_magnet_unit"),
+)
+
+
+def _to_rial(price, unit, dollar_rate):
+    """نسخه برداری convert_to_rial"""
+    price = np.asarray(price, dtype=float)
+    return np.where(np.asarray(unit) == "دلار", price * dollar_rate, price)
+
+
+def _controller_cost(controller, prices, dollar_rate, n):
+    names = np.broadcast_to(np.asarray(controller, dtype=object), (n,))
+    unique_names, inverse = np.unique(names.astype(str), return_inverse=True)
+    controller_prices = prices["controller_prices"]
+    controller_units = prices["controller_units"]
+    unit_price = np.array([controller_prices.get(name, 0.0) for name in unique_names], dtype=float)
+    unit = np.array([controller_units.get(name, "ریال") for name in unique_names])
+    return _to_rial(unit_price[inverse], unit[inverse], dollar_rate)
+
+
+def _module_specs(module, n):
+    """(عرض، ارتفاع، مصرف، توان پاور، ماژول هر پاور) ماژول هر ردیف؛ module یک ModuleType یا شناسه(های) کاتالوگ است"""
+    if module is None or isinstance(module, ModuleType):
+        module = load_catalog().module(None if module is None else module.id)
+        return module.width_mm, module.height_mm, module.power_w, module.psu_watt, module.modules_per_psu
+    catalog = load_catalog()
+    ids = np.broadcast_to(np.asarray(module, dtype=object), (n,)).astype(str)
+    unique_ids, inverse = np.unique(ids, return_inverse=True)
+    specs = np.array([
+        (m.width_mm, m.height_mm, m.power_w, m.psu_watt, m.modules_per_psu) for m in map(catalog.module, unique_ids)
+    ], dtype=float).reshape(-1, 5)[inverse]
+    *specs, per_psu = specs.T
+    return (*specs, per_psu.astype(np.int64))
+
+
+def batch_quote(
+    wall_width_cm,
+    wall_height_cm=None,
+    dot_pitch_mm=1.8,
+    prices=None,
+    dollar_rate=0,
+    controller="",
+    power_per_module_w=None,
+    receiving_card_capacity_px=None,
+    psu_watt=None,
+    psu_headroom=PSU_HEADROOM,
+    module=None,
+    power_sizing=False
+):
+    """محاسبه برداری تعداد ماژول، رزولوشن، کارت، پاور و هزینه کل برای چندین دیوار.
+
+    ورودی می‌تواند آرایه‌های NumPy (یا اسکالر، با broadcast) یا یک DataFrame با
+    ستون‌های INPUT_COLUMNS باشد. قیمت‌ها مانند get_default_prices هستند و هر قیمت یا
+    واحد می‌تواند به‌جای عدد، آرایه یا ستونی هم‌نام در DataFrame باشد.
+    تعداد کارت از ظرفیت پیکسلی (مانند videowall_calc) برآورد می‌شود و کابل و مگنت برای
+    هر کارت یک قلم است (cable_count)؛ تعداد پاور
+    همان psu_count_for_modules است (نسبت ثابت modules_per_psu کاتالوگ، یا با power_sizing
+    از توان پاور و مصرف ماژول). module نوع ماژول کاتالوگ (یا آرایه شناسه‌ها؛ در DataFrame ستون module_id)
+    است و مصرف ماژول و توان پاور اگر داده نشوند از آن خوانده می‌شوند. برای DataFrame خروجی DataFrame و در غیر این صورت
+    دیکشنری از آرایه‌های یک‌بعدی برمی‌گردد. ظرفیت کارت گیرنده اگر داده نشود از کاتالوگ است.
+    """
+    prices = dict(get_default_prices() if prices is None else prices)
+    if receiving_card_capacity_px is None:
+        receiving_card_capacity_px = load_catalog().receiving_card_capacity_px
+    frame = None
+    if hasattr(wall_width_cm, "columns"):
+        frame = wall_width_cm
+        columns = frame.columns
+        wall_width_cm = frame["wall_width_cm"].to_numpy()
+        wall_height_cm = frame["wall_height_cm"].to_numpy()
+        if "dot_pitch_mm" in columns:
+            dot_pitch_mm = frame["dot_pitch_mm"].to_numpy()
+        if "dollar_rate" in columns:
+            dollar_rate = frame["dollar_rate"].to_numpy()
+        if "controller" in columns:
+            controller = frame["controller"].to_numpy()
+        if "module_id" in columns:
+            module = frame["module_id"].to_numpy()
+        for price_key, unit_key in _PRICE_KEYS:
+            if price_key in columns:
+                prices[price_key] = frame[price_key].to_numpy()
+            if unit_key in columns:
+                prices[unit_key] = frame[unit_key].to_numpy()
+
+    wall_width_cm, wall_height_cm, dot_pitch_mm, dollar_rate = (
+        np.ravel(a) for a in np.broadcast_arrays(
+            np.asarray(wall_width_cm, dtype=float),
+            np.asarray(wall_height_cm, dtype=float),
+            np.asarray(dot_pitch_mm, dtype=float),
+            np.asarray(dollar_rate, dtype=float)
+        )
+    )
+    n = wall_width_cm.size
+
+    module_width_mm, module_height_mm, module_power_w, module_psu_watt, per_psu = _module_specs(module, n)
+    if power_per_module_w is None:
+        power_per_module_w = module_power_w
+    if psu_watt is None:
+        psu_watt = module_psu_watt
+
+    modules_x = np.rint(wall_width_cm * 10 / module_width_mm).astype(np.int64)
+    modules_y = np.rint(wall_height_cm * 10 / module_height_mm).astype(np.int64)
+    px_per_module_x = np.rint(module_width_mm / dot_pitch_mm).astype(np.int64)
+    px_per_module_y = np.rint(module_height_mm / dot_pitch_mm).astype(np.int64)
+
+    resolution_x = modules_x * px_per_module_x
+    resolution_y = modules_y * px_per_module_y
+    total_pixels = resolution_x * resolution_y
+    total_modules = modules_x * modules_y
+    receiving_cards = np.rint(total_pixels / receiving_card_capacity_px).astype(np.int64)
+    total_power_w = total_modules * power_per_module_w
+    psu_count = psu_count_for_modules(
+        total_modules, psu_watt, power_per_module_w, psu_headroom, per_psu=per_psu, power_sizing=power_sizing
+    )
+
+    wall_area_m2_rounded = np.rint((wall_width_cm / 100) * (wall_height_cm / 100))
+
+    module_cost = total_modules * _to_rial(prices["module"], prices["module_unit"], dollar_rate)
+    receiver_cost = receiving_cards * _to_rial(prices["receiver_card"], prices["receiver_unit"], dollar_rate)
+    power_cost = psu_count * _to_rial(prices["power_supply_60w"], prices["power_unit"], dollar_rate)
+    controller_cost = _controller_cost(controller, prices, dollar_rate, n)
+    structure_cost = wall_area_m2_rounded * _to_rial(prices["structure"], prices["structure_unit"], dollar_rate)
+    hdmi_cable_cost = _to_rial(prices["hdmi_cable"], prices["hdmi_cable_unit"], dollar_rate)
+    # هر کارت یک کابل شبکه ورودی دارد، مانند cable_count در compute_costs و /quote
+    cable_magnet_cost = receiving_cards * _to_rial(prices["cable_magnet"], prices["cable_magnet_unit"], dollar_rate)
+    total_cost = (module_cost + receiver_cost + power_cost + controller_cost
+                  + structure_cost + hdmi_cable_cost + cable_magnet_cost)
+
+    result = {
+        "modules_x": modules_x,
+        "modules_y_round": modules_y,
+        "total_modules_round": total_modules,
+        "px_per_module_x": px_per_module_x,
+        "px_per_module_y": px_per_module_y,
+        "resolution_x": resolution_x,
+        "resolution_y": resolution_y,
+        "total_pixels_round": total_pixels,
+        "receiving_cards_round": receiving_cards,
+        "total_power_w_round": total_power_w,
+        "psu_count": psu_count,
+        "cable_count": receiving_cards,
+        "wall_area_m2_rounded": wall_area_m2_rounded.astype(np.int64),
+        "module_cost": module_cost,
+        "receiver_cost": receiver_cost,
+        "power_cost": power_cost,
+        "controller_cost": controller_cost,
+        "structure_cost": structure_cost,
+        "hdmi_cable_cost": hdmi_cable_cost,
+        "cable_magnet_cost": cable_magnet_cost,
+        "total_cost": total_cost,
+    }
+    result = {key: np.broadcast_to(value, (n,)) for key, value in result.items()}
+    if frame is not None:
+        return type(frame)(result, index=frame.index)
+    return result
@@ -0,0 +1,154 @@
+"""کش چیدمان مشترک بین نشست‌ها با سقف تعداد و لایه اختیاری روی دیسک"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .compact import CompactLayout
+from .layout import optimize_layout
+
+
+def _option_key(value):
+    """آرایه‌ها (مثلاً mask) با هش محتوا در کلید می‌آیند تا کلید hashable و کوتاه بماند"""
+    if isinstance(value, np.ndarray):
+        digest = hashlib.sha1(np.packbits(value.astype(bool)).tobytes() + repr(value.shape).encode("utf-8"))
+        return ("ndarray", digest.hexdigest())
+    return value
+
+
+class LayoutCache:
+    """کش LRU برای نتیجه optimize_layout.
+
+    چیدمان‌ها به‌صورت CompactLayout نگه داشته می‌شوند و گرید متراکم در هر get تازه
+    ساخته می‌شود، پس ویرایش module_grid در یک نشست به نشست دیگر نمی‌رسد.
+    اگر disk_dir داده شود، چیدمان‌ها به‌صورت فایل npz هم ذخیره می‌شوند و پس از
+    راه‌اندازی مجدد برنامه باقی می‌مانند.
+    """
+
+    def __init__(self, max_entries=256, disk_dir=None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.disk_writes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(modules_x, modules_y, block_w, block_h, max_modules_per_card, **options):
+        return (int(modules_x), int(modules_y), int(block_w), int(block_h), int(max_modules_per_card),
+                tuple(sorted((name, _option_key(value)) for name, value in options.items())))
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, f"layout_{digest}.npz")
+
+    def _load_from_disk(self, key):
+        path = self._disk_path(key)
+        try:
+            with np.load(path) as data:
+                # فایل‌های قدیمی‌تر به‌جای shape خود گرید را دارند
+                shape = data["shape"] if "shape" in data else data["grid"].shape
+                layout = CompactLayout.from_blocks(shape[1], shape[0], data["blocks"])
+        except (OSError, KeyError, ValueError):
+            return None
+        return layout
+
+    def _save_to_disk(self, key, layout):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        blocks = np.stack([layout.blocks[name].astype(np.int64) for name in layout.blocks.dtype.names], axis=1)
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(f, blocks=blocks, shape=np.array(layout.shape))
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            self.disk_writes += 1
+
+    def _insert(self, key, layout):
+        self._entries[key] = layout
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_compact(self, key):
+        """CompactLayout ذخیره‌شده برای key یا None (فقط‌خواندنی و مشترک؛ کپی نمی‌شود).
+
+        خواندن از دیسک بیرون از قفل است تا درخواست‌های دیگر پشت فایل‌خوانی نمانند.
+        """
+        with self._lock:
+            layout = self._entries.get(key)
+            if layout is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return layout
+
+        if self.disk_dir:
+            layout = self._load_from_disk(key)
+            if layout is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._insert(key, layout)
+                return layout
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def get(self, key):
+        """(blocks, grid) ذخیره‌شده برای key یا None؛ گرید هر بار تازه ساخته می‌شود"""
+        layout = self.get_compact(key)
+        if layout is None:
+            return None
+        return layout.block_list(), layout.grid()
+
+    def put_compact(self, key, layout):
+        with self._lock:
+            self._insert(key, layout)
+        # نوشتن فایل موقت و os.replace بدون قفل امن است؛ نام فایل موقت برای هر نخ جداست
+        if self.disk_dir:
+            self._save_to_disk(key, layout)
+
+    def put(self, key, blocks, grid):
+        """ذخیره خروجی optimize_layout؛ blocks باید کل grid را بپوشاند"""
+        grid = np.asarray(grid)
+        self.put_compact(key, CompactLayout.from_blocks(grid.shape[1], grid.shape[0], blocks))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """شمارنده‌های کش"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_hits": self.disk_hits,
+                "disk_writes": self.disk_writes,
+            }
+
+
+def cached_optimize_layout(cache, modules_x, modules_y, block_w, block_h, max_size, **options):
+    """optimize_layout با استفاده از کش؛ خروجی همیشه کپی مستقل است"""
+    key = cache.make_key(modules_x, modules_y, block_w, block_h, max_size, **options)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    blocks, grid = optimize_layout(modules_x, modules_y, block_w, block_h, max_size, **options)
+    cache.put(key, blocks, grid)
+    return blocks, grid
@@ -0,0 +1,130 @@
+"""محاسبات پایه ابعاد، رزولوشن و تجهیزات ویدئووال"""
+
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+
+from .catalog import load_catalog, module_size_mm
+from .power import PSU_HEADROOM, psu_count_for_modules
+
+# ابعاد ماژول پیش‌فرض کاتالوگ
+MODULE_WIDTH_MM, MODULE_HEIGHT_MM = module_size_mm()
+
+
+@dataclass(frozen=True)
+class WallCalcResult:
+    """نتیجه محاسبه ابعاد و تجهیزات یک دیوار"""
+    modules_x: int
+    modules_y_round: int
+    px_per_module_x: int
+    px_per_module_y: int
+    px_per_module_total: int
+    resolution_round: tuple
+    total_pixels_round: int
+    receiving_cards_round: int
+    total_modules_round: int
+    total_power_w_round: float
+    psu_count: int
+
+    @property
+    def psu_60w_round(self):
+        """نام قدیمی psu_count؛ منسوخ"""
+        warnings.warn("psu_60w_round is deprecated; use psu_count", DeprecationWarning, stacklevel=2)
+        return self.psu_count
+
+
+def module_pixels(dot_pitch_mm, module=None):
+    """تعداد پیکسل افقی و عمودی هر ماژول (از کاتالوگ؛ پیش‌فرض ۳۲×۱۶) برای یک دات‌پیچ"""
+    width_mm, height_mm = module_size_mm(module)
+    return round(width_mm / dot_pitch_mm), round(height_mm / dot_pitch_mm)
+
+
+def mask_from_cutouts(modules_x, modules_y, cutouts_cm, module=None):
+    """mask ماژول‌های نصب‌شونده از روی بریدگی‌های (x, y, عرض, ارتفاع) به سانتی‌متر از گوشه بالا چپ.
+
+    ماژولی حذف می‌شود که مرکزش داخل یکی از بریدگی‌ها باشد.
+    """
+    mask = np.ones((modules_y, modules_x), dtype=bool)
+    cutouts = np.asarray([c for c in cutouts_cm if c[2] > 0 and c[3] > 0], dtype=float).reshape(-1, 4) * 10
+    if cutouts.size == 0:
+        return mask
+    width_mm, height_mm = module_size_mm(module)
+    cx = (np.arange(modules_x) + 0.5) * width_mm
+    cy = (np.arange(modules_y) + 0.5) * height_mm
+    x0, y0 = cutouts[:, 0], cutouts[:, 1]
+    inside_x = (cx[None, :] >= x0[:, None]) & (cx[None, :] < (x0 + cutouts[:, 2])[:, None])
+    inside_y = (cy[None, :] >= y0[:, None]) & (cy[None, :] < (y0 + cutouts[:, 3])[:, None])
+    # (بریدگی، سطر، ستون)
+    mask &= ~(inside_y[:, :, None] & inside_x[:, None, :]).any(axis=0)
+    return mask
+
+
+def videowall_calc(
+    wall_width_cm,
+    wall_height_cm,
+    dot_pitch_mm=1.8,
+    power_per_module_w=None,
+    receiving_card_capacity_px=None,
+    psu_watt=None,
+    psu_headroom=PSU_HEADROOM,
+    mask=None,
+    module=None,
+    power_sizing=False
+):
+    """ابعاد و تجهیزات دیوار؛ با mask (از mask_from_cutouts) فقط ماژول‌های نصب‌شونده شمرده می‌شوند.
+
+    module نوع ماژول کاتالوگ است (پیش‌فرض ماژول ۳۲×۱۶)؛ مصرف ماژول و توان پاور اگر
+    داده نشوند از همان خوانده می‌شوند. تعداد پاور با نسبت ثابت modules_per_psu ماژول
+    است و با power_sizing از توان پاور، مصرف ماژول و psu_headroom حساب می‌شود.
+    ظرفیت کارت گیرنده اگر داده نشود از کاتالوگ خوانده می‌شود.
+    """
+    catalog = load_catalog()
+    if module is None:
+        module = catalog.module()
+    if receiving_card_capacity_px is None:
+        receiving_card_capacity_px = catalog.receiving_card_capacity_px
+    if power_per_module_w is None:
+        power_per_module_w = module.power_w
+    if psu_watt is None:
+        psu_watt = module.psu_watt
+
+    wall_w_mm = wall_width_cm * 10
+    wall_h_mm = wall_height_cm * 10
+
+    modules_x = round(wall_w_mm / module.width_mm)
+    modules_y_round = round(wall_h_mm / module.height_mm)
+
+    px_per_module_x, px_per_module_y = module_pixels(dot_pitch_mm, module)
+    px_per_module = px_per_module_x * px_per_module_y
+
+    width_px = modules_x * px_per_module_x
+    height_px_round = modules_y_round * px_per_module_y
+
+    installed = modules_x * modules_y_round if mask is None else int(np.count_nonzero(mask))
+    total_px_round = installed * px_per_module
+
+    cards_round = round(total_px_round / receiving_card_capacity_px)
+
+    total_modules_round = installed
+
+    total_power_round = total_modules_round * power_per_module_w
+
+    psu_count_round = psu_count_for_modules(
+        total_modules_round, psu_watt, power_per_module_w, psu_headroom,
+        per_psu=module.modules_per_psu, power_sizing=power_sizing
+    )
+
+    return WallCalcResult(
+        modules_x=modules_x,
+        modules_y_round=modules_y_round,
+        px_per_module_x=px_per_module_x,
+        px_per_module_y=px_per_module_y,
+        px_per_module_total=px_per_module,
+        resolution_round=(width_px, height_px_round),
+        total_pixels_round=total_px_round,
+        receiving_cards_round=cards_round,
+        total_modules_round=total_modules_round,
+        total_power_w_round=total_power_round,
+        psu_count=psu_count_round
+    )
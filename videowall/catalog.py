@@ -0,0 +1,119 @@
+"""کاتالوگ ماژول‌ها (یا کابینت‌ها)، دات‌پیچ‌ها و کنترلرها از فایل داده.
+
+فایل فقط یک بار خوانده می‌شود. کنترلرها به ترتیب رزولوشن مرتب نگه داشته می‌شوند تا
+کوچک‌ترین کنترلر کافی و همه کنترلرهای کافی برای یک رزولوشن با bisect در O(log n)
+پیدا شوند؛ افزودن ماژول یا کنترلر جدید فقط ویرایش data/catalog.json است.
+"""
+
+import json
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+CATALOG_PATH = Path(__file__).with_name("data") / "catalog.json"
+
+
+@dataclass(frozen=True)
+class PitchOption:
+    """یک گزینه دات‌پیچ و نوع نصب با سقف ماژول روی هر کارت گیرنده"""
+    name: str
+    dot_pitch: float
+    max_modules_per_card: int
+
+
+@dataclass(frozen=True)
+class ModuleType:
+    """ابعاد و مصرف یک نوع ماژول؛ pitches دیکشنری نام گزینه به PitchOption به ترتیب فایل.
+
+    modules_per_psu نسبت ثابت ماژول به پاور در قیمت‌گذاری است (برای ماژول ۳۲×۱۶ شش عدد).
+    """
+    id: str
+    name: str
+    width_mm: float
+    height_mm: float
+    power_w: float
+    psu_watt: float
+    modules_per_psu: int
+    pitches: dict
+
+    def pitch(self, name):
+        try:
+            return self.pitches[name]
+        except KeyError:
+            raise ValueError(f"unknown dot pitch option {name!r} for module {self.id!r}") from None
+
+
+@dataclass(frozen=True)
+class Controller:
+    name: str
+    max_resolution: int
+
+
+class Catalog:
+    """جست‌وجوی ماژول با شناسه و کنترلر با رزولوشن"""
+
+    def __init__(self, modules, controllers, receiving_card_capacity_px, default_module):
+        self.modules = {module.id: module for module in modules}
+        if default_module not in self.modules:
+            raise ValueError(f"default module {default_module!r} is not in the catalog")
+        self.default_module_id = default_module
+        self.receiving_card_capacity_px = receiving_card_capacity_px
+        # ترتیب فایل برای نمایش (مثلاً فرم قیمت‌ها) حفظ می‌شود
+        self.controllers = {controller.name: controller for controller in controllers}
+        self._by_resolution = sorted(controllers, key=lambda c: (c.max_resolution, c.name))
+        self._resolutions = [c.max_resolution for c in self._by_resolution]
+
+    @classmethod
+    def from_dict(cls, data):
+        modules = [
+            ModuleType(
+                id=m["id"],
+                name=m["name"],
+                width_mm=m["width_mm"],
+                height_mm=m["height_mm"],
+                power_w=m["power_w"],
+                psu_watt=m["psu_watt"],
+                modules_per_psu=m["modules_per_psu"],
+                pitches={p["name"]: PitchOption(p["name"], p["dot_pitch"], p["max_modules_per_card"])
+                         for p in m["pitches"]}
+            )
+            for m in data["modules"]
+        ]
+        controllers = [Controller(c["name"], c["max_resolution"]) for c in data["controllers"]]
+        return cls(modules, controllers, data["receiving_card_capacity_px"], data["default_module"])
+
+    def module(self, module_id=None):
+        """نوع ماژول با شناسه؛ بدون شناسه ماژول پیش‌فرض"""
+        if module_id is None:
+            module_id = self.default_module_id
+        try:
+            return self.modules[module_id]
+        except KeyError:
+            raise ValueError(f"unknown module type {module_id!r}") from None
+
+    def controller(self, name):
+        return self.controllers.get(name)
+
+    def smallest_controller(self, resolution):
+        """کوچک‌ترین کنترلری که resolution را پشتیبانی می‌کند، یا None"""
+        index = bisect_left(self._resolutions, resolution)
+        return self._by_resolution[index] if index < len(self._by_resolution) else None
+
+    def controllers_for(self, resolution):
+        """همه کنترلرهای کافی برای resolution، از کوچک به بزرگ"""
+        return self._by_resolution[bisect_left(self._resolutions, resolution):]
+
+
+@lru_cache(maxsize=None)
+def load_catalog(path=CATALOG_PATH):
+    """کاتالوگ خوانده‌شده از فایل JSON؛ هر مسیر فقط یک بار خوانده می‌شود"""
+    with open(path, encoding="utf-8") as f:
+        return Catalog.from_dict(json.load(f))
+
+
+def module_size_mm(module=None):
+    """(عرض، ارتفاع) ماژول به میلی‌متر؛ بدون module ماژول پیش‌فرض کاتالوگ"""
+    if module is None:
+        module = load_catalog().module()
+    return module.width_mm, module.height_mm
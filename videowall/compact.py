@@ -0,0 +1,114 @@
+"""نمایش فشرده چیدمان: آرایه ساخت‌یافته بلوک‌ها به‌جای گرید int64 و لیست تاپل‌ها"""
+
+import numpy as np
+
+from .layout import optimize_layout, smallest_uint_dtype
+
+BLOCK_DTYPE = np.dtype([
+    ("x", np.uint16),
+    ("y", np.uint16),
+    ("w", np.uint16),
+    ("h", np.uint16),
+    ("card", np.uint32),
+])
+
+
+class CompactLayout:
+    """چیدمان به‌صورت مستطیل‌های (x, y, w, h, card) در یک آرایه ساخت‌یافته.
+
+    گرید متراکم فقط با grid() و با کوچک‌ترین dtype لازم ساخته می‌شود. یک کارت
+    می‌تواند چند مستطیل داشته باشد (مثلاً پس از ویرایش دستی)؛ block_list() برای
+    چیدمان‌های خروجی موتور همان لیست blocks معمول را برمی‌گرداند.
+    """
+
+    __slots__ = ("modules_x", "modules_y", "blocks")
+
+    def __init__(self, modules_x, modules_y, blocks):
+        self.modules_x = int(modules_x)
+        self.modules_y = int(modules_y)
+        blocks = np.array(blocks, dtype=BLOCK_DTYPE, copy=True)
+        blocks.flags.writeable = False
+        self.blocks = blocks
+
+    @classmethod
+    def from_blocks(cls, modules_x, modules_y, blocks):
+        """از لیست تاپل‌های (x, y, w, h, card)"""
+        array = np.zeros(len(blocks), dtype=BLOCK_DTYPE)
+        if len(blocks):
+            columns = np.asarray(blocks, dtype=np.int64).reshape(-1, 5)
+            for i, name in enumerate(BLOCK_DTYPE.names):
+                array[name] = columns[:, i]
+        return cls(modules_x, modules_y, array)
+
+    @classmethod
+    def from_grid(cls, grid):
+        """فشرده‌سازی هر گرید دلخواه: اجراهای افقی هم‌کارت در هر سطر، ادغام‌شده با سطرهای بعدی"""
+        grid = np.asarray(grid)
+        modules_y, modules_x = grid.shape
+        if grid.size == 0:
+            return cls(modules_x, modules_y, np.zeros(0, dtype=BLOCK_DTYPE))
+
+        starts = np.ones(grid.shape, dtype=bool)
+        starts[:, 1:] = grid[:, 1:] != grid[:, :-1]
+        rows, xs = np.nonzero(starts)
+        ends = np.append(xs[1:], modules_x)
+        ends[np.append(rows[1:] != rows[:-1], True)] = modules_x
+        cards = grid[rows, xs]
+
+        # اجرای یکسان (x, w, card) در سطر بعدی ادامه همان مستطیل است
+        open_runs = {}
+        rects = []
+        for row, x, end, card in zip(rows.tolist(), xs.tolist(), ends.tolist(), cards.tolist()):
+            run = (x, end - x, card)
+            rect = open_runs.get(run)
+            if rect is not None and rect[1] + rect[3] == row:
+                rect[3] += 1
+            else:
+                rect = [x, row, end - x, 1, card]
+                open_runs[run] = rect
+                rects.append(rect)
+        return cls.from_blocks(modules_x, modules_y, rects)
+
+    @property
+    def shape(self):
+        return (self.modules_y, self.modules_x)
+
+    @property
+    def max_card(self):
+        return int(self.blocks["card"].max()) if self.blocks.size else 0
+
+    @property
+    def cards_used(self):
+        return int(np.unique(self.blocks["card"]).size)
+
+    @property
+    def nbytes(self):
+        return self.blocks.nbytes
+
+    def __len__(self):
+        return self.blocks.size
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactLayout):
+            return NotImplemented
+        return self.shape == other.shape and np.array_equal(self.grid(), other.grid())
+
+    __hash__ = None
+
+    def block_list(self):
+        """لیست تاپل‌های (x, y, w, h, card) به ترتیب شماره کارت و مکان"""
+        order = np.lexsort((self.blocks["x"], self.blocks["y"], self.blocks["card"]))
+        return [tuple(int(v) for v in row) for row in self.blocks[order].tolist()]
+
+    def grid(self, dtype=None):
+        """گرید متراکم شماره کارت‌ها (هر بار آرایه تازه)"""
+        grid = np.zeros(self.shape, dtype=dtype or smallest_uint_dtype(self.max_card))
+        for x, y, w, h, card in self.blocks.tolist():
+            grid[y:y+h, x:x+w] = card
+        return grid
+
+
+def compact_optimize_layout(modules_x, modules_y, block_w, block_h, max_size, **options):
+    """optimize_layout با خروجی CompactLayout"""
+    blocks, _ = optimize_layout(modules_x, modules_y, block_w, block_h, max_size, **options)
+    return CompactLayout.from_blocks(modules_x, modules_y, blocks)
@@ -0,0 +1,15 @@
+"""مشخصات کنترلرها و محدودیت‌های دات‌پیچ ماژول پیش‌فرض، ساخته‌شده از کاتالوگ"""
+
+from .catalog import load_catalog
+
+_catalog = load_catalog()
+
+CONTROLLERS = {
+    controller.name: {"max_resolution": controller.max_resolution}
+    for controller in _catalog.controllers.values()
+}
+
+dot_pitch_limits = {
+    option.name: {"dot_pitch": option.dot_pitch, "max_modules_per_card": option.max_modules_per_card}
+    for option in _catalog.module().pitches.values()
+}
@@ -0,0 +1,344 @@
+"""ویرایش تدریجی چیدمان بدون محاسبه مجدد کل آمار و تصویر"""
+
+import numpy as np
+
+from .history import EditDelta, EditHistory
+from .layout import smallest_uint_dtype
+from .power import MODULE_POWER_W, PSU_HEADROOM, PSU_WATT, plan_power, psu_count_for_modules
+from .pricing import compute_costs
+from .raster import TileRaster, raster_cell_px
+from .routing import route_cards
+from .stats import get_stats_from_grid
+from .validate import validate_layout
+
+
+class LayoutEditor:
+    """نگهدارنده module_grid که شمارش کارت‌ها و تصویر رستری را با هر ویرایش در O(1) به‌روز می‌کند.
+
+    آمار کامل (محدوده و بار هر کارت) فقط وقتی دوباره حساب می‌شود که بعد از آخرین
+    محاسبه ویرایشی انجام شده باشد. مسیر کابل و گزارش بررسی فقط با فراخوانی route و
+    validate ساخته می‌شوند و آخرین نتیجه آن‌ها پس از ویرایش هم (با نسخه قدیمی‌تر) می‌ماند؛
+    هزینه و تعداد پاور از شمارش کارت‌ها حساب می‌شوند. تصویر رستری هم فقط اگر قبلاً ساخته شده باشد،
+    کاشی‌به‌کاشی به‌روز می‌شود. هر ویرایش در history ثبت می‌شود تا undo/redo شود.
+    خانه‌های بیرون از mask (بریدگی دیوار) ویرایش، شمرده یا رسم نمی‌شوند. module نوع
+    ماژول کاتالوگ است و برای فاصله‌های مسیر کابل استفاده می‌شود.
+    """
+
+    def __init__(self, grid, px_per_module=None, receiving_card_capacity_px=512*512, history=None, mask=None,
+                 module=None):
+        self.grid = grid
+        self.module = module
+        self.px_per_module = px_per_module
+        self.receiving_card_capacity_px = receiving_card_capacity_px
+        self.history = history if history is not None else EditHistory()
+        self.mask = None if mask is None or np.all(mask) else np.asarray(mask, dtype=bool)
+        self._installed = grid.size if self.mask is None else int(np.count_nonzero(self.mask))
+        self._counts = np.bincount(grid.ravel())
+        self.cards_used = int(np.count_nonzero(self._counts[1:]))
+        self._raster = None
+        self._stats = None
+        self._route = None
+        self._report = None
+        self._power = None
+        self._costs = None
+        self.version = 0
+
+    @property
+    def total_modules(self):
+        return self._installed
+
+    def is_installed(self, row, col):
+        """آیا ماژول (row, col) داخل mask است"""
+        return self.mask is None or bool(self.mask[row, col])
+
+    @property
+    def raster(self):
+        """تصویر رستری چیدمان (در اولین استفاده ساخته می‌شود)"""
+        if self._raster is None:
+            self._raster = TileRaster(self.grid, raster_cell_px(self.grid.shape[1]), mask=self.mask)
+        return self._raster
+
+    def card_count(self, card):
+        """تعداد ماژول‌های یک کارت"""
+        return int(self._counts[card]) if 0 <= card < self._counts.size else 0
+
+    def _add_count(self, card, delta):
+        if card >= self._counts.size:
+            self._counts = np.concatenate([self._counts, np.zeros(card + 1 - self._counts.size, dtype=self._counts.dtype)])
+        before = self._counts[card]
+        self._counts[card] = before + delta
+        if card == 0:
+            return
+        if before == 0 and delta > 0:
+            self.cards_used += 1
+        elif before + delta == 0:
+            self.cards_used -= 1
+
+    def _widen(self, card):
+        """بزرگ‌کردن dtype گرید فشرده وقتی شماره کارت جدید در آن جا نمی‌شود"""
+        if card > np.iinfo(self.grid.dtype).max:
+            self.grid = self.grid.astype(smallest_uint_dtype(card))
+            if self._raster is not None:
+                self._raster.grid = self.grid
+
+    def _write(self, row, col, card):
+        """نوشتن یک خانه و به‌روزرسانی شمارش و تصویر، بدون ثبت در تاریخچه"""
+        old = int(self.grid[row, col])
+        if old == card or not self.is_installed(row, col):
+            return False
+        self._widen(card)
+        self.grid[row, col] = card
+        self._add_count(old, -1)
+        self._add_count(card, 1)
+        if self._raster is not None:
+            self._raster.update(row, col)
+        return True
+
+    def _changed(self):
+        # مسیر کابل و گزارش بررسی کنار گذاشته نمی‌شوند؛ با version مشخص است که به‌روز نیستند
+        self._stats = None
+        self._power = None
+        self.version += 1
+
+    def _assign_cells(self, rows, cols, cards):
+        """نوشتن برداری خانه‌های یکتا (rows, cols)؛ EditDelta خانه‌های واقعاً تغییرکرده یا None"""
+        rows = np.asarray(rows, dtype=np.intp)
+        cols = np.asarray(cols, dtype=np.intp)
+        old = self.grid[rows, cols].astype(np.int64)
+        new = np.broadcast_to(np.asarray(cards, dtype=np.int64), old.shape)
+        changed = old != new
+        if self.mask is not None:
+            changed &= self.mask[rows, cols]
+        if not changed.any():
+            return None
+        rows, cols, old, new = rows[changed], cols[changed], old[changed], new[changed]
+
+        top = int(new.max())
+        self._widen(top)
+        self.grid[rows, cols] = new
+        if top >= self._counts.size:
+            self._counts = np.concatenate([self._counts, np.zeros(top + 1 - self._counts.size, dtype=self._counts.dtype)])
+        np.subtract.at(self._counts, old, 1)
+        np.add.at(self._counts, new, 1)
+        self.cards_used = int(np.count_nonzero(self._counts[1:]))
+        if self._raster is not None:
+            if rows.size == 1:
+                self._raster.update(int(rows[0]), int(cols[0]))
+            else:
+                self._raster.update_region(int(rows.min()), int(rows.max()) + 1, int(cols.min()), int(cols.max()) + 1)
+        self._changed()
+        return EditDelta.from_cells(rows, cols, old, new)
+
+    def _apply(self, rows, cols, cards):
+        """ویرایش گروهی به‌عنوان یک عمل در تاریخچه؛ تعداد خانه‌های تغییرکرده را برمی‌گرداند"""
+        delta = self._assign_cells(rows, cols, cards)
+        if delta is None:
+            return 0
+        self.history.record(delta)
+        return delta.size
+
+    # انتخاب خانه‌ها؛ خروجی (rows, cols) با اندیس از صفر
+
+    def select_rect(self, row0, col0, row1, col1):
+        """مستطیل سطرهای row0..row1 و ستون‌های col0..col1 (هر دو سر شامل)"""
+        row0, row1 = sorted((max(0, row0), min(row1, self.grid.shape[0] - 1)))
+        col0, col1 = sorted((max(0, col0), min(col1, self.grid.shape[1] - 1)))
+        rows, cols = np.mgrid[row0:row1 + 1, col0:col1 + 1]
+        return rows.ravel(), cols.ravel()
+
+    def select_row(self, row):
+        return self.select_rect(row, 0, row, self.grid.shape[1] - 1)
+
+    def select_col(self, col):
+        return self.select_rect(0, col, self.grid.shape[0] - 1, col)
+
+    def select_all(self):
+        return self.select_rect(0, 0, self.grid.shape[0] - 1, self.grid.shape[1] - 1)
+
+    def select_card(self, card):
+        """همه ماژول‌های یک کارت"""
+        return np.nonzero(self.grid == card)
+
+    # عمل‌های گروهی؛ هر کدام یک عمل در تاریخچه و یک بار باطل‌شدن آمار
+
+    def assign(self, selection, card):
+        """تخصیص همه خانه‌های انتخاب‌شده به card"""
+        rows, cols = selection
+        return self._apply(rows, cols, int(card))
+
+    def swap(self, card_a, card_b, selection=None):
+        """جابه‌جایی دو کارت در خانه‌های انتخاب‌شده (پیش‌فرض: کل دیوار)"""
+        rows, cols = selection if selection is not None else self.select_all()
+        current = self.grid[rows, cols].astype(np.int64)
+        swapped = np.where(current == card_a, card_b, np.where(current == card_b, card_a, current))
+        return self._apply(rows, cols, swapped)
+
+    def merge(self, cards, into, selection=None):
+        """ادغام ماژول‌های کارت‌های cards در کارت into (در خانه‌های انتخاب‌شده یا کل دیوار)"""
+        rows, cols = selection if selection is not None else self.select_all()
+        current = self.grid[rows, cols]
+        merged = np.isin(current, list(cards))
+        return self._apply(rows[merged], cols[merged], int(into))
+
+    def set_module(self, row, col, card):
+        """تغییر کارت یک ماژول؛ اگر تغییری نباشد False برمی‌گرداند"""
+        card = int(card)
+        old = int(self.grid[row, col])
+        if not self._write(row, col, card):
+            return False
+        self._changed()
+        self.history.record(EditDelta.from_cells([row], [col], [old], [card]))
+        return True
+
+    def apply_edits(self, edits):
+        """اعمال چند ویرایش (row, col, card) پشت سر هم به‌عنوان یک عمل؛ تعداد خانه‌های تغییرکرده را برمی‌گرداند"""
+        cells = {}
+        for row, col, card in edits:
+            old = int(self.grid[row, col])
+            if self._write(row, col, int(card)):
+                cells.setdefault((row, col), old)
+        changed = [(cell, old) for cell, old in cells.items() if int(self.grid[cell]) != old]
+        if cells:
+            self._changed()
+        if changed:
+            self.history.record(EditDelta.from_cells(
+                [cell[0] for cell, _ in changed],
+                [cell[1] for cell, _ in changed],
+                [old for _, old in changed],
+                [int(self.grid[cell]) for cell, _ in changed]
+            ))
+        return len(changed)
+
+    def undo(self):
+        """برگرداندن آخرین عمل؛ اگر چیزی برای برگرداندن نباشد False"""
+        delta = self.history.pop_undo()
+        if delta is None:
+            return False
+        self._assign_cells(delta.rows, delta.cols, delta.old)
+        return True
+
+    def redo(self):
+        """اعمال دوباره آخرین عمل برگردانده‌شده"""
+        delta = self.history.pop_redo()
+        if delta is None:
+            return False
+        self._assign_cells(delta.rows, delta.cols, delta.new)
+        return True
+
+    def replay(self, history):
+        """اعمال ویرایش‌های یک تاریخچه دیگر روی این چیدمان (مثلاً پس از محاسبه مجدد).
+
+        هر خانه فقط اگر کارت فعلی آن با کارت قبلی ثبت‌شده یکی باشد تغییر می‌کند؛
+        (تعداد خانه‌های اعمال‌شده، تعداد خانه‌های ردشده) را برمی‌گرداند.
+        """
+        applied = skipped = 0
+        for delta in history.deltas():
+            inside = (delta.rows < self.grid.shape[0]) & (delta.cols < self.grid.shape[1])
+            match = inside.copy()
+            match[inside] = self.grid[delta.rows[inside], delta.cols[inside]] == delta.old[inside]
+            skipped += int(delta.size - np.count_nonzero(match))
+            if not match.any():
+                continue
+            applied += self._apply(delta.rows[match], delta.cols[match], delta.new[match])
+        return applied, skipped
+
+    def stats(self):
+        """آمار کامل گرید؛ فقط پس از ویرایش دوباره محاسبه می‌شود"""
+        if self._stats is None:
+            self._stats = get_stats_from_grid(
+                self.grid,
+                px_per_module=self.px_per_module,
+                receiving_card_capacity_px=self.receiving_card_capacity_px,
+                mask=self.mask
+            )
+        return self._stats
+
+    def route(self, **options):
+        """مسیر کابل کارت‌ها برای گرید فعلی؛ بهینه‌ساز فقط اگر پس از آخرین مسیر ویرایشی شده باشد اجرا می‌شود"""
+        if self._route is None or self._route[0] != (self.version, options):
+            route = route_cards(self.grid, px_per_module=self.px_per_module, module=self.module, **options)
+            self._route = ((self.version, options), route)
+        return self._route[1]
+
+    @property
+    def last_route(self):
+        """آخرین مسیر حساب‌شده (شاید مال پیش از ویرایش‌های اخیر) یا None؛ بهینه‌ساز اجرا نمی‌شود"""
+        return None if self._route is None else self._route[1]
+
+    @property
+    def route_is_current(self):
+        return self._route is not None and self._route[0][0] == self.version
+
+    def validate(self, max_modules_per_card=None):
+        """گزارش بررسی کامل چیدمان فعلی؛ تا ویرایش بعدی نگه داشته می‌شود"""
+        if self._report is None or self._report[0] != (self.version, max_modules_per_card):
+            report = validate_layout(
+                self.grid,
+                max_modules_per_card=max_modules_per_card,
+                px_per_module=self.px_per_module,
+                receiving_card_capacity_px=self.receiving_card_capacity_px,
+                mask=self.mask
+            )
+            self._report = ((self.version, max_modules_per_card), report)
+        return self._report[1]
+
+    @property
+    def last_report(self):
+        """آخرین گزارش validate (شاید مال پیش از ویرایش‌های اخیر) یا None"""
+        return None if self._report is None else self._report[1]
+
+    @property
+    def report_is_current(self):
+        return self._report is not None and self._report[0][0] == self.version
+
+    def power_plan(self, **options):
+        """برنامه برق گرید فعلی؛ تا ویرایش بعدی یا تغییر options نگه داشته می‌شود"""
+        if self._power is None or self._power[0] != options:
+            self._power = (options, plan_power(self.grid, mask=self.mask, **options))
+        return self._power[1]
+
+    def psu_count(
+        self,
+        psu_watt=PSU_WATT,
+        module_power_w=MODULE_POWER_W,
+        headroom=PSU_HEADROOM,
+        group_by_card=False,
+        per_psu=None,
+        power_sizing=False
+    ):
+        """همان plan_power(...).psu_count با همان آرگومان‌ها، از شمارش کارت‌ها و بدون پیمایش گرید"""
+        # خانه‌های بیرون از mask کارت ۰ هستند؛ با group_by_card هر کارت پاورهای خودش را دارد
+        counts = self._counts[1:] if group_by_card else self.total_modules
+        count = psu_count_for_modules(
+            counts, psu_watt, module_power_w, headroom, per_psu=per_psu, power_sizing=power_sizing
+        )
+        return int(np.sum(count))
+
+    def costs(self, wall_width_cm, wall_height_cm, prices, dollar_rate=0, controller_name="", route=None, power=None,
+              psu_count=None):
+        """هزینه‌ها با شمارش فعلی کارت‌ها (بدون پیمایش گرید)؛ نتیجه تا ویرایش یا تغییر ورودی بعدی نگه داشته می‌شود.
+
+        هر کارت یک کابل شبکه دارد (cards_used)؛ طول کابل از route است که می‌تواند last_route
+        باشد. تعداد پاور از power یا psu_count و در غیر این صورت همان پیش‌فرض compute_costs است.
+        """
+        if power is not None:
+            psu_count = power.psu_count
+        cable_length_m = 0.0 if route is None else route.total_length_m
+        key = (self.version, wall_width_cm, wall_height_cm, dollar_rate, controller_name, cable_length_m, psu_count)
+        if self._costs is not None and self._costs[0] == key and self._costs[1] == prices:
+            return self._costs[2]
+        costs = compute_costs(
+            self.total_modules,
+            self.cards_used,
+            wall_width_cm,
+            wall_height_cm,
+            prices,
+            dollar_rate=dollar_rate,
+            controller_name=controller_name,
+            cable_count=self.cards_used,
+            cable_length_m=cable_length_m,
+            psu_count=psu_count,
+            area_fraction=self.total_modules / self.grid.size
+        )
+        self._costs = (key, dict(prices), costs)
+        return costs
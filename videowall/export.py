@@ -0,0 +1,192 @@
+"""خروجی گرفتن از چیدمان، آمار کارت‌ها و هزینه‌ها (CSV، JSON، XLSX)؛ متن‌ها قطعه‌به‌قطعه تولید می‌شوند"""
+
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from importlib.util import find_spec
+
+import numpy as np
+
+# openpyxl اختیاری است؛ بدون آن فقط خروجی XLSX در دسترس نیست
+XLSX_AVAILABLE = find_spec("openpyxl") is not None
+
+COST_ITEMS = [
+    ("module", "ماژول‌ها"),
+    ("receiver", "کارت‌های گیرنده"),
+    ("power", "پاورها"),
+    ("controller", "کنترلر"),
+    ("structure", "سازه"),
+    ("hdmi_cable", "کابل HDMI"),
+    ("cable_magnet", "کابل و مگنت"),
+]
+
+MODULE_COLUMNS = ("row", "col", "card")
+CARD_COLUMNS = ("card", "modules", "pixels", "load_percent", "x", "y", "width", "height", "over_capacity")
+COST_COLUMNS = ("item", "label", "amount_rial")
+
+# BOM تا اکسل متن فارسی CSV را درست باز کند
+CSV_BOM = "\ufeff"
+
+
+def content_hash(*parts):
+    """هش محتوای ورودی‌ها؛ آرایه‌ها با dtype و shape و بایت‌هایشان هش می‌شوند"""
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(f"{part.dtype.str}{part.shape}".encode("utf-8"))
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def cost_rows(costs):
+    """(item, برچسب فارسی, مبلغ) برای هر قلم هزینه به‌اضافه جمع کل"""
+    rows = [(item, label, getattr(costs, item)) for item, label in COST_ITEMS]
+    rows.append(("total", "جمع کل", costs.total))
+    return rows
+
+
+def card_rows(stats):
+    """یک ردیف برای هر کارت با ترتیب CARD_COLUMNS"""
+    over = set(stats.over_capacity)
+    for card, count in stats.card_counts.items():
+        x, y, w, h = stats.card_bboxes[card]
+        load = stats.card_load.get(card)
+        yield (
+            card, count, stats.card_pixels.get(card, ""),
+            "" if load is None else round(load * 100, 1),
+            x + 1, y + 1, w, h, card in over,
+        )
+
+
+def _csv_line(values):
+    return ",".join(str(value) for value in values) + "\n"
+
+
+def iter_module_csv(grid, chunk_rows=256, mask=None):
+    """نقشه ماژول به کارت (شماره سطر و ستون از ۱)، هر بار chunk_rows سطر از گرید؛
+    خانه‌های بیرون از mask نوشته نمی‌شوند"""
+    grid = np.asarray(grid)
+    modules_y, modules_x = grid.shape
+    yield CSV_BOM + _csv_line(MODULE_COLUMNS)
+    prefixes = [f",{x}," for x in range(1, modules_x + 1)]
+    if mask is None:
+        for start in range(0, modules_y, chunk_rows):
+            yield "".join(
+                f"{y}{prefix}{card}\n"
+                for y, row in enumerate(grid[start:start + chunk_rows].tolist(), start=start + 1)
+                for prefix, card in zip(prefixes, row)
+            )
+        return
+    for start in range(0, modules_y, chunk_rows):
+        rows = zip(grid[start:start + chunk_rows].tolist(), np.asarray(mask)[start:start + chunk_rows].tolist())
+        yield "".join(
+            f"{y}{prefix}{card}\n"
+            for y, (row, present) in enumerate(rows, start=start + 1)
+            for prefix, card, inside in zip(prefixes, row, present) if inside
+        )
+
+
+def iter_card_csv(stats):
+    """خلاصه هر کارت"""
+    yield CSV_BOM + _csv_line(CARD_COLUMNS)
+    for row in card_rows(stats):
+        yield _csv_line(row)
+
+
+def iter_cost_csv(costs):
+    """تفکیک هزینه‌ها به ریال"""
+    yield CSV_BOM + _csv_line(COST_COLUMNS)
+    for row in cost_rows(costs):
+        yield _csv_line(row)
+
+
+def iter_layout_json(grid, stats, costs, meta=None):
+    """کل خروجی به‌صورت JSON؛ گرید سطربه‌سطر تولید می‌شود"""
+    grid = np.asarray(grid)
+    dumps = lambda value: json.dumps(value, ensure_ascii=False)
+    yield "{\n"
+    for key, value in (meta or {}).items():
+        yield f"  {dumps(key)}: {dumps(value)},\n"
+    yield f'  "modules_x": {grid.shape[1]},\n  "modules_y": {grid.shape[0]},\n'
+    yield '  "costs": ' + dumps({item: amount for item, _, amount in cost_rows(costs)}) + ",\n"
+    yield '  "cards": [\n'
+    for i, row in enumerate(card_rows(stats)):
+        yield ("" if i == 0 else ",\n") + "    " + dumps(dict(zip(CARD_COLUMNS, row)))
+    yield '\n  ],\n  "grid": [\n'
+    for y in range(grid.shape[0]):
+        yield ("" if y == 0 else ",\n") + "    " + dumps(grid[y].tolist())
+    yield "\n  ]\n}\n"
+
+
+def build_xlsx(grid, stats, costs, mask=None):
+    """فایل اکسل با سه برگه (ماژول‌ها، کارت‌ها، هزینه‌ها) در حالت write-only؛ به openpyxl نیاز دارد"""
+    from openpyxl import Workbook
+
+    grid = np.asarray(grid)
+    present = np.ones(grid.shape, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("modules")
+    sheet.append(MODULE_COLUMNS)
+    for y, (row, inside) in enumerate(zip(grid.tolist(), present.tolist()), start=1):
+        for x, (card, keep) in enumerate(zip(row, inside), start=1):
+            if keep:
+                sheet.append((y, x, card))
+    sheet = workbook.create_sheet("cards")
+    sheet.append(CARD_COLUMNS)
+    for row in card_rows(stats):
+        sheet.append(row)
+    sheet = workbook.create_sheet("costs")
+    sheet.append(COST_COLUMNS)
+    for row in cost_rows(costs):
+        sheet.append(row)
+    buf = io.BytesIO()
+    workbook.save(buf)
+    return buf.getvalue()
+
+
+def encode_chunks(chunks):
+    """اتصال قطعه‌های متنی یک مولد به بایت‌های UTF-8.
+
+    download_button کل محتوا را یک‌جا می‌خواهد، پس نتیجه در حافظه ساخته می‌شود؛ مولد فقط
+    رشته متنی کامل میانی را حذف می‌کند و هر قطعه پس از نوشتن کنار می‌رود.
+    """
+    buf = io.BytesIO()
+    for chunk in chunks:
+        buf.write(chunk.encode("utf-8"))
+    return buf.getvalue()
+
+
+class ArtifactCache:
+    """کش LRU بایت‌های خروجی با کلید هش محتوا و سقف حجم کل"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key, build):
+        """بایت‌های ذخیره‌شده برای key یا ساخت آن با build()"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+        data = build()
+        with self._lock:
+            if key not in self._entries and len(data) <= self.max_bytes:
+                self._entries[key] = data
+                self._size += len(data)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return data
@@ -0,0 +1,62 @@
+"""توابع کمکی تاریخ و قالب‌بندی اعداد"""
+
+from datetime import datetime
+
+
+def gregorian_to_jalali(gy, gm, gd):
+    """تبدیل تاریخ میلادی به هجری شمسی"""
+    g_d_m = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334]
+
+    if (gm > 2):
+        gy2 = gy + 1
+    else:
+        gy2 = gy
+
+    days = 355666 + (365 * gy) + ((gy2 + 3) // 4) - ((gy2 + 99) // 100) + ((gy2 + 399) // 400) - 1
+    days += g_d_m[gm - 1] + gd
+
+    if (gm > 2):
+        if (((gy % 4 == 0 and gy % 100 != 0) or (gy % 400 == 0)) == False):
+            days -= 1
+
+    jy = -1595 + (33 * (days // 12053))
+    days %= 12053
+    jy += 4 * (days // 1461)
+    days %= 1461
+    if (days > 365):
+        jy += (days - 1) // 365
+        days = (days - 1) % 365
+
+    if (days < 186):
+        jm = 1 + (days // 31)
+        jd = 1 + (days % 31)
+    else:
+        jm = 7 + ((days - 186) // 30)
+        jd = 1 + ((days - 186) % 30)
+
+    return jy, jm, jd
+
+
+def get_jalali_date():
+    """دریافت تاریخ هجری شمسی فعلی"""
+    now = datetime.now()
+    jy, jm, jd = gregorian_to_jalali(now.year, now.month, now.day)
+    return f"{jy}/{jm:02d}/{jd:02d} {now.hour:02d}:{now.minute:02d}:{now.second:02d}"
+
+
+def format_number(amount):
+    """فرمت کردن اعداد با جداکننده سه رقمی"""
+    if amount == 0:
+        return "0"
+    amount_int = int(amount)
+    formatted = f"{amount_int:,}".replace(",", ".")
+    return formatted
+
+
+def format_currency(amount):
+    """فرمت کردن اعداد با جداکننده سه رقمی و واحد ریال"""
+    if amount == 0:
+        return "0 ریال"
+    amount_int = int(amount)
+    formatted = f"{amount_int:,}".replace(",", ".")
+    return f"{formatted} ریال"
@@ -0,0 +1,104 @@
+"""تاریخچه ویرایش چیدمان به‌صورت تغییرات فشرده (خانه، کارت قبلی، کارت جدید)"""
+
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class EditDelta:
+    """یک عمل ویرایش: برای هر خانه تغییرکرده سطر، ستون، کارت قبلی و کارت جدید"""
+    rows: np.ndarray
+    cols: np.ndarray
+    old: np.ndarray
+    new: np.ndarray
+
+    @classmethod
+    def from_cells(cls, rows, cols, old, new):
+        return cls(
+            np.asarray(rows, dtype=np.uint16),
+            np.asarray(cols, dtype=np.uint16),
+            np.asarray(old, dtype=np.uint32),
+            np.asarray(new, dtype=np.uint32),
+        )
+
+    @property
+    def size(self):
+        return self.rows.size
+
+    def inverse(self):
+        return EditDelta(self.rows, self.cols, self.new, self.old)
+
+
+class EditHistory:
+    """پشته‌های undo/redo با سقف تعداد عمل و سقف کل خانه‌های ذخیره‌شده.
+
+    undo و redo فقط یک عمل را جابه‌جا می‌کنند (O(1) نسبت به طول تاریخچه). اگر سقف‌ها
+    رد شوند، قدیمی‌ترین عمل‌ها کنار گذاشته می‌شوند؛ آخرین عمل همیشه می‌ماند، حتی اگر
+    به‌تنهایی از max_cells بزرگ‌تر باشد.
+    """
+
+    def __init__(self, max_entries=500, max_cells=200_000):
+        self.max_entries = max_entries
+        self.max_cells = max_cells
+        self._undo = deque()
+        self._redo = deque()
+        self._cells = 0
+
+    def __len__(self):
+        return len(self._undo)
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    @property
+    def redo_count(self):
+        return len(self._redo)
+
+    def _trim(self):
+        while len(self._undo) > 1 and (len(self._undo) > self.max_entries or self._cells > self.max_cells):
+            self._cells -= self._undo.popleft().size
+
+    def record(self, delta):
+        """ثبت عمل جدید؛ پشته redo خالی می‌شود"""
+        if delta.size == 0:
+            return
+        for dropped in self._redo:
+            self._cells -= dropped.size
+        self._redo.clear()
+        self._undo.append(delta)
+        self._cells += delta.size
+        self._trim()
+
+    def pop_undo(self):
+        """آخرین عمل برای برگرداندن (و انتقال آن به پشته redo) یا None"""
+        if not self._undo:
+            return None
+        delta = self._undo.pop()
+        self._redo.append(delta)
+        return delta
+
+    def pop_redo(self):
+        """آخرین عمل برگردانده‌شده برای اعمال مجدد یا None"""
+        if not self._redo:
+            return None
+        delta = self._redo.pop()
+        self._undo.append(delta)
+        return delta
+
+    def deltas(self):
+        """عمل‌های قابل undo از قدیمی به جدید"""
+        return list(self._undo)
+
+    @property
+    def nbytes(self):
+        return sum(
+            delta.rows.nbytes + delta.cols.nbytes + delta.old.nbytes + delta.new.nbytes
+            for stack in (self._undo, self._redo) for delta in stack
+        )
@@ -0,0 +1,246 @@
+"""حل چیدمان در پس‌زمینه با گزارش پیشرفت، لغو و سقف زمانی"""
+
+import multiprocessing
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from .layout import LayoutCancelled, block_grid_layout, optimize_layout
+
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+FAILED = "failed"
+
+# کمترین فاصله بین دو گزارش پیشرفت از کارگر (هر گزارش کپی گرید را به پردازه اصلی می‌فرستد)
+PROGRESS_INTERVAL_S = 0.1
+
+
+class LayoutJob:
+    """دستگیره یک حل چیدمان در حال اجرا.
+
+    کارگر با رسیدن به سقف زمانی خودش متوقف می‌شود و چیدمان بلوکی ساده
+    (block_grid_layout) به‌عنوان نتیجه جایگزین ثبت می‌شود؛ poll() همین را برای وقتی
+    که نتیجه کارگر هنوز نرسیده انجام می‌دهد. پیشرفت و گرید نیمه‌کاره از state مشترک
+    (دیکشنری Manager) خوانده می‌شوند.
+    """
+
+    def __init__(self, modules_x, modules_y, block_w, block_h, timeout_s, signature=None, mask=None,
+                 cancel_event=None, state=None):
+        self.modules_x = modules_x
+        self.modules_y = modules_y
+        self.block_w = block_w
+        self.block_h = block_h
+        self.mask = mask
+        self.timeout_s = timeout_s
+        self.signature = signature
+        self.started = time.perf_counter()
+        self.finished = None
+        self.status = RUNNING
+        self.error = None
+        self.filled = 0
+        self.total = modules_x * modules_y if mask is None else int(mask.sum())
+        self._cancel = cancel_event if cancel_event is not None else threading.Event()
+        self._state = state
+        self._lock = threading.Lock()
+        self._result = None
+        self._future = None
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            if self.status != RUNNING:
+                return
+            self.status = status
+            self._result = result
+            self.error = error
+            self.finished = time.perf_counter()
+
+    @property
+    def fraction(self):
+        return self.filled / self.total if self.total else 1.0
+
+    @property
+    def elapsed(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    @property
+    def done(self):
+        return self.status != RUNNING
+
+    @property
+    def is_fallback(self):
+        return self.status == TIMED_OUT
+
+    def _time_out(self):
+        self._cancel.set()
+        if self.status == RUNNING:
+            self._finish(TIMED_OUT, result=block_grid_layout(
+                self.modules_x, self.modules_y, self.block_w, self.block_h, mask=self.mask
+            ))
+
+    def poll(self):
+        """به‌روزرسانی پیشرفت و وضعیت و اعمال سقف زمانی؛ وضعیت فعلی را برمی‌گرداند"""
+        if self.status == RUNNING and self._state is not None:
+            self.filled = self._state.get("filled", self.filled)
+        if self.status == RUNNING and self.timeout_s is not None and self.elapsed > self.timeout_s:
+            self._time_out()
+        return self.status
+
+    def wait(self, timeout=None):
+        """تا پایان حل یا گذشت timeout ثانیه صبر می‌کند"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while self.poll() == RUNNING:
+            remaining = 0.02 if deadline is None else min(0.02, deadline - time.perf_counter())
+            if remaining <= 0:
+                break
+            time.sleep(remaining)
+        return self.status
+
+    def cancel(self):
+        """لغو حل؛ کار در صف اجرا نمی‌شود و کارگر در اولین نقطه بررسی متوقف می‌شود"""
+        self._cancel.set()
+        if self._future is not None:
+            self._future.cancel()
+        self._finish(CANCELLED)
+
+    def partial_grid(self):
+        """آخرین شبکه نیمه‌کاره گزارش‌شده برای نمایش (ممکن است None باشد)"""
+        return None if self._state is None else self._state.get("grid")
+
+    def result(self):
+        """(blocks, grid) نهایی یا جایگزین؛ پیش از پایان None"""
+        self.poll()
+        return self._result
+
+
+_MAIN_LOCK = threading.Lock()
+
+
+@contextmanager
+def _hidden_main_script():
+    """spawn فایل __main__ (اینجا اسکریپت Streamlit) را در هر پردازه تازه دوباره اجرا می‌کند؛
+    هنگام ساختن پردازه‌ها یک ماژول خالی جای آن گذاشته می‌شود"""
+    with _MAIN_LOCK:
+        main = sys.modules.get("__main__")
+        if main is None or getattr(main, "__spec__", None) is not None or not hasattr(main, "__file__"):
+            yield
+            return
+        stub = types.ModuleType("__main__")
+        sys.modules["__main__"] = stub
+        try:
+            yield
+        finally:
+            # اگر در همین فاصله اجرای دیگری __main__ خودش را گذاشته باشد دست نمی‌خورد
+            if sys.modules.get("__main__") is stub:
+                sys.modules["__main__"] = main
+
+
+class _Deadline:
+    """cancel برای optimize_layout: رویداد لغو یا گذشتن سقف زمانی، هر کدام زودتر"""
+
+    def __init__(self, event, deadline):
+        self.event = event
+        self.deadline = deadline
+
+    def is_set(self):
+        return self.event.is_set() or (self.deadline is not None and time.time() > self.deadline)
+
+
+def _solve(modules_x, modules_y, block_w, block_h, max_size, options, cancel_event, state, deadline):
+    """حل در پردازه کارگر؛ پیشرفت حداکثر هر PROGRESS_INTERVAL_S ثانیه در state نوشته می‌شود"""
+    last = [0.0]
+
+    def report(filled, total, grid):
+        now = time.perf_counter()
+        if now - last[0] >= PROGRESS_INTERVAL_S:
+            last[0] = now
+            state.update(filled=filled, grid=grid.copy())
+
+    return optimize_layout(
+        modules_x, modules_y, block_w, block_h, max_size,
+        progress=report, cancel=_Deadline(cancel_event, deadline), **options
+    )
+
+
+class LayoutJobRunner:
+    """اجرای حل چیدمان روی ProcessPoolExecutor با context spawn (مانند سرویس قیمت).
+
+    حل‌ها برای GIL با UI رقابت نمی‌کنند. رویداد لغو و پیشرفت از طریق یک Manager بین
+    پردازه‌ها مشترک است و کارگر با رسیدن به سقف زمانی خودش متوقف می‌شود، حتی اگر
+    هیچ‌کس poll نکند. executor را می‌توان (مثلاً در آزمون‌ها) از بیرون داد.
+    """
+
+    def __init__(self, max_workers=2, cache=None, timeout_s=10.0, executor=None):
+        self.cache = cache
+        self.timeout_s = timeout_s
+        self._context = multiprocessing.get_context("spawn")
+        self._executor = executor if executor is not None else ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=self._context
+        )
+        self._manager = None
+        self._manager_lock = threading.Lock()
+
+    def _shared(self):
+        """(رویداد لغو، دیکشنری پیشرفت) مشترک بین پردازه‌ها؛ Manager در اولین حل ساخته می‌شود"""
+        with self._manager_lock:
+            if self._manager is None:
+                with _hidden_main_script():
+                    self._manager = self._context.Manager()
+            return self._manager.Event(), self._manager.dict()
+
+    def submit(self, modules_x, modules_y, block_w, block_h, max_size, signature=None,
+               timeout_s=None, **options):
+        """شروع حل در پس‌زمینه؛ اگر نتیجه در کش باشد دستگیره بلافاصله کامل است"""
+        timeout_s = self.timeout_s if timeout_s is None else timeout_s
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(modules_x, modules_y, block_w, block_h, max_size, **options)
+            cached = self.cache.get(key)
+            if cached is not None:
+                job = LayoutJob(modules_x, modules_y, block_w, block_h, timeout_s,
+                                signature=signature, mask=options.get("mask"))
+                job.filled = job.total
+                job._finish(DONE, result=cached)
+                return job
+        cancel_event, state = self._shared()
+        job = LayoutJob(
+            modules_x, modules_y, block_w, block_h, timeout_s,
+            signature=signature, mask=options.get("mask"), cancel_event=cancel_event, state=state
+        )
+        deadline = None if timeout_s is None else time.time() + timeout_s
+        # ProcessPoolExecutor پردازه‌های کارگر را در همین submit می‌سازد
+        with _hidden_main_script():
+            job._future = self._executor.submit(
+                _solve, modules_x, modules_y, block_w, block_h, max_size, options, cancel_event, state, deadline
+            )
+        job._future.add_done_callback(lambda future: self._done(job, key, future))
+        return job
+
+    def _done(self, job, key, future):
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if isinstance(exc, LayoutCancelled):
+            # لغو کاربر وضعیت را از قبل CANCELLED کرده است؛ در غیر این صورت سقف زمانی گذشته
+            job._time_out()
+            return
+        if exc is not None:
+            job._finish(FAILED, error=exc)
+            return
+        blocks, grid = future.result()
+        if self.cache is not None:
+            self.cache.put(key, blocks, grid)
+        job.filled = job.total
+        job._finish(DONE, result=(blocks, grid))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._manager_lock:
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
@@ -0,0 +1,441 @@
+"""الگوریتم‌های چیدمان کارت‌های گیرنده روی ماژول‌ها"""
+
+import math
+import time
+
+import numpy as np
+
+from .catalog import load_catalog
+
+
+class LayoutCancelled(Exception):
+    """حل چیدمان پیش از پایان لغو شد"""
+
+
+def optimize_layout_reference(modules_x, modules_y, block_w, block_h, max_size):
+    """نسخه مرجع چیدمان با حلقه‌های تودرتو (برای مقایسه نتایج)"""
+    blocks = []
+    grid = np.zeros((modules_y, modules_x), dtype=int)
+    card_id = 1
+
+    y = 0
+    while y + block_h <= modules_y:
+        x = 0
+        while x + block_w <= modules_x:
+            if np.all(grid[y:y+block_h, x:x+block_w] == 0):
+                blocks.append((x, y, block_w, block_h, card_id))
+                grid[y:y+block_h, x:x+block_w] = card_id
+                card_id += 1
+            x += block_w
+        y += block_h
+
+    user_max_block_size = block_w * block_h
+
+    for h in range(user_max_block_size, 0, -1):
+        for w in range(user_max_block_size, 0, -1):
+            if w * h > user_max_block_size:
+                continue
+            y = 0
+            while y < modules_y:
+                x = 0
+                while x < modules_x:
+                    if grid[y, x] == 0:
+                        can_place = True
+                        for dy in range(h):
+                            for dx in range(w):
+                                if y + dy >= modules_y or x + dx >= modules_x or grid[y + dy, x + dx] != 0:
+                                    can_place = False
+                                    break
+                            if not can_place:
+                                break
+                        if can_place:
+                            blocks.append((x, y, w, h, card_id))
+                            for dy in range(h):
+                                for dx in range(w):
+                                    grid[y + dy, x + dx] = card_id
+                            card_id += 1
+                            x += w
+                        else:
+                            x += 1
+                    else:
+                        x += 1
+                y += 1
+
+    return blocks, grid
+
+
+def smallest_uint_dtype(max_value):
+    """کوچک‌ترین dtype بدون علامت که max_value در آن جا شود"""
+    return np.min_scalar_type(max(0, int(max_value)))
+
+
+def compact_grid(grid):
+    """همان گرید با کوچک‌ترین dtype بدون علامت ممکن"""
+    grid = np.asarray(grid)
+    dtype = smallest_uint_dtype(grid.max() if grid.size else 0)
+    return grid if grid.dtype == dtype else grid.astype(dtype)
+
+
+def _check_mask(mask, modules_x, modules_y):
+    """mask بولی (True یعنی ماژول نصب می‌شود) یا None اگر دیوار مستطیل کامل است"""
+    if mask is None:
+        return None
+    mask = np.asarray(mask, dtype=bool)
+    if mask.shape != (modules_y, modules_x):
+        raise ValueError(f"mask shape {mask.shape} does not match wall ({modules_y}, {modules_x})")
+    return None if mask.all() else mask
+
+
+def mask_rectangles(mask):
+    """تجزیه خانه‌های True به مستطیل‌های (x, y, w, h): اجراهای افقی هر سطر که با سطر بعد
+    ادغام می‌شوند اگر دقیقاً همان بازه ستونی را داشته باشند"""
+    mask = np.asarray(mask, dtype=bool)
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+
+    open_runs = {}
+    rects = []
+    for row, x0, x1 in zip(rows.tolist(), starts.tolist(), ends.tolist()):
+        run = open_runs.pop((x0, x1), None)
+        if run is not None and run[1] + run[3] == row:
+            run[3] += 1
+        else:
+            if run is not None:
+                rects.append(tuple(run))
+            run = [x0, row, x1 - x0, 1]
+        open_runs[(x0, x1)] = run
+    rects.extend(tuple(run) for run in open_runs.values())
+    return sorted(rects, key=lambda r: (r[1], r[0]))
+
+
+def block_grid_layout(modules_x, modules_y, block_w, block_h, mask=None):
+    """چیدمان ساده بلوکی (مرحله اول موتور سریع) با بلوک‌های بریده‌شده در لبه‌ها؛ برای حالت اضطراری.
+
+    با mask خانه‌های حذف‌شده ۰ می‌مانند و بخش باقیمانده هر بلوک به مستطیل‌هایی با
+    همان شماره کارت شکسته می‌شود.
+    """
+    mask = _check_mask(mask, modules_x, modules_y)
+    blocks = []
+    cards = -(-modules_x // block_w) * -(-modules_y // block_h)
+    grid = np.zeros((modules_y, modules_x), dtype=smallest_uint_dtype(cards))
+    card_id = 1
+    for y in range(0, modules_y, block_h):
+        h = min(block_h, modules_y - y)
+        for x in range(0, modules_x, block_w):
+            w = min(block_w, modules_x - x)
+            if mask is None:
+                rects = [(0, 0, w, h)]
+            else:
+                rects = mask_rectangles(mask[y:y+h, x:x+w])
+                if not rects:
+                    continue
+            for dx, dy, rw, rh in rects:
+                blocks.append((x + dx, y + dy, rw, rh, card_id))
+                grid[y+dy:y+dy+rh, x+dx:x+dx+rw] = card_id
+            card_id += 1
+    return blocks, grid
+
+
+def _check_cancel(cancel):
+    if cancel is not None and cancel.is_set():
+        raise LayoutCancelled()
+
+
+def _window_sums(occupied_sat, w, h):
+    """تعداد خانه‌های پر در هر پنجره w×h با استفاده از جدول مجموع تجمعی"""
+    return (occupied_sat[h:, w:] - occupied_sat[:-h, w:]
+            - occupied_sat[h:, :-w] + occupied_sat[:-h, :-w])
+
+
+def _summed_area_table(grid, holes=None):
+    """جدول مجموع تجمعی خانه‌های پر؛ خانه‌های holes (بیرون از mask) هم پر حساب می‌شوند"""
+    occupied = grid != 0 if holes is None else (grid != 0) | holes
+    sat = np.zeros((grid.shape[0] + 1, grid.shape[1] + 1), dtype=np.int32)
+    np.cumsum(np.cumsum(occupied, axis=0, dtype=np.int32), axis=1, out=sat[1:, 1:])
+    return sat
+
+
+def _max_modules_per_card(max_size, px_per_module, receiving_card_capacity_px):
+    """حداکثر ماژول هر کارت با در نظر گرفتن سقف ماژول و ظرفیت پیکسلی کارت"""
+    limit = max(1, int(max_size))
+    if px_per_module:
+        limit = min(limit, max(1, receiving_card_capacity_px // px_per_module))
+    return limit
+
+
+def clamp_block_shape(block_w, block_h, max_modules_per_card, px_per_module=None, receiving_card_capacity_px=None):
+    """شکل مجاز نزدیک به w×h: اول عرض و بعد ارتفاع تا جایی کوتاه می‌شوند که w×h از سقف کارت بیشتر نشود"""
+    if receiving_card_capacity_px is None:
+        receiving_card_capacity_px = load_catalog().receiving_card_capacity_px
+    limit = _max_modules_per_card(max_modules_per_card, px_per_module, receiving_card_capacity_px)
+    block_w = max(1, min(block_w, limit))
+    return block_w, max(1, min(block_h, limit // block_w))
+
+
+def _strip_layout(modules_x, modules_y, max_modules):
+    """بهترین تقسیم دیوار به نوارهای عمودی (برنامه‌ریزی پویا روی عرض نوارها)"""
+    cost = [0] + [math.inf] * modules_x
+    choice = [0] * (modules_x + 1)
+    for x in range(1, modules_x + 1):
+        for w in range(1, min(x, max_modules) + 1):
+            pieces = -(-modules_y // min(modules_y, max_modules // w))
+            if cost[x - w] + pieces < cost[x]:
+                cost[x] = cost[x - w] + pieces
+                choice[x] = w
+
+    rects = []
+    x = modules_x
+    while x > 0:
+        w = choice[x]
+        piece_h = min(modules_y, max_modules // w)
+        for y in range(0, modules_y, piece_h):
+            rects.append((x - w, y, w, min(piece_h, modules_y - y)))
+        x -= w
+    return rects
+
+
+def _guillotine_layout(modules_x, modules_y, max_modules, upper_bound, deadline, cancel=None):
+    """برنامه‌ریزی پویا روی برش‌های گیوتینی با هرس شاخه و کران؛ در صورت اتمام زمان None برمی‌گرداند"""
+    # best[a, b]: کمترین تعداد کارت برای مستطیل a×b؛ cut > 0 برش عمودی و cut < 0 برش افقی
+    best = np.zeros((modules_x + 1, modules_y + 1), dtype=np.int32)
+    cut = np.zeros((modules_x + 1, modules_y + 1), dtype=np.int32)
+    heights = np.arange(modules_y + 1)
+
+    for a in range(1, modules_x + 1):
+        if time.perf_counter() > deadline:
+            return None
+        _check_cancel(cancel)
+        row = best[a]
+        row[1:] = np.maximum(1, -(-(a * heights[1:]) // max_modules))  # کران پایین
+        single = a * heights[1:] <= max_modules
+
+        if a > 1:
+            half = a // 2
+            sums = best[1:half + 1, 1:] + best[a - 1:a - 1 - half:-1, 1:]
+            split = sums.argmin(axis=0)
+            vertical = sums[split, np.arange(modules_y)]
+        else:
+            vertical = None
+
+        for b in range(1, modules_y + 1):
+            if single[b - 1]:
+                row[b] = 1
+                continue
+            bound = row[b]
+            value, choice = np.iinfo(np.int32).max, 0
+            if vertical is not None:
+                value, choice = int(vertical[b - 1]), int(split[b - 1]) + 1
+            if value > bound and b > 1:
+                half = b // 2
+                sums = row[1:half + 1] + row[b - 1:b - 1 - half:-1]
+                j = int(sums.argmin())
+                if sums[j] < value:
+                    value, choice = int(sums[j]), -(j + 1)
+            row[b] = value
+            cut[a, b] = choice
+
+    if best[modules_x, modules_y] >= upper_bound:
+        return None
+
+    rects = []
+    stack = [(0, 0, modules_x, modules_y)]
+    while stack:
+        x, y, w, h = stack.pop()
+        c = cut[w, h]
+        if c > 0:
+            stack.append((x, y, c, h))
+            stack.append((x + c, y, w - c, h))
+        elif c < 0:
+            stack.append((x, y, w, -c))
+            stack.append((x, y - c, w, h + c))
+        else:
+            rects.append((x, y, w, h))
+    return rects
+
+
+def optimize_layout_min_cards(
+    modules_x,
+    modules_y,
+    block_w,
+    block_h,
+    max_size,
+    px_per_module=None,
+    receiving_card_capacity_px=512*512,
+    time_budget_s=0.5,
+    progress=None,
+    cancel=None,
+    mask=None
+):
+    """چیدمان با کمترین تعداد کارت گیرنده، با رعایت سقف ماژول و ظرفیت پیکسلی هر کارت.
+
+    ابتدا بهترین چیدمان نواری (افقی یا عمودی) و چیدمان سریع بلوکی به‌عنوان جواب اولیه
+    ساخته می‌شوند؛ سپس تا پایان بودجه زمانی، برنامه‌ریزی پویای گیوتینی دنبال جواب بهتر
+    می‌گردد. اگر زمان تمام شود بهترین جواب پیدا شده برگردانده می‌شود.
+    progress(filled, total, grid) و cancel (threading.Event) مانند optimize_layout هستند.
+    با mask بخش آزاد دیوار به مستطیل‌ها تجزیه و هر مستطیل جداگانه حل می‌شود.
+    """
+    mask = _check_mask(mask, modules_x, modules_y)
+    if mask is not None:
+        return _masked_min_cards(
+            mask, block_w, block_h, max_size, px_per_module, receiving_card_capacity_px,
+            time_budget_s, progress, cancel
+        )
+    deadline = time.perf_counter() + time_budget_s
+    max_modules = _max_modules_per_card(max_size, px_per_module, receiving_card_capacity_px)
+    lower_bound = -(-(modules_x * modules_y) // max_modules)
+
+    candidates = []
+    if block_w * block_h <= max_modules:
+        fast_blocks, _ = optimize_layout(modules_x, modules_y, block_w, block_h, max_size)
+        candidates.append([(x, y, w, h) for x, y, w, h, _ in fast_blocks])
+    candidates.append(_strip_layout(modules_x, modules_y, max_modules))
+    candidates.append([(x, y, w, h) for y, x, h, w in _strip_layout(modules_y, modules_x, max_modules)])
+    rects = min(candidates, key=len)
+
+    if len(rects) > lower_bound:
+        improved = _guillotine_layout(
+            modules_x, modules_y, max_modules, len(rects), deadline, cancel=cancel
+        )
+        if improved is not None:
+            rects = improved
+
+    blocks = []
+    grid = np.zeros((modules_y, modules_x), dtype=smallest_uint_dtype(len(rects)))
+    for card_id, (x, y, w, h) in enumerate(sorted(rects, key=lambda r: (r[1], r[0])), start=1):
+        blocks.append((x, y, w, h, card_id))
+        grid[y:y+h, x:x+w] = card_id
+    if progress is not None:
+        progress(modules_x * modules_y, modules_x * modules_y, grid)
+    return blocks, grid
+
+
+def _masked_min_cards(mask, block_w, block_h, max_size, px_per_module, receiving_card_capacity_px,
+                      time_budget_s, progress, cancel):
+    """کمترین کارت روی هر مستطیل آزاد mask؛ بودجه زمانی به نسبت مساحت تقسیم می‌شود"""
+    modules_y, modules_x = mask.shape
+    rects = mask_rectangles(mask)
+    total = int(np.count_nonzero(mask))
+    blocks = []
+    for rx, ry, rw, rh in rects:
+        _check_cancel(cancel)
+        sub_blocks, _ = optimize_layout_min_cards(
+            rw, rh, min(block_w, rw), min(block_h, rh), max_size,
+            px_per_module=px_per_module,
+            receiving_card_capacity_px=receiving_card_capacity_px,
+            time_budget_s=time_budget_s * rw * rh / max(total, 1),
+            cancel=cancel
+        )
+        blocks.extend((rx + x, ry + y, w, h) for x, y, w, h, _ in sub_blocks)
+
+    grid = np.zeros((modules_y, modules_x), dtype=smallest_uint_dtype(len(blocks)))
+    numbered = []
+    for card_id, (x, y, w, h) in enumerate(sorted(blocks, key=lambda r: (r[1], r[0])), start=1):
+        numbered.append((x, y, w, h, card_id))
+        grid[y:y+h, x:x+w] = card_id
+    if progress is not None:
+        progress(total, total, grid)
+    return numbered, grid
+
+
+def optimize_layout(
+    modules_x,
+    modules_y,
+    block_w,
+    block_h,
+    max_size,
+    mode="fast",
+    px_per_module=None,
+    receiving_card_capacity_px=512*512,
+    time_budget_s=0.5,
+    progress=None,
+    cancel=None,
+    mask=None
+):
+    """چیدمان کارت‌ها روی ماژول‌ها.
+
+    mode="fast": چیدمان بلوکی سریع، mode="reference": همان الگوریتم قدیمی،
+    mode="min_cards": کمترین تعداد کارت با رعایت max_size و ظرفیت پیکسلی کارت.
+    progress(filled, total, grid) بعد از هر مرحله با شبکه در حال ساخت صدا زده می‌شود و
+    اگر cancel (مثلاً threading.Event) فعال شود LayoutCancelled پرتاب می‌شود.
+    mask آرایه بولی (modules_y, modules_x) است؛ خانه‌های False (در، ستون، لبه پله‌ای)
+    هیچ‌وقت پر نمی‌شوند و در گرید ۰ می‌مانند.
+    """
+    mask = _check_mask(mask, modules_x, modules_y)
+    if mode == "reference":
+        if mask is not None:
+            raise ValueError("the reference engine does not support masks")
+        return optimize_layout_reference(modules_x, modules_y, block_w, block_h, max_size)
+    if mode == "min_cards":
+        return optimize_layout_min_cards(
+            modules_x, modules_y, block_w, block_h, max_size,
+            px_per_module=px_per_module,
+            receiving_card_capacity_px=receiving_card_capacity_px,
+            time_budget_s=time_budget_s,
+            progress=progress,
+            cancel=cancel,
+            mask=mask
+        )
+    if mode != "fast":
+        raise ValueError(f"unknown layout mode: {mode!r}")
+
+    blocks = []
+    grid = np.zeros((modules_y, modules_x), dtype=int)
+    card_id = 1
+    holes = None if mask is None else ~mask
+    # بلوکی که روی خانه حذف‌شده بیفتد در مرحله اول گذاشته نمی‌شود
+    hole_windows = None if holes is None else _window_sums(_summed_area_table(holes), block_w, block_h)
+
+    # مرحله اول: بلوک‌های کامل روی شبکه منظم
+    for y in range(0, modules_y - block_h + 1, block_h):
+        for x in range(0, modules_x - block_w + 1, block_w):
+            if hole_windows is not None and hole_windows[y, x]:
+                continue
+            blocks.append((x, y, block_w, block_h, card_id))
+            grid[y:y+block_h, x:x+block_w] = card_id
+            card_id += 1
+
+    # مرحله دوم: پر کردن باقیمانده با بلوک‌های کوچک‌تر.
+    # آزاد بودن هر مستطیل با جدول مجموع تجمعی (integral image) در O(1) بررسی می‌شود
+    # و مبدأهای ممکن با یک اسکن برداری پیدا می‌شوند. ترتیب پیمایش و انتخاب دقیقاً
+    # مانند نسخه مرجع است، پس خروجی یکسان است.
+    user_max_block_size = block_w * block_h
+    total_cells = modules_x * modules_y if holes is None else int(np.count_nonzero(mask))
+    free_cells = total_cells - len(blocks) * block_w * block_h
+    sat = _summed_area_table(grid, holes)
+    if progress is not None:
+        progress(total_cells - free_cells, total_cells, grid)
+
+    for h in range(min(user_max_block_size, modules_y), 0, -1):
+        _check_cancel(cancel)
+        for w in range(min(user_max_block_size // h, modules_x), 0, -1):
+            if free_cells == 0:
+                return blocks, compact_grid(grid)
+            if w * h > free_cells:
+                continue
+            origins_y, origins_x = np.nonzero(_window_sums(sat, w, h) == 0)
+            if origins_y.size == 0:
+                continue
+
+            # مستطیل‌هایی که در همین دور قرار می‌گیرند، مبدأهای هم‌پوشان بعدی را مسدود می‌کنند
+            blocked = np.zeros((modules_y - h + 1, modules_x - w + 1), dtype=bool)
+            placed = False
+            for y, x in zip(origins_y.tolist(), origins_x.tolist()):
+                if blocked[y, x]:
+                    continue
+                blocks.append((x, y, w, h, card_id))
+                grid[y:y+h, x:x+w] = card_id
+                card_id += 1
+                blocked[y:y+h, max(0, x-w+1):x+w] = True
+                free_cells -= w * h
+                placed = True
+
+            if placed:
+                sat = _summed_area_table(grid, holes)
+                if progress is not None:
+                    progress(total_cells - free_cells, total_cells, grid)
+                _check_cancel(cancel)
+
+    return blocks, compact_grid(grid)
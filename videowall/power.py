@@ -0,0 +1,154 @@
+"""برنامه‌ریزی برق: تقسیم ماژول‌ها بین پاورها با بار متوازن.
+
+ماژول‌ها به ترتیب کارت و در هر کارت به‌صورت مارپیچ (ردیف‌به‌ردیف با جهت متناوب)
+مرتب می‌شوند و هر پاور بخشی پیوسته از این ترتیب را می‌گیرد؛ بنابراین ماژول‌های یک
+پاور کنار هم و معمولاً در یک کارت هستند. تعداد پاور همان فرمول
+psu_count_for_modules است تا محاسبه پایه، هزینه‌ها و نمایش یک عدد را نشان دهند.
+
+پیش‌فرض نسبت ثابت قیمت‌گذاری (modules_per_psu ماژول پیش‌فرض کاتالوگ) است؛ با
+power_sizing=True تعداد ماژول هر پاور از توان پاور، مصرف ماژول و headroom حساب می‌شود.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .catalog import load_catalog
+from .layout import smallest_uint_dtype
+
+PSU_WATT = 60
+MODULE_POWER_W = 23
+# فقط این کسر از توان نامی هر پاور بار گذاشته می‌شود
+PSU_HEADROOM = 0.8
+
+
+def modules_per_psu(psu_watt=PSU_WATT, module_power_w=MODULE_POWER_W, headroom=PSU_HEADROOM):
+    """حداکثر ماژول روی یک پاور (حداقل ۱)؛ با آرایه‌ها هم کار می‌کند"""
+    per = np.floor(np.asarray(psu_watt) * headroom / np.asarray(module_power_w) + 1e-9).astype(np.int64)
+    per = np.maximum(per, 1)
+    return int(per) if per.ndim == 0 else per
+
+
+def _per_psu(per_psu, power_sizing, psu_watt, module_power_w, headroom):
+    """ماژول روی هر پاور: از توان، از per_psu داده‌شده یا از نسبت ماژول پیش‌فرض کاتالوگ"""
+    if power_sizing:
+        return modules_per_psu(psu_watt, module_power_w, headroom)
+    if per_psu is None:
+        return load_catalog().module().modules_per_psu
+    return per_psu
+
+
+def psu_count_for_modules(
+    total_modules,
+    psu_watt=PSU_WATT,
+    module_power_w=MODULE_POWER_W,
+    headroom=PSU_HEADROOM,
+    per_psu=None,
+    power_sizing=False
+):
+    """تعداد پاور لازم برای تعداد ماژول داده شده؛ با آرایه‌ها هم کار می‌کند.
+
+    per_psu ماژول روی هر پاور است (None یعنی نسبت ماژول پیش‌فرض کاتالوگ)؛ با
+    power_sizing از توان حساب می‌شود (modules_per_psu).
+    """
+    per_psu = _per_psu(per_psu, power_sizing, psu_watt, module_power_w, headroom)
+    count = -(-np.asarray(total_modules, dtype=np.int64) // per_psu)
+    return int(count) if count.ndim == 0 else count
+
+
+@dataclass(frozen=True)
+class PowerPlan:
+    """psu_grid شماره پاور (از ۱) هر ماژول است؛ psu_modules تعداد ماژول هر پاور به ترتیب شماره.
+
+    sized_by_power یعنی تعداد ماژول هر پاور از توان حساب شده است (نه نسبت ثابت)؛ فقط
+    در این حالت بار پاورها از سقف headroom بیشتر نمی‌شود.
+    """
+    psu_grid: np.ndarray
+    psu_modules: np.ndarray
+    psu_watt: float
+    module_power_w: float
+    headroom: float
+    per_psu: int
+    sized_by_power: bool = False
+
+    @property
+    def psu_count(self):
+        return int(self.psu_modules.size)
+
+    @property
+    def psu_load_w(self):
+        return self.psu_modules * self.module_power_w
+
+    @property
+    def psu_load_fraction(self):
+        """بار هر پاور نسبت به توان نامی آن"""
+        return self.psu_load_w / self.psu_watt
+
+    @property
+    def total_power_w(self):
+        return float(self.psu_modules.sum() * self.module_power_w)
+
+    @property
+    def overloaded(self):
+        """شماره پاورهایی که بیش از سقف headroom بار دارند (فقط وقتی یک ماژول از سقف پرمصرف‌تر باشد)"""
+        return np.flatnonzero(self.psu_load_w > self.psu_watt * self.headroom + 1e-9) + 1
+
+
+def module_order(grid, mask=None):
+    """اندیس مسطح ماژول‌ها به ترتیب کارت، سطر و ستون مارپیچ؛ خانه‌های بیرون از mask حذف می‌شوند"""
+    grid = np.asarray(grid)
+    rows, cols = np.divmod(np.arange(grid.size), grid.shape[1])
+    serpentine = np.where(rows % 2 == 1, grid.shape[1] - 1 - cols, cols)
+    order = np.lexsort((serpentine, rows, grid.ravel()))
+    if mask is not None:
+        order = order[np.asarray(mask, dtype=bool).ravel()[order]]
+    return order
+
+
+def plan_power(
+    grid,
+    psu_watt=PSU_WATT,
+    module_power_w=MODULE_POWER_W,
+    headroom=PSU_HEADROOM,
+    group_by_card=False,
+    mask=None,
+    per_psu=None,
+    power_sizing=False
+):
+    """تخصیص ماژول‌ها به پاورها.
+
+    با group_by_card هر پاور فقط ماژول‌های یک کارت را تغذیه می‌کند (سیم‌کشی ساده‌تر،
+    ولی ممکن است پاور بیشتری لازم شود). بار پاورهای یک گروه حداکثر یک ماژول با هم
+    اختلاف دارد. خانه‌های بیرون از mask پاور نمی‌گیرند و در psu_grid ۰ هستند.
+    per_psu و power_sizing مانند psu_count_for_modules هستند.
+    """
+    grid = np.asarray(grid)
+    per = int(_per_psu(per_psu, power_sizing, psu_watt, module_power_w, headroom))
+    order = module_order(grid, mask)
+    n = order.size
+    rank = np.arange(n)
+
+    if group_by_card:
+        cards = grid.ravel()[order]
+        counts = np.bincount(cards)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        psus = -(-counts // per)
+        offsets = np.concatenate([[0], np.cumsum(psus)[:-1]])
+        local = (rank - starts[cards]) * psus[cards] // np.maximum(counts[cards], 1)
+        assigned = offsets[cards] + local
+        total = int(psus.sum())
+    else:
+        total = -(-n // per)
+        assigned = rank * total // max(n, 1)
+
+    psu_grid = np.zeros(grid.size, dtype=smallest_uint_dtype(total))
+    psu_grid[order] = assigned + 1
+    return PowerPlan(
+        psu_grid=psu_grid.reshape(grid.shape),
+        psu_modules=np.bincount(assigned, minlength=total),
+        psu_watt=psu_watt,
+        module_power_w=module_power_w,
+        headroom=headroom,
+        per_psu=per,
+        sized_by_power=bool(power_sizing)
+    )
@@ -0,0 +1,121 @@
+"""قیمت‌ها و محاسبه هزینه ویدئووال"""
+
+from dataclasses import dataclass
+
+from .catalog import load_catalog
+from .power import psu_count_for_modules
+
+
+@dataclass(frozen=True)
+class CostBreakdown:
+    """تفکیک هزینه‌ها به ریال"""
+    module: float
+    receiver: float
+    power: float
+    controller: float
+    structure: float
+    hdmi_cable: float
+    cable_magnet: float
+    psu_count: int
+    wall_area_m2_rounded: int
+    cable_count: int = 1
+    cable_length_m: float = 0.0
+
+    @property
+    def total(self):
+        return (self.module + self.receiver + self.power + self.controller
+                + self.structure + self.hdmi_cable + self.cable_magnet)
+
+
+def get_default_prices():
+    default_controller_prices = {}
+    default_controller_units = {}
+    for name in load_catalog().controllers:
+        default_controller_prices[name] = 100.0
+        default_controller_units[name] = "ریال"
+
+    return {
+        "module": 100.0,
+        "receiver_card": 200.0,
+        "power_supply_60w": 50.0,
+        "structure": 100.0,  # ✅ این الان قیمت هر متر مربع هست
+        "hdmi_cable": 100.0,
+        "cable_magnet": 100.0,
+        "module_unit": "ریال",
+        "receiver_unit": "ریال",
+        "power_unit": "ریال",
+        "structure_unit": "ریال",
+        "hdmi_cable_unit": "ریال",
+        "cable_magnet_unit": "ریال",
+        "controller_prices": default_controller_prices,
+        "controller_units": default_controller_units
+    }
+
+
+def convert_to_rial(price, unit, dollar_rate):
+    if unit == "دلار":
+        return price * dollar_rate
+    else:
+        return price
+
+
+def compute_costs(
+    total_modules,
+    cards_needed,
+    wall_width_cm,
+    wall_height_cm,
+    prices,
+    dollar_rate=0,
+    controller_name="",
+    cable_count=None,
+    cable_length_m=0.0,
+    psu_count=None,
+    area_fraction=1.0
+):
+    """محاسبه هزینه اقلام ویدئووال بر اساس قیمت‌ها و نرخ دلار.
+
+    cable_count تعداد کابل شبکه بین کارت‌ها (از videowall.routing)؛ اگر داده نشود
+    کابل و مگنت مثل قبل یک قلم حساب می‌شود. psu_count تعداد پاور برنامه برق
+    (videowall.power.plan_power) است و پیش‌فرض آن psu_count_for_modules است.
+    area_fraction سهم مساحت دیوار که سازه دارد (برای دیوار با بریدگی، نسبت ماژول‌های نصب‌شده).
+    """
+    if psu_count is None:
+        psu_count = psu_count_for_modules(total_modules)
+
+    module_cost = total_modules * convert_to_rial(prices["module"], prices["module_unit"], dollar_rate)
+    receiver_cost = cards_needed * convert_to_rial(prices["receiver_card"], prices["receiver_unit"], dollar_rate)
+    power_cost = psu_count * convert_to_rial(prices["power_supply_60w"], prices["power_unit"], dollar_rate)
+
+    controller_price = 0.0
+    controller_unit = "ریال"
+    if controller_name and controller_name in prices["controller_prices"]:
+        controller_price = prices["controller_prices"][controller_name]
+        controller_unit = prices["controller_units"].get(controller_name, "ریال")
+
+    controller_cost = convert_to_rial(controller_price, controller_unit, dollar_rate)
+
+    # ✅ اصلاح: ضرب قیمت سازه در مساحت گرد شده
+    wall_area_m2 = (wall_width_cm / 100) * (wall_height_cm / 100) * area_fraction
+    wall_area_m2_rounded = round(wall_area_m2)  # ✅ گرد کردن مساحت
+    structure_price_per_sqm = prices.get("structure", 100.0)
+    structure_unit = prices.get("structure_unit", "ریال")
+    structure_cost_per_sqm_rial = convert_to_rial(structure_price_per_sqm, structure_unit, dollar_rate)
+    structure_cost = structure_cost_per_sqm_rial * wall_area_m2_rounded  # ✅ ضرب در مساحت گرد شده
+
+    hdmi_cable_cost = convert_to_rial(prices["hdmi_cable"], prices["hdmi_cable_unit"], dollar_rate)
+    cable_count = 1 if cable_count is None else cable_count
+    cable_magnet_cost = cable_count * convert_to_rial(prices["cable_magnet"], prices["cable_magnet_unit"], dollar_rate)
+
+    return CostBreakdown(
+        module=module_cost,
+        receiver=receiver_cost,
+        power=power_cost,
+        controller=controller_cost,
+        structure=structure_cost,
+        hdmi_cable=hdmi_cable_cost,
+        cable_magnet=cable_magnet_cost,
+        psu_count=psu_count,
+        wall_area_m2_rounded=wall_area_m2_rounded,
+        cable_count=cable_count,
+        cable_length_m=cable_length_m
+    )
@@ -0,0 +1,92 @@
+"""اندازه‌گیری زمان و تعداد تخصیص حافظه مراحل هر اجرای اسکریپت.
+
+وقتی پروفایل فعال نیست، stage() فقط یک ContextVar را می‌خواند و یک context manager
+ثابت و خالی برمی‌گرداند، پس هزینه آن تقریباً صفر است.
+"""
+
+import contextlib
+import functools
+import json
+import sys
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+_current = ContextVar("videowall_profile", default=None)
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class RunProfile:
+    """رکورد مراحل یک اجرا؛ هر رکورد شامل نام، عمق، مدت و تغییر تعداد بلوک‌های حافظه است"""
+
+    def __init__(self, log_path=None, **meta):
+        self.log_path = log_path
+        self.meta = meta
+        self.records = []
+        self._depth = 0
+        self._started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        depth = self._depth
+        self._depth += 1
+        blocks_before = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.records.append({
+                "stage": name,
+                "depth": depth,
+                "seconds": time.perf_counter() - start,
+                "alloc_blocks": sys.getallocatedblocks() - blocks_before,
+            })
+            self._depth = depth
+
+    def finish(self):
+        """پایان اجرا؛ خلاصه را برمی‌گرداند و در صورت وجود log_path یک خط JSON اضافه می‌کند"""
+        summary = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "total_seconds": time.perf_counter() - self._started,
+            **self.meta,
+            "stages": self.records,
+        }
+        if self.log_path:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+        return summary
+
+
+def start_run(enabled, log_path=None, **meta):
+    """شروع پروفایل اجرای جاری (یا غیرفعال کردن آن)"""
+    profile = RunProfile(log_path=log_path, **meta) if enabled else None
+    _current.set(profile)
+    return profile
+
+
+def current_profile():
+    return _current.get()
+
+
+def stage(name):
+    """context manager اندازه‌گیری یک مرحله"""
+    profile = _current.get()
+    if profile is None:
+        return _NULL_STAGE
+    return profile.stage(name)
+
+
+def profiled(name=None):
+    """دکوراتور اندازه‌گیری یک تابع به‌عنوان یک مرحله"""
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None:
+                return func(*args, **kwargs)
+            with profile.stage(stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
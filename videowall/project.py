@@ -0,0 +1,255 @@
+"""پروژه چند دیواری: فهرست مواد و هزینه تجمیعی با محاسبه مجدد فقط برای دیوارهای تغییرکرده.
+
+نتیجه هر دیوار در دو لایه نگه داشته می‌شود: چیدمان و آمار (وابسته به ابعاد، ماژول،
+دات‌پیچ، بلوک و بریدگی‌ها) و هزینه (وابسته به چیدمان، کنترلر، قیمت‌ها و نرخ دلار).
+تغییر قیمت یا نرخ دلار فقط لایه هزینه را باطل می‌کند و هیچ چیدمانی دوباره حل نمی‌شود.
+"""
+
+from dataclasses import dataclass, fields, replace
+
+from .calc import mask_from_cutouts, videowall_calc
+from .catalog import load_catalog
+from .compact import compact_optimize_layout
+from .layout import clamp_block_shape
+from .pricing import CostBreakdown, compute_costs, get_default_prices
+from .stats import get_stats_from_grid
+
+
+@dataclass(frozen=True)
+class WallSpec:
+    """ورودی‌های یک دیوار؛ module شناسه کاتالوگ و pitch_option نام گزینه دات‌پیچ آن است
+    (None یعنی پیش‌فرض). controller خالی یعنی کوچک‌ترین کنترلر کافی."""
+    name: str
+    wall_width_cm: float
+    wall_height_cm: float
+    module: str = None
+    pitch_option: str = None
+    block_w: int = 2
+    block_h: int = 6
+    mode: str = "fast"
+    cutouts: tuple = ()
+    controller: str = ""
+
+    def layout_key(self):
+        """ورودی‌هایی که چیدمان به آن‌ها وابسته است (نام و کنترلر نه)"""
+        return tuple(getattr(self, f.name) for f in fields(self) if f.name not in ("name", "controller"))
+
+
+@dataclass(frozen=True)
+class WallLayout:
+    """نتیجه محاسبه و چیدمان یک دیوار"""
+    module: object
+    pitch: object
+    calc: object
+    mask: object
+    layout: object
+    stats: object
+
+    @property
+    def cards(self):
+        return self.stats.cards_used
+
+
+class Project:
+    """مجموعه دیوارهای یک پروژه با memo جداگانه چیدمان و هزینه برای هر دیوار.
+
+    cache اختیاری یک LayoutCache است تا دیوارهای هم‌هندسه (در این پروژه یا بین
+    نشست‌ها) یک بار حل شوند. solves تعداد حل‌های واقعی چیدمان را می‌شمارد.
+    """
+
+    def __init__(self, prices=None, dollar_rate=0, cache=None):
+        self.walls = {}
+        self.prices = dict(get_default_prices() if prices is None else prices)
+        self.dollar_rate = dollar_rate
+        self.cache = cache
+        self.solves = 0
+        self._price_version = 0
+        self._layouts = {}
+        self._costs = {}
+
+    def set_wall(self, spec):
+        """افزودن یا جایگزینی دیوار هم‌نام؛ memo فقط اگر ورودی‌های مربوط عوض شده باشند کنار می‌رود"""
+        self.walls[spec.name] = spec
+
+    def update_wall(self, name, **changes):
+        self.set_wall(replace(self.walls[name], **changes))
+
+    def remove_wall(self, name):
+        self.walls.pop(name, None)
+        self._layouts.pop(name, None)
+        self._costs.pop(name, None)
+
+    def set_walls(self, specs):
+        """همگام‌سازی با فهرست کامل دیوارها (مثلاً جدول رابط کاربری)؛ دیوارهای حذف‌شده کنار می‌روند"""
+        specs = list(specs)
+        names = {spec.name for spec in specs}
+        if len(names) != len(specs):
+            raise ValueError("wall names must be unique")
+        for name in [name for name in self.walls if name not in names]:
+            self.remove_wall(name)
+        self.walls = {spec.name: spec for spec in specs}
+
+    def set_prices(self, prices=None, dollar_rate=None):
+        """تغییر قیمت‌ها یا نرخ دلار؛ اگر چیزی عوض نشده باشد هزینه‌ها باطل نمی‌شوند"""
+        if prices is not None and prices != self.prices:
+            self.prices = dict(prices)
+            self._price_version += 1
+        if dollar_rate is not None:
+            self.dollar_rate = dollar_rate
+
+    def _solve(self, modules_x, modules_y, block_w, block_h, max_size, options):
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(modules_x, modules_y, block_w, block_h, max_size, **options)
+            layout = self.cache.get_compact(key)
+            if layout is not None:
+                return layout
+        layout = compact_optimize_layout(modules_x, modules_y, block_w, block_h, max_size, **options)
+        self.solves += 1
+        if self.cache is not None:
+            self.cache.put_compact(key, layout)
+        return layout
+
+    def wall_layout(self, name):
+        """محاسبه، چیدمان و آمار دیوار؛ فقط وقتی ورودی‌های چیدمان آن عوض شده باشند دوباره ساخته می‌شود.
+
+        دیوار کوچک‌تر از یک ماژول یا دیواری که بریدگی‌ها همه آن را بپوشانند ValueError می‌دهد.
+        """
+        spec = self.walls[name]
+        key = spec.layout_key()
+        memo = self._layouts.get(name)
+        if memo is not None and memo[0] == key:
+            return memo[1]
+
+        catalog = load_catalog()
+        module = catalog.module(spec.module)
+        pitch = module.pitch(spec.pitch_option) if spec.pitch_option else next(iter(module.pitches.values()))
+        calc = videowall_calc(
+            spec.wall_width_cm, spec.wall_height_cm, dot_pitch_mm=pitch.dot_pitch,
+            receiving_card_capacity_px=catalog.receiving_card_capacity_px, module=module
+        )
+        if calc.modules_x * calc.modules_y_round == 0:
+            raise ValueError("wall is smaller than one module")
+        mask = None
+        if spec.cutouts:
+            mask = mask_from_cutouts(calc.modules_x, calc.modules_y_round, spec.cutouts, module=module)
+            if mask.all():
+                mask = None
+            else:
+                calc = videowall_calc(
+                    spec.wall_width_cm, spec.wall_height_cm, dot_pitch_mm=pitch.dot_pitch,
+                    receiving_card_capacity_px=catalog.receiving_card_capacity_px, mask=mask, module=module
+                )
+                if calc.total_modules_round == 0:
+                    raise ValueError("cutouts cover the whole wall")
+
+        options = {"mode": spec.mode, "px_per_module": calc.px_per_module_total}
+        if mask is not None:
+            options["mask"] = mask
+        # چیدمان سریع سقف کارت را بررسی نمی‌کند؛ بلوک باید از ابتدا مجاز باشد
+        block_w, block_h = clamp_block_shape(
+            spec.block_w, spec.block_h, pitch.max_modules_per_card,
+            px_per_module=calc.px_per_module_total,
+            receiving_card_capacity_px=catalog.receiving_card_capacity_px
+        )
+        layout = self._solve(
+            calc.modules_x, calc.modules_y_round, block_w, block_h, pitch.max_modules_per_card, options
+        )
+        stats = get_stats_from_grid(
+            layout.grid(),
+            px_per_module=calc.px_per_module_total,
+            receiving_card_capacity_px=catalog.receiving_card_capacity_px,
+            mask=mask
+        )
+        result = WallLayout(module=module, pitch=pitch, calc=calc, mask=mask, layout=layout, stats=stats)
+        self._layouts[name] = (key, result)
+        self._costs.pop(name, None)
+        return result
+
+    def wall_controller(self, name):
+        """کنترلر دیوار: انتخاب کاربر یا کوچک‌ترین کنترلر کافی (رشته خالی اگر هیچ کدام کافی نباشد)"""
+        spec = self.walls[name]
+        if spec.controller:
+            return spec.controller
+        controller = load_catalog().smallest_controller(self.wall_layout(name).calc.total_pixels_round)
+        return controller.name if controller else ""
+
+    def wall_costs(self, name):
+        """هزینه دیوار؛ با تغییر قیمت‌ها یا نرخ دلار فقط همین دوباره حساب می‌شود.
+
+        هر کارت یک کابل شبکه ورودی دارد و تعداد پاور همان videowall_calc است.
+        """
+        wall = self.wall_layout(name)
+        controller = self.wall_controller(name)
+        # با ساخته شدن دوباره چیدمان، wall_layout هزینه memo شده را هم کنار می‌گذارد
+        key = (controller, self._price_version, self.dollar_rate)
+        memo = self._costs.get(name)
+        if memo is not None and memo[0] == key:
+            return memo[1]
+        calc = wall.calc
+        costs = compute_costs(
+            calc.total_modules_round,
+            wall.cards,
+            self.walls[name].wall_width_cm,
+            self.walls[name].wall_height_cm,
+            self.prices,
+            dollar_rate=self.dollar_rate,
+            controller_name=controller,
+            cable_count=wall.cards,
+            psu_count=calc.psu_count,
+            area_fraction=calc.total_modules_round / (calc.modules_x * calc.modules_y_round)
+        )
+        self._costs[name] = (key, costs)
+        return costs
+
+    def total_costs(self):
+        """جمع تفکیک هزینه همه دیوارها به‌صورت یک CostBreakdown"""
+        totals = {f.name: 0 for f in fields(CostBreakdown)}
+        for name in self.walls:
+            costs = self.wall_costs(name)
+            for key in totals:
+                totals[key] += getattr(costs, key)
+        return CostBreakdown(**totals)
+
+    def bom(self):
+        """فهرست مواد تجمیعی: دیکشنری (شرح قلم -> تعداد) به ترتیب نوع قلم"""
+        modules, psus, controllers = {}, {}, {}
+        cards = cables = area = 0
+        for name in self.walls:
+            wall = self.wall_layout(name)
+            costs = self.wall_costs(name)
+            label = f"{wall.module.name} - {wall.pitch.name}"
+            modules[label] = modules.get(label, 0) + wall.calc.total_modules_round
+            psu_label = f"پاور {wall.module.psu_watt:g} وات"
+            psus[psu_label] = psus.get(psu_label, 0) + costs.psu_count
+            controller = self.wall_controller(name) or "بدون کنترلر مناسب"
+            controllers[controller] = controllers.get(controller, 0) + 1
+            cards += wall.cards
+            cables += costs.cable_count
+            area += costs.wall_area_m2_rounded
+
+        bom = dict(modules)
+        bom["کارت گیرنده"] = cards
+        bom.update(psus)
+        bom.update({f"کنترلر {name}": count for name, count in controllers.items()})
+        bom["کابل شبکه"] = cables
+        bom["کابل HDMI"] = len(self.walls)
+        bom["سازه (متر مربع)"] = area
+        return bom
+
+    def summary_rows(self):
+        """یک ردیف خلاصه برای هر دیوار (برای جدول یا خروجی)"""
+        rows = []
+        for name in self.walls:
+            wall = self.wall_layout(name)
+            rows.append({
+                "name": name,
+                "module": wall.module.id,
+                "pitch": wall.pitch.name,
+                "modules": wall.calc.total_modules_round,
+                "resolution": wall.calc.total_pixels_round,
+                "cards": wall.cards,
+                "controller": self.wall_controller(name),
+                "total_cost": self.wall_costs(name).total,
+            })
+        return rows
@@ -0,0 +1,119 @@
+"""تصویر رستری چیدمان (فقط با NumPy) که می‌تواند کاشی‌به‌کاشی به‌روز شود"""
+
+import numpy as np
+
+COLORS = [
+    '#2E86AB', '#A23B72', '#F18F01', '#C73E1D', '#6A994E',
+    '#BC4749', '#2A9D8F', '#E76F51', '#F4A261', '#E9C46A',
+    '#264653', '#6B5B95', '#88498F', '#C8B8DB', '#E5989B',
+    '#D4A5A5', '#9A8C98', '#C9ADA7', '#9A8B7A', '#B4A582',
+    '#FFB703', '#FB8500', '#8ECAE6', '#219EBC', '#023047',
+    '#FFB703', '#FB8500', '#37B7C3', '#048A81', '#54B3B0',
+    '#FFC857', '#E5323B', '#42A4BF', '#1D7874', '#14919B'
+]
+
+BORDER_COLOR = '#333333'
+EMPTY_COLOR = '#EEEEEE'
+CARD_ALPHA = 0.85
+
+# ابعاد هر ماژول در مختصات رسم (نسبت ۳۲۰×۱۶۰ میلی‌متر)
+MODULE_W = 32
+MODULE_H = 16
+
+# بیشترین عرض تصویر خروجی (پیکسل)
+MAX_OUTPUT_PX = 2400
+
+
+def _hex_to_rgba(color, alpha=1.0):
+    return [int(color[i:i + 2], 16) for i in (1, 3, 5)] + [round(alpha * 255)]
+
+
+# RGBA هشت‌بیتی تا تصویرهای بزرگ حافظه کمی بگیرند
+PALETTE = np.array([_hex_to_rgba(color, CARD_ALPHA) for color in COLORS], dtype=np.uint8)
+BORDER_RGBA = np.array(_hex_to_rgba(BORDER_COLOR), dtype=np.uint8)
+EMPTY_RGBA = np.array(_hex_to_rgba(EMPTY_COLOR), dtype=np.uint8)
+# خانه‌های بیرون از mask (بریدگی دیوار) شفاف هستند
+HOLE_RGBA = np.zeros(4, dtype=np.uint8)
+
+
+def card_colors_rgba(grid):
+    """تبدیل گرید شماره کارت به آرایه RGBA با پالت رنگی چیدمان؛ خانه‌های ۰ (خالی) خاکستری روشن‌اند"""
+    grid = np.asarray(grid, dtype=np.int64)
+    rgba = PALETTE[(grid - 1) % len(COLORS)]
+    rgba[grid == 0] = EMPTY_RGBA
+    return rgba
+
+
+def raster_cell_px(modules_x):
+    """ارتفاع هر کاشی ماژول در تصویر رستری، طوری که عرض تصویر از MAX_OUTPUT_PX بیشتر نشود"""
+    return int(np.clip(MAX_OUTPUT_PX // (2 * modules_x), 2, 8))
+
+
+class TileRaster:
+    """تصویر بزرگ‌شده گرید؛ هر ماژول یک کاشی cell_px × 2·cell_px است و مرز کارت‌ها تیره می‌شود.
+
+    update(row, col) فقط کاشی همان ماژول و مرز همسایه‌های بالا و چپ آن را دوباره
+    رنگ می‌کند، پس هر ویرایش O(1) است. خانه‌های بیرون از mask شفاف می‌مانند.
+    """
+
+    def __init__(self, grid, cell_px, mask=None):
+        self.grid = grid
+        self.mask = mask
+        self.cell_h = cell_px
+        self.cell_w = 2 * cell_px
+        self.image = np.empty((grid.shape[0] * self.cell_h, grid.shape[1] * self.cell_w, 4), dtype=np.uint8)
+        self._paint_region(0, grid.shape[0], 0, grid.shape[1])
+
+    def _paint_region(self, row0, row1, col0, col1):
+        """رنگ‌آمیزی برداری کاشی‌های سطرهای row0..row1 و ستون‌های col0..col1 (نیم‌باز)"""
+        grid = self.grid
+        sub = grid[row0:row1, col0:col1]
+        image = self.image[row0 * self.cell_h:row1 * self.cell_h, col0 * self.cell_w:col1 * self.cell_w]
+        colors = card_colors_rgba(sub)
+        if self.mask is not None:
+            colors[~self.mask[row0:row1, col0:col1]] = HOLE_RGBA
+        image[:] = np.repeat(np.repeat(colors, self.cell_h, axis=0), self.cell_w, axis=1)
+
+        # مرز راست و پایین هر کاشی با همسایه‌اش (حتی اگر همسایه بیرون از ناحیه باشد)
+        right = np.zeros(sub.shape, dtype=bool)
+        right_end = min(col1 + 1, grid.shape[1])
+        right[:, :right_end - col0 - 1] = grid[row0:row1, col0 + 1:right_end] != grid[row0:row1, col0:right_end - 1]
+        below = np.zeros(sub.shape, dtype=bool)
+        below_end = min(row1 + 1, grid.shape[0])
+        below[:below_end - row0 - 1, :] = grid[row0 + 1:below_end, col0:col1] != grid[row0:below_end - 1, col0:col1]
+        ys, xs = np.nonzero(right)
+        image[
+            (ys[:, None] * self.cell_h + np.arange(self.cell_h)).ravel(),
+            np.repeat(xs * self.cell_w + self.cell_w - 1, self.cell_h)
+        ] = BORDER_RGBA
+        ys, xs = np.nonzero(below)
+        image[
+            np.repeat(ys * self.cell_h + self.cell_h - 1, self.cell_w),
+            (xs[:, None] * self.cell_w + np.arange(self.cell_w)).ravel()
+        ] = BORDER_RGBA
+
+    def _paint(self, row, col):
+        grid = self.grid
+        top, left = row * self.cell_h, col * self.cell_w
+        tile = self.image[top:top + self.cell_h, left:left + self.cell_w]
+        card = int(grid[row, col])
+        if card:
+            tile[:] = PALETTE[(card - 1) % len(COLORS)]
+        else:
+            tile[:] = EMPTY_RGBA if self.mask is None or self.mask[row, col] else HOLE_RGBA
+        if col + 1 < grid.shape[1] and grid[row, col + 1] != grid[row, col]:
+            tile[:, -1] = BORDER_RGBA
+        if row + 1 < grid.shape[0] and grid[row + 1, col] != grid[row, col]:
+            tile[-1, :] = BORDER_RGBA
+
+    def update_region(self, row0, row1, col0, col1):
+        """بازسازی یک ناحیه مستطیلی پس از ویرایش گروهی، به‌اضافه مرز سطر بالا و ستون چپ آن"""
+        self._paint_region(max(0, row0 - 1), row1, max(0, col0 - 1), col1)
+
+    def update(self, row, col):
+        """بازسازی کاشی (row, col) پس از تغییر گرید"""
+        self._paint(row, col)
+        if col > 0:
+            self._paint(row, col - 1)
+        if row > 0:
+            self._paint(row - 1, col)
@@ -0,0 +1,123 @@
+"""رسم چیدمان ماژول‌ها با matplotlib"""
+
+import matplotlib.pyplot as plt
+import matplotlib.patches as patches
+import numpy as np
+from matplotlib.figure import Figure
+
+from .raster import COLORS, MAX_OUTPUT_PX, MODULE_H, MODULE_W, TileRaster, raster_cell_px
+
+# بیشترین تعداد ماژولی که در حالت سریع برچسب شماره کارت می‌گیرند
+MAX_LABELED_MODULES = 400
+MAX_FIGSIZE_IN = (24, 16)
+
+
+def _figure_size(modules_x, modules_y):
+    width, height = modules_x * 0.6, modules_y * 0.4
+    scale = min(1.0, MAX_FIGSIZE_IN[0] / width, MAX_FIGSIZE_IN[1] / height)
+    return max(width * scale, 2.0), max(height * scale, 1.5)
+
+
+def _tick_step(count, length_in, labels_per_inch=3):
+    """فاصله برچسب‌های شماره سطر و ستون تا روی هم نیفتند"""
+    return max(1, -(-count // max(1, int(length_in * labels_per_inch))))
+
+
+def draw_module_layout(modules_x, modules_y, blocks, grid, renderer="fast", raster=None, mask=None):
+    """رسم چیدمان؛ renderer="fast" تصویر رستری و renderer="detailed" یک مستطیل برای هر ماژول.
+
+    در حالت سریع می‌توان یک TileRaster آماده (مثلاً از LayoutEditor) داد تا تصویر
+    دوباره ساخته نشود. خانه‌های بیرون از mask رسم نمی‌شوند.
+    """
+    if renderer == "detailed":
+        return draw_module_layout_detailed(modules_x, modules_y, blocks, grid, mask=mask)
+    if renderer != "fast":
+        raise ValueError(f"unknown renderer: {renderer!r}")
+
+    figsize = _figure_size(modules_x, modules_y)
+    fig = Figure(figsize=figsize, dpi=min(100, MAX_OUTPUT_PX / max(figsize)))
+    ax = fig.subplots()
+
+    width, height = modules_x * MODULE_W, modules_y * MODULE_H
+    if raster is None:
+        raster = TileRaster(grid, raster_cell_px(modules_x), mask=mask)
+    ax.imshow(
+        raster.image,
+        extent=(0, width, 0, height),
+        interpolation='nearest',
+        origin='upper'
+    )
+
+    small = modules_x * modules_y <= MAX_LABELED_MODULES
+    if small:
+        ax.vlines(np.arange(modules_x + 1) * MODULE_W, 0, height, colors='#333333', linewidth=1.5)
+        ax.hlines(np.arange(modules_y + 1) * MODULE_H, 0, width, colors='#333333', linewidth=1.5)
+        for y in range(modules_y):
+            for x in range(modules_x):
+                if mask is not None and not mask[y, x]:
+                    continue
+                ax.text(
+                    x * MODULE_W + MODULE_W / 2, (modules_y - 1 - y) * MODULE_H + MODULE_H / 2,
+                    str(grid[y, x]),
+                    ha='center', va='center',
+                    fontsize=8, fontweight='bold', color='white'
+                )
+    else:
+        ax.add_patch(patches.Rectangle((0, 0), width, height, fill=False, edgecolor='#333333', linewidth=1.0))
+
+    step_x = _tick_step(modules_x, figsize[0])
+    for i in range(0, modules_x, step_x):
+        ax.text(i * MODULE_W + MODULE_W / 2, -5, str(i + 1), ha='center', va='top', fontsize=9, color='#555555', fontweight='bold')
+    step_y = _tick_step(modules_y, figsize[1])
+    for j in range(0, modules_y, step_y):
+        ax.text(-5, (modules_y - 1 - j) * MODULE_H + MODULE_H / 2, str(j + 1), ha='right', va='center', fontsize=9, color='#555555', fontweight='bold')
+
+    ax.set_xlim(-10, width)
+    ax.set_ylim(-10, height)
+    ax.set_title(f'{modules_x} × {modules_y} ', fontsize=14, fontweight='bold', pad=15)
+    ax.set_aspect('equal')
+    ax.axis('off')
+    fig.subplots_adjust(left=0.04, right=0.99, bottom=0.05, top=0.9)
+    return fig
+
+
+def draw_module_layout_detailed(modules_x, modules_y, blocks, grid, mask=None):
+    fig, ax = plt.subplots(figsize=(modules_x * 0.6, modules_y * 0.4))
+
+    colors = COLORS
+
+    for y in range(modules_y):
+        for x in range(modules_x):
+            if mask is not None and not mask[y, x]:
+                continue
+            # int: با dtype بدون علامت، card_id - 1 برای کارت ۰ سرریز می‌کند
+            card_id = int(grid[y, x])
+            color = colors[(card_id - 1) % len(colors)]
+            rect = patches.Rectangle(
+                (x * 32, (modules_y - 1 - y) * 16),
+                32, 16,
+                linewidth=1.5,
+                edgecolor='#333333',
+                facecolor=color,
+                alpha=0.85
+            )
+            ax.add_patch(rect)
+            ax.text(
+                x * 32 + 16, (modules_y - 1 - y) * 16 + 8,
+                str(card_id),
+                ha='center', va='center',
+                fontsize=8, fontweight='bold', color='white'
+            )
+
+    for i in range(modules_x):
+        ax.text(i * 32 + 16, -5, str(i + 1), ha='center', va='top', fontsize=9, color='#555555', fontweight='bold')
+    for j in range(modules_y):
+        ax.text(-5, (modules_y - 1 - j) * 16 + 8, str(j + 1), ha='right', va='center', fontsize=9, color='#555555', fontweight='bold')
+
+    ax.set_xlim(-10, modules_x * 32)
+    ax.set_ylim(-10, modules_y * 16)
+    ax.set_title(f'{modules_x} × {modules_y} ', fontsize=14, fontweight='bold', pad=15)
+    ax.set_aspect('equal')
+    ax.axis('off')
+    plt.tight_layout()
+    return fig
@@ -0,0 +1,212 @@
+"""مسیر کابل شبکه بین کارت‌های گیرنده (زنجیره daisy-chain) و تقسیم آن بین پورت‌های کنترلر.
+
+مسیر اولیه مارپیچ (ردیف‌به‌ردیف با جهت متناوب) است و تا پایان بودجه زمانی با 2-opt و
+Or-opt روی ماتریس فاصله NumPy کوتاه‌تر می‌شود. فاصله‌ها منهتنی و به میلی‌متر هستند،
+چون کابل روی سازه افقی و عمودی کشیده می‌شود.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .catalog import module_size_mm
+
+# ظرفیت هر پورت گیگابیتی کنترلر (پیکسل)
+PORT_CAPACITY_PX = 650_000
+# طول اضافه هر کابل برای اتصال و خم (متر)
+CABLE_SLACK_M = 0.3
+# بیش از این تعداد کارت ماتریس فاصله ساخته نمی‌شود و همان مسیر مارپیچ برمی‌گردد
+MAX_OPTIMIZED_CARDS = 2000
+
+
+@dataclass(frozen=True)
+class CableRoute:
+    """ترتیب کارت‌ها در زنجیره، گروه‌بندی پورت‌ها و طول کابل‌ها"""
+    order: np.ndarray
+    ports: tuple
+    port_pixels: tuple
+    cable_lengths_m: np.ndarray
+    baseline_length_m: float
+    elapsed_s: float
+
+    @property
+    def cable_count(self):
+        """یک کابل ورودی برای هر کارت (از کارت قبلی یا مستقیم از کنترلر)"""
+        return int(self.cable_lengths_m.size)
+
+    @property
+    def total_length_m(self):
+        return float(self.cable_lengths_m.sum())
+
+
+def card_centroids(grid, px_per_module=None, module=None):
+    """(شماره کارت‌ها، مرکز هر کارت به میلی‌متر (n, 2)، پیکسل هر کارت) از روی گرید"""
+    width_mm, height_mm = module_size_mm(module)
+    grid = np.asarray(grid)
+    flat = grid.ravel()
+    rows, cols = np.divmod(np.arange(flat.size), grid.shape[1])
+    counts = np.bincount(flat)
+    cards = np.flatnonzero(counts[1:]) + 1
+    n = counts[cards]
+    cx = (np.bincount(flat, weights=cols)[cards] / n + 0.5) * width_mm
+    cy = (np.bincount(flat, weights=rows)[cards] / n + 0.5) * height_mm
+    pixels = n * px_per_module if px_per_module else np.zeros_like(n)
+    return cards, np.column_stack([cx, cy]), pixels
+
+
+def serpentine_order(points, band_mm, origin):
+    """ترتیب مارپیچ: نوارهای افقی به ارتفاع band_mm از نوار نزدیک به origin، با جهت متناوب"""
+    band = np.floor(points[:, 1] / band_mm).astype(np.int64)
+    # نوار نزدیک به کنترلر اول پیمایش می‌شود
+    if abs(origin[1] - points[:, 1].max()) < abs(origin[1] - points[:, 1].min()):
+        band = band.max() - band
+    bands = np.unique(band, return_inverse=True)[1]
+    flip = bands % 2 == 1
+    # در هر نوار از سمت کنترلر شروع می‌شود
+    x = points[:, 0] if origin[0] <= points[:, 0].mean() else -points[:, 0]
+    return np.lexsort((np.where(flip, -x, x), bands))
+
+
+def _distances(points):
+    return np.abs(points[:, None, 0] - points[None, :, 0]) + np.abs(points[:, None, 1] - points[None, :, 1])
+
+
+def _two_opt(path, dist, deadline):
+    """بهترین معکوس‌سازی بخش در هر گام تا بهبودی نماند؛ path[0] (کنترلر) ثابت است"""
+    m = path.size
+    while m > 3 and time.perf_counter() < deadline:
+        p = dist[np.ix_(path, path)]
+        edge = np.append(np.diagonal(p, 1), 0.0)
+        # معکوس کردن path[i..j]: یال (i-1, i) و (j, j+1) با (i-1, j) و (i, j+1) عوض می‌شود
+        after = np.zeros((m - 1, m - 1))
+        after[:, :-1] = p[1:, 2:]
+        gain = edge[:-1][:, None] + edge[1:][None, :] - p[:-1, 1:] - after
+        gain = np.triu(gain, k=1)
+        best = int(np.argmax(gain))
+        i, j = divmod(best, m - 1)
+        if gain[i, j] <= 1e-9:
+            break
+        path[i + 1:j + 2] = path[i + 1:j + 2][::-1].copy()
+    return path
+
+
+def _or_opt(path, dist, deadline):
+    """جابه‌جایی بخش‌های ۱ تا ۳ کارتی به بهترین جای دیگر مسیر (با یا بدون برعکس شدن)"""
+    improved = False
+    for length in (1, 2, 3):
+        i = 1
+        while i + length <= path.size:
+            if time.perf_counter() >= deadline:
+                return path, improved
+            seg = path[i:i + length]
+            head, tail = seg[0], seg[-1]
+            prev = path[i - 1]
+            rest = np.concatenate([path[:i], path[i + length:]])
+            removed = dist[prev, head]
+            if i + length < path.size:
+                nxt = path[i + length]
+                removed += dist[tail, nxt] - dist[prev, nxt]
+
+            # درج بین rest[k] و rest[k+1]؛ k = آخر یعنی اضافه شدن به انتهای زنجیره
+            a, b = rest, np.append(rest[1:], -1)
+            open_end = b < 0
+            b = np.where(open_end, 0, b)
+            base = np.where(open_end, 0.0, dist[a, b])
+            forward = dist[a, head] + np.where(open_end, 0.0, dist[tail, b]) - base
+            backward = dist[a, tail] + np.where(open_end, 0.0, dist[head, b]) - base
+            cost = np.minimum(forward, backward)
+            cost[i - 1] = np.inf  # جای فعلی
+            k = int(np.argmin(cost))
+            if removed - cost[k] > 1e-9:
+                segment = seg if forward[k] <= backward[k] else seg[::-1]
+                path = np.concatenate([rest[:k + 1], segment, rest[k + 1:]])
+                improved = True
+            else:
+                i += 1
+    return path, improved
+
+
+def split_ports(order, pixels, port_capacity_px=PORT_CAPACITY_PX):
+    """تقسیم زنجیره به پورت‌ها به ترتیب مسیر، بدون رد شدن از ظرفیت پیکسلی هر پورت"""
+    ports, port_pixels = [], []
+    current, load = [], 0
+    for index, px in zip(order.tolist(), pixels[order].tolist()):
+        if current and load + px > port_capacity_px:
+            ports.append(current)
+            port_pixels.append(load)
+            current, load = [], 0
+        current.append(index)
+        load += px
+    if current:
+        ports.append(current)
+        port_pixels.append(load)
+    return ports, port_pixels
+
+
+def _cable_plan(nodes, order, pixels, port_capacity_px):
+    """(پورت‌ها، پیکسل هر پورت، طول هر کابل به میلی‌متر)؛ هر پورت با کابلی مستقیم از کنترلر شروع می‌شود"""
+    ports, port_pixels = split_ports(order, pixels, port_capacity_px)
+    lengths = np.concatenate([
+        np.abs(np.diff(nodes[np.concatenate([[0], np.asarray(port) + 1])], axis=0)).sum(axis=1)
+        for port in ports
+    ])
+    return [np.asarray(port) for port in ports], port_pixels, lengths
+
+
+def route_cards(
+    grid,
+    px_per_module=None,
+    port_capacity_px=PORT_CAPACITY_PX,
+    origin_mm=None,
+    time_budget_s=0.5,
+    slack_m=CABLE_SLACK_M,
+    module=None
+):
+    """مسیر زنجیره کارت‌ها؛ origin_mm محل کنترلر (پیش‌فرض گوشه پایین چپ دیوار) و module نوع ماژول کاتالوگ"""
+    start = time.perf_counter()
+    grid = np.asarray(grid)
+    height_mm = module_size_mm(module)[1]
+    if origin_mm is None:
+        origin_mm = (0.0, grid.shape[0] * height_mm)
+    cards, points, pixels = card_centroids(grid, px_per_module, module)
+    if cards.size == 0:
+        return CableRoute(cards, (), (), np.zeros(0), 0.0, 0.0)
+
+    # ارتفاع نوار مارپیچ: میانه ارتفاع کارت‌ها
+    flat = grid.ravel()
+    rows = np.repeat(np.arange(grid.shape[0]), grid.shape[1])
+    top = np.full(flat.max() + 1, grid.shape[0])
+    bottom = np.zeros(flat.max() + 1, dtype=np.int64)
+    np.minimum.at(top, flat, rows)
+    np.maximum.at(bottom, flat, rows)
+    band_mm = float(np.median(bottom[cards] - top[cards] + 1)) * height_mm
+
+    nodes = np.vstack([np.asarray(origin_mm, dtype=float), points])
+    baseline = serpentine_order(points, band_mm, origin_mm)
+    ports, port_pixels, lengths = _cable_plan(nodes, baseline, pixels, port_capacity_px)
+    baseline_length = lengths.sum()
+
+    if cards.size <= MAX_OPTIMIZED_CARDS:
+        dist = _distances(nodes)
+        deadline = start + time_budget_s
+        path = np.concatenate([[0], baseline + 1])
+        while time.perf_counter() < deadline:
+            path = _two_opt(path, dist, deadline)
+            path, improved = _or_opt(path, dist, deadline)
+            if not improved:
+                break
+        # بهینه‌سازی روی یک زنجیره است؛ اگر پس از تقسیم پورت‌ها کوتاه‌تر نشد، مارپیچ می‌ماند
+        candidate = _cable_plan(nodes, path[1:] - 1, pixels, port_capacity_px)
+        if candidate[2].sum() < lengths.sum():
+            ports, port_pixels, lengths = candidate
+    order = np.concatenate(ports)
+
+    return CableRoute(
+        order=cards[order],
+        ports=tuple(tuple(cards[port].tolist()) for port in ports),
+        port_pixels=tuple(port_pixels),
+        cable_lengths_m=lengths / 1000 + slack_m,
+        baseline_length_m=float(baseline_length) / 1000 + slack_m * cards.size,
+        elapsed_s=time.perf_counter() - start
+    )
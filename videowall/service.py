@@ -0,0 +1,472 @@
+"""سرویس HTTP محلی برای استعلام قیمت بدون رابط Streamlit.
+
+endpointها JSON می‌گیرند و JSON برمی‌گردانند:
+
+    POST /calc    ابعاد، رزولوشن و تجهیزات دیوار (videowall_calc)
+    POST /layout  چیدمان کارت‌ها به‌صورت بلوک‌های (x, y, w, h, card)
+    POST /stats   آمار کارت‌های چیدمان
+    POST /quote   محاسبه، تعداد کارت و تفکیک هزینه
+    GET  /health  وضعیت سرویس، کش و کارهای در حال اجرا
+
+حل چیدمان روی یک ProcessPoolExecutor با تعداد کارگر محدود انجام می‌شود. درخواست‌های
+یکسانی که هم‌زمان می‌رسند به یک حل مشترک وصل می‌شوند و نتیجه در LayoutCache می‌ماند،
+پس درخواست‌های تکراری فقط از کش خوانده می‌شوند. اجرا:
+
+    python -m videowall.service --port 8502
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields, is_dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from .cache import LayoutCache
+from .calc import mask_from_cutouts, videowall_calc
+from .catalog import load_catalog
+from .compact import compact_optimize_layout
+from .pricing import compute_costs, get_default_prices
+from .layout import _max_modules_per_card, clamp_block_shape
+from .stats import get_stats_from_grid
+
+LAYOUT_MODES = ("fast", "min_cards")
+# حداکثر اندازه بدنه درخواست (بایت)
+MAX_BODY_BYTES = 1 << 20
+# سقف هر بعد دیوار (سانتی‌متر) و تعداد ماژول یک درخواست
+MAX_WALL_CM = 10_000
+MAX_WALL_MODULES = 100_000
+CURRENCY_UNITS = ("ریال", "دلار")
+
+
+class ServiceBusy(Exception):
+    """صف حل چیدمان پر است؛ با کد 503 پاسخ داده می‌شود"""
+
+
+def _json_default(value):
+    """dataclass، آرایه و اسکالرهای NumPy برای json.dumps (بقیه انواع را خود json می‌شناسد)"""
+    if is_dataclass(value):
+        return {f.name: getattr(value, f.name) for f in fields(value)}
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _number(body, name, default=None, kind=float):
+    value = body.get(name, default)
+    if value is None:
+        raise ValueError(f"missing required field {name!r}")
+    try:
+        value = kind(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"field {name!r} must be a number") from None
+    if not math.isfinite(value):
+        raise ValueError(f"field {name!r} must be a finite number")
+    return value
+
+
+def parse_wall(body):
+    """ورودی دیوار از بدنه درخواست: ابعاد، نوع ماژول، دات‌پیچ، بریدگی‌ها و تنظیمات چیدمان.
+
+    دات‌پیچ با pitch_option (نام گزینه کاتالوگ) یا dot_pitch_mm داده می‌شود؛ اگر فقط
+    dot_pitch_mm باشد سقف ماژول هر کارت از اولین گزینه هم‌دات‌پیچ کاتالوگ یا
+    max_modules_per_card خوانده می‌شود.
+    """
+    if not isinstance(body, dict):
+        raise ValueError("request body must be a JSON object")
+    module = load_catalog().module(body.get("module"))
+    width = _number(body, "wall_width_cm")
+    height = _number(body, "wall_height_cm")
+    if width <= 0 or height <= 0:
+        raise ValueError("wall dimensions must be positive")
+    if width > MAX_WALL_CM or height > MAX_WALL_CM:
+        raise ValueError(f"wall dimensions must be at most {MAX_WALL_CM} cm")
+
+    option = None
+    if "pitch_option" in body:
+        option = module.pitch(body["pitch_option"])
+    elif "dot_pitch_mm" in body:
+        dot_pitch = _number(body, "dot_pitch_mm")
+        option = next((p for p in module.pitches.values() if p.dot_pitch == dot_pitch), None)
+    else:
+        option = next(iter(module.pitches.values()))
+    dot_pitch = option.dot_pitch if option is not None else _number(body, "dot_pitch_mm")
+    if dot_pitch <= 0:
+        raise ValueError("dot_pitch_mm must be positive")
+    max_modules_per_card = _number(
+        body, "max_modules_per_card", None if option is None else option.max_modules_per_card, int
+    )
+
+    mode = body.get("mode", "fast")
+    if mode not in LAYOUT_MODES:
+        raise ValueError(f"mode must be one of {', '.join(LAYOUT_MODES)}")
+    # بلوک داده‌نشده پس از محاسبه ابعاد (در QuoteService.wall) با شکل مجاز ۲×۶ پر می‌شود
+    block_w = _number(body, "block_w", kind=int) if "block_w" in body else None
+    block_h = _number(body, "block_h", kind=int) if "block_h" in body else None
+    if any(value is not None and value < 1 for value in (block_w, block_h)) or max_modules_per_card < 1:
+        raise ValueError("block_w, block_h and max_modules_per_card must be at least 1")
+
+    cutouts = body.get("cutouts") or ()
+    try:
+        cutouts = tuple(tuple(float(v) for v in c) for c in cutouts)
+    except (TypeError, ValueError):
+        raise ValueError("cutouts must be a list of [x, y, width, height] in cm") from None
+    if any(len(c) != 4 for c in cutouts):
+        raise ValueError("cutouts must be a list of [x, y, width, height] in cm")
+
+    return {
+        "module": module,
+        "wall_width_cm": width,
+        "wall_height_cm": height,
+        "dot_pitch_mm": dot_pitch,
+        "max_modules_per_card": max_modules_per_card,
+        "mode": mode,
+        "block_w": block_w,
+        "block_h": block_h,
+        "cutouts": cutouts,
+    }
+
+
+def _price_value(name, value, unit):
+    if unit:
+        if value not in CURRENCY_UNITS:
+            raise ValueError(f"{name} must be one of {', '.join(CURRENCY_UNITS)}")
+        return value
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0:
+        raise ValueError(f"price {name} must be a non-negative number")
+    return float(value)
+
+
+def parse_prices(body):
+    """قیمت‌های پیش‌فرض با جایگزینی prices بدنه درخواست.
+
+    قیمت‌ها عدد نامنفی و واحدها ریال یا دلار هستند؛ controller_prices و controller_units
+    با قیمت کنترلرهای پیش‌فرض ادغام می‌شوند.
+    """
+    prices = get_default_prices()
+    overrides = body.get("prices") or {}
+    if not isinstance(overrides, dict):
+        raise ValueError("prices must be a JSON object")
+    for name, value in overrides.items():
+        if name not in prices:
+            raise ValueError(f"unknown price {name!r}")
+        if isinstance(prices[name], dict):
+            if not isinstance(value, dict):
+                raise ValueError(f"{name} must be a JSON object")
+            unit = name == "controller_units"
+            prices[name] = {**prices[name], **{
+                key: _price_value(f"{name}[{key!r}]", item, unit) for key, item in value.items()
+            }}
+        else:
+            prices[name] = _price_value(name, value, name.endswith("_unit"))
+    return prices
+
+
+def _solve(modules_x, modules_y, block_w, block_h, max_size, options):
+    """حل چیدمان در پروسه کارگر؛ خروجی فشرده است تا انتقال بین پروسه‌ها سبک بماند"""
+    return compact_optimize_layout(modules_x, modules_y, block_w, block_h, max_size, **options)
+
+
+class QuoteService:
+    """منطق endpointها، جدا از HTTP تا مستقیماً هم قابل فراخوانی باشد.
+
+    max_pending سقف حل‌های متمایز در صف یا در حال اجراست؛ بیش از آن ServiceBusy.
+    """
+
+    def __init__(self, max_workers=None, max_pending=64, cache=None, executor=None):
+        self.cache = cache if cache is not None else LayoutCache()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._own_executor = executor is None
+        # spawn: پروسه‌های کارگر از سرور چندنخی fork نمی‌شوند
+        self._executor = executor if executor is not None else ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._inflight = {}
+        # RLock: اگر حل پیش از add_done_callback تمام شود، _finish همان‌جا در نخ قفل‌دار اجرا می‌شود
+        self._lock = threading.RLock()
+        self.coalesced = 0
+        self.solved = 0
+
+    def wall(self, body):
+        """(ورودی تجزیه‌شده، نتیجه videowall_calc، mask یا None)"""
+        wall = parse_wall(body)
+        calc = videowall_calc(
+            wall["wall_width_cm"], wall["wall_height_cm"],
+            dot_pitch_mm=wall["dot_pitch_mm"],
+            receiving_card_capacity_px=load_catalog().receiving_card_capacity_px,
+            module=wall["module"]
+        )
+        wall_modules = calc.modules_x * calc.modules_y_round
+        if wall_modules == 0:
+            raise ValueError("wall is smaller than one module")
+        if wall_modules > MAX_WALL_MODULES:
+            raise ValueError(f"wall must have at most {MAX_WALL_MODULES} modules")
+        mask = None
+        if wall["cutouts"]:
+            mask = mask_from_cutouts(calc.modules_x, calc.modules_y_round, wall["cutouts"], module=wall["module"])
+            if mask.all():
+                mask = None
+            else:
+                calc = videowall_calc(
+                    wall["wall_width_cm"], wall["wall_height_cm"],
+                    dot_pitch_mm=wall["dot_pitch_mm"],
+                    receiving_card_capacity_px=load_catalog().receiving_card_capacity_px,
+                    mask=mask,
+                    module=wall["module"]
+                )
+                if calc.total_modules_round == 0:
+                    raise ValueError("cutouts cover the whole wall")
+
+        capacity = load_catalog().receiving_card_capacity_px
+        if wall["block_w"] is None or wall["block_h"] is None:
+            wall["block_w"], wall["block_h"] = clamp_block_shape(
+                2 if wall["block_w"] is None else wall["block_w"],
+                6 if wall["block_h"] is None else wall["block_h"],
+                wall["max_modules_per_card"],
+                px_per_module=calc.px_per_module_total, receiving_card_capacity_px=capacity
+            )
+        # چیدمان سریع سقف کارت را بررسی نمی‌کند؛ کمترین کارت بلوک بزرگ را خودش کنار می‌گذارد
+        limit = _max_modules_per_card(wall["max_modules_per_card"], calc.px_per_module_total, capacity)
+        if wall["mode"] == "fast" and wall["block_w"] * wall["block_h"] > limit:
+            raise ValueError(f"block_w * block_h must be at most {limit} modules per card")
+        return wall, calc, mask
+
+    def layout(self, wall, calc, mask):
+        """CompactLayout چیدمان؛ از کش، از حل هم‌زمان یکسان یا با حل تازه روی pool"""
+        options = {"mode": wall["mode"], "px_per_module": calc.px_per_module_total}
+        if mask is not None:
+            options["mask"] = mask
+        args = (calc.modules_x, calc.modules_y_round, wall["block_w"], wall["block_h"], wall["max_modules_per_card"])
+        key = self.cache.make_key(*args, **options)
+        layout = self.cache.get_compact(key)
+        if layout is not None:
+            return layout
+
+        leader = False
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+            else:
+                # حل هم‌کلید ممکن است بین بررسی بالا و گرفتن قفل تمام شده باشد
+                layout = self.cache.get_compact(key)
+                if layout is not None:
+                    return layout
+                if len(self._inflight) >= self.max_pending:
+                    raise ServiceBusy("too many layouts are being solved; retry later")
+                future = self._executor.submit(_solve, *args, options)
+                self._inflight[key] = future
+                leader = True
+        if not leader:
+            return future.result()
+        # ثبت در کش و شمارنده‌ها پیش از پاسخ درخواست اصلی، نه در callback که ممکن است دیرتر اجرا شود
+        try:
+            future.exception()
+        finally:
+            self._finish(key, future)
+        return future.result()
+
+    def _finish(self, key, future):
+        # ذخیره در کش و حذف از _inflight با هم زیر قفل، تا هیچ درخواستی کلید را در هیچ‌کدام نبیند
+        with self._lock:
+            if future.exception() is None:
+                self.cache.put_compact(key, future.result())
+            self._inflight.pop(key, None)
+            self.solved += 1
+
+    # endpointها
+
+    def calc(self, body):
+        wall, calc, mask = self.wall(body)
+        return {"module": wall["module"].id, "dot_pitch_mm": wall["dot_pitch_mm"], "calc": calc}
+
+    def layout_blocks(self, body):
+        wall, calc, mask = self.wall(body)
+        layout = self.layout(wall, calc, mask)
+        return {
+            "modules_x": calc.modules_x,
+            "modules_y": calc.modules_y_round,
+            "cards": layout.cards_used,
+            "blocks": layout.block_list(),
+        }
+
+    def stats(self, body):
+        wall, calc, mask = self.wall(body)
+        layout = self.layout(wall, calc, mask)
+        stats = get_stats_from_grid(
+            layout.grid(),
+            px_per_module=calc.px_per_module_total,
+            receiving_card_capacity_px=load_catalog().receiving_card_capacity_px,
+            mask=mask
+        )
+        return {"stats": stats}
+
+    def quote(self, body):
+        """هزینه کل؛ کنترلر پیش‌فرض کوچک‌ترین کنترلر کافی و قیمت‌ها پیش‌فرض برنامه‌اند.
+
+        هر کارت یک کابل شبکه ورودی دارد (مانند CableRoute.cable_count) و تعداد پاور همان
+        psu_count_for_modules است؛ مسیر کابل برای پاسخ سریع حل نمی‌شود.
+        """
+        wall, calc, mask = self.wall(body)
+        layout = self.layout(wall, calc, mask)
+        prices = parse_prices(body)
+        controller = body.get("controller")
+        if controller is not None and not isinstance(controller, str):
+            raise ValueError("controller must be a string")
+        if controller is None:
+            fitting = load_catalog().smallest_controller(calc.total_pixels_round)
+            controller = fitting.name if fitting else ""
+        cards = layout.cards_used
+        costs = compute_costs(
+            calc.total_modules_round,
+            cards,
+            wall["wall_width_cm"],
+            wall["wall_height_cm"],
+            prices,
+            dollar_rate=_number(body, "dollar_rate", 0),
+            controller_name=controller,
+            cable_count=cards,
+            psu_count=calc.psu_count,
+            area_fraction=calc.total_modules_round / (calc.modules_x * calc.modules_y_round)
+        )
+        return {
+            "module": wall["module"].id,
+            "dot_pitch_mm": wall["dot_pitch_mm"],
+            "controller": controller,
+            "cards": cards,
+            "calc": calc,
+            "costs": costs,
+            "total": costs.total,
+        }
+
+    def health(self):
+        with self._lock:
+            inflight = len(self._inflight)
+        return {
+            "status": "ok",
+            "workers": self.max_workers,
+            "inflight": inflight,
+            "max_pending": self.max_pending,
+            "solved": self.solved,
+            "coalesced": self.coalesced,
+            "cache": self.cache.stats(),
+        }
+
+    def shutdown(self):
+        if self._own_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class QuoteRequestHandler(BaseHTTPRequestHandler):
+    """مسیریابی درخواست‌ها به QuoteService سرور"""
+
+    protocol_version = "HTTP/1.1"
+    # سرآیند و بدنه جدا نوشته می‌شوند؛ بدون این، Nagle هر پاسخ keep-alive را چند میلی‌ثانیه نگه می‌دارد
+    disable_nagle_algorithm = True
+    routes = {
+        "/calc": QuoteService.calc,
+        "/layout": QuoteService.layout_blocks,
+        "/stats": QuoteService.stats,
+        "/quote": QuoteService.quote,
+    }
+
+    def _send(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, self.server.service.health())
+        elif self.path in self.routes:
+            self._send(405, {"error": "use POST"})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        handler = self.routes.get(self.path)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._send(400, {"error": "invalid Content-Length"})
+            return
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send(413, {"error": "request body too large"})
+            return
+        raw = self.rfile.read(length)
+        if handler is None:
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            body = json.loads(raw or b"{}")
+            self._send(200, handler(self.server.service, body))
+        except json.JSONDecodeError:
+            self._send(400, {"error": "invalid JSON"})
+        except ValueError as exc:
+            self._send(400, {"error": str(exc)})
+        except ServiceBusy as exc:
+            self._send(503, {"error": str(exc)})
+        except Exception as exc:
+            self.log_error("%s failed: %r", self.path, exc)
+            self._send(500, {"error": "internal error"})
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(service, host="127.0.0.1", port=8502, quiet=False):
+    """سرور HTTP چندنخی متصل به service؛ با port=0 یک پورت آزاد انتخاب می‌شود"""
+    server = ThreadingHTTPServer((host, port), QuoteRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="سرویس JSON استعلام قیمت ویدئووال")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8502)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("VIDEOWALL_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--max-pending", type=int, default=64, help="سقف حل‌های هم‌زمان متمایز")
+    parser.add_argument("--cache-size", type=int, default=int(os.environ.get("VIDEOWALL_LAYOUT_CACHE_SIZE", 256)))
+    parser.add_argument("--quiet", action="store_true", help="بدون لاگ هر درخواست")
+    args = parser.parse_args(argv)
+
+    service = QuoteService(
+        max_workers=args.workers,
+        max_pending=args.max_pending,
+        cache=LayoutCache(
+            max_entries=args.cache_size,
+            disk_dir=os.environ.get("VIDEOWALL_LAYOUT_CACHE_DIR") or None
+        )
+    )
+    server = make_server(service, args.host, args.port, quiet=args.quiet)
+    print(f"videowall service on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
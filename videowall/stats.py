@@ -0,0 +1,80 @@
+"""آمار کارت‌ها از روی گرید چیدمان"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class GridStats:
+    """خلاصه استفاده از کارت‌های گیرنده.
+
+    card_bboxes برای هر کارت (x, y, w, h) کوچک‌ترین مستطیل شامل ماژول‌های آن است.
+    card_pixels و card_load فقط وقتی px_per_module داده شود پر می‌شوند؛ card_load
+    نسبت پیکسل کارت به receiving_card_capacity_px است.
+    """
+    cards_used: int
+    total_modules: int
+    card_counts: dict = field(default_factory=dict)
+    card_bboxes: dict = field(default_factory=dict)
+    card_pixels: dict = field(default_factory=dict)
+    card_load: dict = field(default_factory=dict)
+    over_capacity: tuple = ()
+
+    @property
+    def has_over_capacity(self):
+        return bool(self.over_capacity)
+
+
+def get_stats_from_grid(grid, px_per_module=None, receiving_card_capacity_px=512*512, mask=None):
+    """استخراج اطلاعات از گرید در یک گذر (O(N)) با np.bincount.
+
+    خانه‌های ۰ کارت حساب نمی‌شوند؛ با mask خانه‌های حذف‌شده در total_modules هم نمی‌آیند.
+    """
+    grid = np.asarray(grid)
+    flat = grid.ravel()
+    counts = np.bincount(flat)
+    cards = np.flatnonzero(counts[1:]) + 1
+
+    modules_y, modules_x = grid.shape
+    size = counts.size
+    rows = np.repeat(np.arange(modules_y), modules_x)
+    cols = np.tile(np.arange(modules_x), modules_y)
+    x_min = np.full(size, modules_x)
+    y_min = np.full(size, modules_y)
+    x_max = np.full(size, -1)
+    y_max = np.full(size, -1)
+    np.minimum.at(x_min, flat, cols)
+    np.minimum.at(y_min, flat, rows)
+    np.maximum.at(x_max, flat, cols)
+    np.maximum.at(y_max, flat, rows)
+
+    card_ids = cards.tolist()
+    card_counts = dict(zip(card_ids, counts[cards].tolist()))
+    card_bboxes = {
+        card: (x0, y0, x1 - x0 + 1, y1 - y0 + 1)
+        for card, x0, y0, x1, y1 in zip(
+            card_ids, x_min[cards].tolist(), y_min[cards].tolist(),
+            x_max[cards].tolist(), y_max[cards].tolist()
+        )
+    }
+
+    card_pixels = {}
+    card_load = {}
+    over_capacity = ()
+    if px_per_module:
+        pixels = counts[cards] * px_per_module
+        load = pixels / receiving_card_capacity_px
+        card_pixels = dict(zip(card_ids, pixels.tolist()))
+        card_load = dict(zip(card_ids, load.tolist()))
+        over_capacity = tuple(cards[pixels > receiving_card_capacity_px].tolist())
+
+    return GridStats(
+        cards_used=len(card_ids),
+        total_modules=grid.size if mask is None else int(np.count_nonzero(mask)),
+        card_counts=card_counts,
+        card_bboxes=card_bboxes,
+        card_pixels=card_pixels,
+        card_load=card_load,
+        over_capacity=over_capacity
+    )
@@ -0,0 +1,194 @@
+"""رسم برداری (SVG) چیدمان بدون matplotlib.
+
+لایه ثابت (خطوط ماژول‌ها، شماره سطر و ستون، عنوان) فقط به ابعاد دیوار بستگی دارد و
+برای هر (modules_x, modules_y) یک بار ساخته می‌شود؛ رنگ و مرز کارت‌ها لایه‌ای جدا
+روی آن است که از روی گرید ساخته می‌شود.
+"""
+
+import base64
+import struct
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+from .compact import CompactLayout
+from .raster import BORDER_COLOR, CARD_ALPHA, COLORS, MODULE_H, MODULE_W, card_colors_rgba
+
+MARGIN = 48
+# تا این تعداد کارت، رنگ‌ها path برداری و شماره کارت‌ها متن هستند؛ بیش از آن رنگ‌ها با
+# تصویری یک پیکسل برای هر ماژول کشیده می‌شوند و شماره‌ای نوشته نمی‌شود
+MAX_VECTOR_CARDS = 1000
+
+
+def _font_size(modules_x):
+    """اندازه قلم برچسب‌ها، متناسب با عرض دیوار تا در اندازه معمول نمایش خوانا بماند"""
+    return max(9.0, modules_x * MODULE_W / 120)
+
+
+@lru_cache(maxsize=64)
+def static_layer(modules_x, modules_y):
+    """(ابتدا، انتها)ی سند SVG برای ابعاد داده‌شده؛ لایه کارت‌ها بین این دو قرار می‌گیرد"""
+    width, height = modules_x * MODULE_W, modules_y * MODULE_H
+    font = _font_size(modules_x)
+    margin = MARGIN + font * 2
+    step_x = max(1, -(-int(font * 2.5) // MODULE_W))
+    step_y = max(1, -(-int(font * 1.5) // MODULE_H))
+
+    head = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{-margin:g} {-margin:g} '
+        f'{width + margin * 1.25:g} {height + margin * 1.25:g}" '
+        f'font-family="Tahoma, Arial, sans-serif" font-weight="bold">',
+        f'<defs><pattern id="modules" width="{MODULE_W}" height="{MODULE_H}" patternUnits="userSpaceOnUse">'
+        f'<path d="M{MODULE_W} 0H0V{MODULE_H}" fill="none" stroke="{BORDER_COLOR}" stroke-opacity="0.35" '
+        f'stroke-width="0.75" vector-effect="non-scaling-stroke"/></pattern></defs>',
+        f'<text x="{width / 2:g}" y="{-margin / 2:g}" font-size="{font * 1.6:g}" '
+        f'text-anchor="middle">{modules_x} × {modules_y}</text>',
+        f'<g font-size="{font:g}" fill="#555555" text-anchor="middle">',
+    ]
+    head += [
+        f'<text x="{x * MODULE_W + MODULE_W / 2:g}" y="-{font / 2:g}">{x + 1}</text>'
+        for x in range(0, modules_x, step_x)
+    ]
+    head.append(f'</g><g font-size="{font:g}" fill="#555555" text-anchor="end" dominant-baseline="central">')
+    head += [
+        f'<text x="-{font / 2:g}" y="{y * MODULE_H + MODULE_H / 2:g}">{y + 1}</text>'
+        for y in range(0, modules_y, step_y)
+    ]
+    head.append('</g>')
+
+    tail = (
+        f'<rect width="{width}" height="{height}" fill="url(#modules)" stroke="{BORDER_COLOR}" '
+        f'stroke-width="1.5" vector-effect="non-scaling-stroke"/></svg>'
+    )
+    return "".join(head), tail
+
+
+def _runs(mask):
+    """(ردیف، شروع، پایان) اجراهای True در طول محور دوم mask"""
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends
+
+
+def _border_path(grid):
+    """مرز بین کارت‌های مختلف به‌صورت یک path در واحد ماژول"""
+    vertical = _runs((grid[:, 1:] != grid[:, :-1]).T)
+    horizontal = _runs(grid[1:, :] != grid[:-1, :])
+    parts = [f"M{x + 1} {y0}V{y1}" for x, y0, y1 in zip(*(a.tolist() for a in vertical))]
+    parts += [f"M{x0} {y + 1}H{x1}" for y, x0, x1 in zip(*(a.tolist() for a in horizontal))]
+    return "".join(parts)
+
+
+def _png_bytes(rgba):
+    """کدگذاری PNG بدون فشرده‌سازی فیلتر برای آرایه RGBA هشت‌بیتی"""
+    height, width = rgba.shape[:2]
+    rows = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    rows[:, 1:] = rgba.reshape(height, -1)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows.tobytes(), 9))
+            + chunk(b"IEND", b""))
+
+
+def _fill_image(grid):
+    """رنگ کارت‌ها به‌صورت تصویر یک پیکسل برای هر ماژول که بدون نرم‌شدن بزرگ می‌شود"""
+    rgba = card_colors_rgba(grid)
+    rgba[np.asarray(grid) == 0, 3] = 0
+    data = base64.b64encode(_png_bytes(rgba)).decode("ascii")
+    return (
+        f'<image width="{grid.shape[1]}" height="{grid.shape[0]}" preserveAspectRatio="none" '
+        f'image-rendering="optimizeSpeed" style="image-rendering:pixelated" '
+        f'href="data:image/png;base64,{data}"/>'
+    )
+
+
+def _vector_fills(blocks):
+    paths = {}
+    for x, y, w, h, card in blocks.tolist():
+        paths.setdefault((card - 1) % len(COLORS), []).append(f"M{x} {y}h{w}v{h}h-{w}z")
+    return [f'<path fill="{COLORS[color]}" d="{"".join(d)}"/>' for color, d in sorted(paths.items())]
+
+
+def _card_labels(blocks, modules_x):
+    """شماره هر کارت روی بزرگ‌ترین مستطیل آن"""
+    area = blocks["w"].astype(np.int64) * blocks["h"]
+    order = np.lexsort((-area, blocks["card"]))
+    cards = blocks["card"][order]
+    first = np.ones(order.size, dtype=bool)
+    first[1:] = cards[1:] != cards[:-1]
+    size = min(MODULE_H * 0.7, _font_size(modules_x))
+    out = [f'<g font-size="{size:g}" fill="white" text-anchor="middle" dominant-baseline="central">']
+    out += [
+        f'<text x="{(x + w / 2) * MODULE_W:g}" y="{(y + h / 2) * MODULE_H:g}">{card}</text>'
+        for x, y, w, h, card in blocks[order[first]].tolist()
+    ]
+    out.append('</g>')
+    return out
+
+
+def card_layer(grid):
+    """رنگ کارت‌ها، مرز بین کارت‌ها و شماره هر کارت"""
+    grid = np.asarray(grid)
+    cards = int(np.count_nonzero(np.bincount(grid.ravel())[1:]))
+    vector = cards <= MAX_VECTOR_CARDS
+    if vector:
+        blocks = CompactLayout.from_grid(grid).blocks
+        blocks = blocks[blocks["card"] != 0]
+
+    out = [f'<g transform="scale({MODULE_W} {MODULE_H})" fill-opacity="{CARD_ALPHA}">']
+    out += _vector_fills(blocks) if vector else [_fill_image(grid)]
+    out.append(
+        f'<path d="{_border_path(grid)}" fill="none" stroke="{BORDER_COLOR}" stroke-width="1.5" '
+        f'vector-effect="non-scaling-stroke"/></g>'
+    )
+    if vector and blocks.size:
+        out += _card_labels(blocks, grid.shape[1])
+    return "".join(out)
+
+
+def highlight_layer(mask):
+    """سایه و خط دور قرمز برای خانه‌های True در mask (مثلاً ایرادهای اعتبارسنجی)"""
+    rows, starts, ends = _runs(mask)
+    fill = "".join(
+        f"M{x0} {y}h{x1 - x0}v1h-{x1 - x0}z" for y, x0, x1 in zip(rows.tolist(), starts.tolist(), ends.tolist())
+    )
+    padded = np.zeros((mask.shape[0] + 2, mask.shape[1] + 2), dtype=bool)
+    padded[1:-1, 1:-1] = mask
+    vertical = _runs((padded[1:-1, 1:] != padded[1:-1, :-1]).T)
+    horizontal = _runs(padded[1:, 1:-1] != padded[:-1, 1:-1])
+    outline = "".join(f"M{x} {y0}V{y1}" for x, y0, y1 in zip(*(a.tolist() for a in vertical)))
+    outline += "".join(f"M{x0} {y}H{x1}" for y, x0, x1 in zip(*(a.tolist() for a in horizontal)))
+    return (
+        f'<g transform="scale({MODULE_W} {MODULE_H})"><path d="{fill}" fill="#E5323B" fill-opacity="0.35"/>'
+        f'<path d="{outline}" fill="none" stroke="#E5323B" stroke-width="2.5" '
+        f'vector-effect="non-scaling-stroke"/></g>'
+    )
+
+
+def hole_layer(mask):
+    """پوشاندن خطوط ماژول در خانه‌های بیرون از mask (بریدگی‌های دیوار) با رنگ زمینه"""
+    rows, starts, ends = _runs(~mask)
+    cover = "".join(
+        f"M{x0} {y}h{x1 - x0}v1h-{x1 - x0}z" for y, x0, x1 in zip(rows.tolist(), starts.tolist(), ends.tolist())
+    )
+    return f'<path transform="scale({MODULE_W} {MODULE_H})" d="{cover}" fill="white"/>'
+
+
+def render_layout_svg(grid, highlight=None, mask=None):
+    """سند کامل SVG چیدمان؛ highlight آرایه بولی اختیاری خانه‌هایی است که قرمز می‌شوند و
+    خانه‌های بیرون از mask رسم نمی‌شوند"""
+    grid = np.asarray(grid)
+    head, tail = static_layer(grid.shape[1], grid.shape[0])
+    overlay = highlight_layer(np.asarray(highlight, dtype=bool)) if highlight is not None and np.any(highlight) else ""
+    if mask is not None and not np.all(mask):
+        # خطوط ماژول‌ها در tail کشیده می‌شوند، پس پوشش بعد از آن و پیش از </svg> می‌آید
+        tail = tail[:-len("</svg>")] + hole_layer(np.asarray(mask, dtype=bool)) + "</svg>"
+    return head + card_layer(grid) + overlay + tail
@@ -0,0 +1,143 @@
+"""بررسی همه گزینه‌های دات‌پیچ × شکل بلوک برای یک دیوار روی یک process pool"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+
+from .calc import videowall_calc
+from .catalog import load_catalog
+from .layout import _max_modules_per_card, optimize_layout
+from .pricing import compute_costs
+
+MIN_CARDS = "min_cards"
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    """یک گزینه بررسی‌شده"""
+    pitch_option: str
+    block_w: int
+    block_h: int
+    mode: str
+    modules_x: int
+    modules_y: int
+    cards: int
+    total_resolution: int
+    controller: str
+    total_cost: float
+
+
+def legal_block_shapes(max_modules_per_card, px_per_module=None, receiving_card_capacity_px=None):
+    """همه شکل‌های بلوک w×h که از سقف ماژول و ظرفیت پیکسلی کارت (پیش‌فرض کاتالوگ) بیشتر نمی‌شوند"""
+    if receiving_card_capacity_px is None:
+        receiving_card_capacity_px = load_catalog().receiving_card_capacity_px
+    limit = _max_modules_per_card(max_modules_per_card, px_per_module, receiving_card_capacity_px)
+    return [(w, h) for w in range(1, limit + 1) for h in range(1, limit // w + 1)]
+
+
+def smallest_controller(total_resolution):
+    """کوچک‌ترین کنترلری که رزولوشن را پشتیبانی می‌کند، یا رشته خالی"""
+    controller = load_catalog().smallest_controller(total_resolution)
+    return controller.name if controller else ""
+
+
+def _geometry_key(mode, modules_x, modules_y, block_w, block_h, limit):
+    # چیدمان سریع فقط به ابعاد دیوار و بلوک بستگی دارد؛ حالت کمترین کارت به سقف کارت
+    if mode == MIN_CARDS:
+        return (mode, modules_x, modules_y, limit)
+    return (mode, modules_x, modules_y, block_w, block_h)
+
+
+def solve_card_count(key):
+    """تعداد کارت برای یک هندسه (اجرا در پروسه کارگر)"""
+    mode = key[0]
+    if mode == MIN_CARDS:
+        _, modules_x, modules_y, limit = key
+        blocks, _ = optimize_layout(modules_x, modules_y, 1, 1, limit, mode=MIN_CARDS)
+    else:
+        _, modules_x, modules_y, block_w, block_h = key
+        blocks, _ = optimize_layout(modules_x, modules_y, block_w, block_h, block_w * block_h)
+    return len(blocks)
+
+
+def sweep_options(
+    wall_width_cm,
+    wall_height_cm,
+    prices,
+    dollar_rate=0,
+    executor=None,
+    include_min_cards=True,
+    module=None
+):
+    """تمام گزینه‌ها را حل می‌کند و نتایج را به ترتیب اتمام yield می‌کند.
+
+    هندسه‌های یکسان (مثلاً دات‌پیچ‌های مختلف با تعداد ماژول و بلوک یکسان) فقط
+    یک بار حل می‌شوند. اگر executor داده نشود یک ProcessPoolExecutor موقت ساخته می‌شود.
+    گزینه‌های دات‌پیچ از module (نوع ماژول کاتالوگ، پیش‌فرض ماژول ۳۲×۱۶) خوانده می‌شوند.
+    """
+    catalog = load_catalog()
+    if module is None:
+        module = catalog.module()
+    capacity = catalog.receiving_card_capacity_px
+    options = {}
+    for pitch_option, info in module.pitches.items():
+        calc = videowall_calc(
+            wall_width_cm, wall_height_cm, dot_pitch_mm=info.dot_pitch,
+            receiving_card_capacity_px=capacity, module=module
+        )
+        limit = _max_modules_per_card(info.max_modules_per_card, calc.px_per_module_total, capacity)
+        shapes = [(w, h, "fast") for w, h in legal_block_shapes(limit)]
+        if include_min_cards:
+            shapes.append((0, 0, MIN_CARDS))
+        for block_w, block_h, mode in shapes:
+            key = _geometry_key(mode, calc.modules_x, calc.modules_y_round, block_w, block_h, limit)
+            options.setdefault(key, []).append((pitch_option, block_w, block_h, mode, calc))
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor()
+    try:
+        pending = {executor.submit(solve_card_count, key): key for key in options}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                cards = future.result()
+                for pitch_option, block_w, block_h, mode, calc in options[key]:
+                    total_resolution = calc.total_pixels_round
+                    controller = smallest_controller(total_resolution)
+                    costs = compute_costs(
+                        calc.total_modules_round, cards, wall_width_cm, wall_height_cm,
+                        prices, dollar_rate=dollar_rate, controller_name=controller,
+                        psu_count=calc.psu_count
+                    )
+                    yield SweepResult(
+                        pitch_option=pitch_option,
+                        block_w=block_w,
+                        block_h=block_h,
+                        mode=mode,
+                        modules_x=calc.modules_x,
+                        modules_y=calc.modules_y_round,
+                        cards=cards,
+                        total_resolution=total_resolution,
+                        controller=controller,
+                        total_cost=costs.total
+                    )
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def rank_results(results):
+    """مرتب‌سازی بر اساس تعداد کارت، سپس هزینه کل؛ گزینه‌های بدون کنترلر در انتها"""
+    return sorted(results, key=lambda r: (r.controller == "", r.cards, r.total_cost))
+
+
+def pareto_front(results):
+    """گزینه‌هایی که هیچ گزینه دیگری هم ارزان‌تر و هم با کارت کمتر از آن‌ها نیست"""
+    front = []
+    best_cost = float("inf")
+    for result in sorted(results, key=lambda r: (r.cards, r.total_cost)):
+        if result.total_cost < best_cost:
+            front.append(result)
+            best_cost = result.total_cost
+    return front
@@ -0,0 +1,161 @@
+"""اعتبارسنجی چیدمان: پیوستگی کارت‌ها، سقف ماژول و پیکسل، شماره‌های جاافتاده و ماژول‌های بی‌کارت"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+NON_CONTIGUOUS = "non_contiguous"
+OVER_MAX_MODULES = "over_max_modules"
+OVER_CAPACITY = "over_capacity"
+SKIPPED_IDS = "skipped_ids"
+ORPHAN = "orphan"
+
+VIOLATION_LABELS = {
+    NON_CONTIGUOUS: "کارت ناپیوسته",
+    OVER_MAX_MODULES: "بیش از سقف ماژول",
+    OVER_CAPACITY: "بیش از ظرفیت پیکسلی",
+    SKIPPED_IDS: "شماره کارت جاافتاده",
+    ORPHAN: "ماژول بدون کارت",
+}
+
+
+@dataclass(frozen=True)
+class Violation:
+    """یک ایراد چیدمان؛ cells آرایه (n, 2) از (سطر، ستون) خانه‌هایی است که باید برجسته شوند"""
+    kind: str
+    card: object
+    message: str
+    cells: np.ndarray = field(default_factory=lambda: np.zeros((0, 2), dtype=np.intp), repr=False)
+
+
+@dataclass
+class ValidationReport:
+    violations: list
+    components: int
+    shape: tuple
+
+    @property
+    def ok(self):
+        return not self.violations
+
+    def by_kind(self, kind):
+        return [v for v in self.violations if v.kind == kind]
+
+    def highlight_mask(self):
+        """آرایه بولی خانه‌های مشکل‌دار برای برجسته‌سازی"""
+        mask = np.zeros(self.shape, dtype=bool)
+        for violation in self.violations:
+            if violation.cells.size:
+                mask[violation.cells[:, 0], violation.cells[:, 1]] = True
+        return mask
+
+
+def label_components(grid):
+    """برچسب مؤلفه‌های همبند چهارهمسایه‌ای خانه‌های هم‌کارت با union-find برداری.
+
+    خروجی آرایه‌ای هم‌شکل grid است که در آن هر خانه شماره کوچک‌ترین اندیس (مسطح)
+    مؤلفه‌اش را دارد؛ خانه‌های ۰ مؤلفه جدا حساب نمی‌شوند و ۱- می‌گیرند.
+    """
+    grid = np.asarray(grid)
+    flat = grid.ravel()
+    index = np.arange(flat.size).reshape(grid.shape)
+
+    horizontal = (grid[:, 1:] == grid[:, :-1]) & (grid[:, 1:] != 0)
+    vertical = (grid[1:, :] == grid[:-1, :]) & (grid[1:, :] != 0)
+    a = np.concatenate([index[:, :-1][horizontal], index[:-1, :][vertical]])
+    b = np.concatenate([index[:, 1:][horizontal], index[1:, :][vertical]])
+
+    parent = np.arange(flat.size)
+    while a.size:
+        # اتصال ریشه بزرگ‌تر به کوچک‌تر، سپس فشرده‌سازی مسیر تا همه به ریشه اشاره کنند
+        low = np.minimum(parent[a], parent[b])
+        high = np.maximum(parent[a], parent[b])
+        pending = low != high
+        if not pending.any():
+            break
+        a, b = a[pending], b[pending]
+        np.minimum.at(parent, high[pending], low[pending])
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+
+    labels = parent.reshape(grid.shape)
+    return np.where(grid != 0, labels, -1)
+
+
+def _cells(flat_indices, width):
+    return np.column_stack(np.divmod(flat_indices, width))
+
+
+def validate_layout(grid, max_modules_per_card=None, px_per_module=None, receiving_card_capacity_px=512*512,
+                    mask=None):
+    """همه ایرادهای چیدمان به ترتیب نوع و شماره کارت؛ خانه‌های بیرون از mask بی‌کارت حساب نمی‌شوند"""
+    grid = np.asarray(grid)
+    width = grid.shape[1]
+    flat = grid.ravel()
+    counts = np.bincount(flat)
+    labels = label_components(grid).ravel()
+    violations = []
+
+    assigned = np.flatnonzero(flat)
+    roots, root_sizes = np.unique(labels[assigned], return_counts=True)
+    root_cards = flat[roots]
+    components_per_card = np.bincount(root_cards, minlength=counts.size)
+
+    # ناپیوستگی: خانه‌های بیرون از بزرگ‌ترین مؤلفه هر کارت برجسته می‌شوند
+    split_cards = np.flatnonzero(components_per_card > 1)
+    if split_cards.size:
+        order = np.lexsort((-root_sizes, root_cards))
+        main_root = {}
+        for root, card in zip(roots[order].tolist(), root_cards[order].tolist()):
+            main_root.setdefault(card, root)
+        split_set = set(split_cards.tolist())
+        stray = assigned[np.isin(flat[assigned], split_cards)]
+        stray = stray[labels[stray] != np.array([main_root[c] for c in flat[stray].tolist()], dtype=labels.dtype)]
+        stray_cards = flat[stray]
+        for card in sorted(split_set):
+            violations.append(Violation(
+                NON_CONTIGUOUS, card,
+                f"کارت {card} از {int(components_per_card[card])} بخش جدا از هم تشکیل شده است",
+                _cells(stray[stray_cards == card], width),
+            ))
+
+    cards = np.flatnonzero(counts[1:]) + 1
+    if max_modules_per_card:
+        for card in cards[counts[cards] > max_modules_per_card].tolist():
+            violations.append(Violation(
+                OVER_MAX_MODULES, card,
+                f"کارت {card} دارای {int(counts[card])} ماژول است (حداکثر {max_modules_per_card})",
+                _cells(np.flatnonzero(flat == card), width),
+            ))
+
+    if px_per_module:
+        pixels = counts[cards] * px_per_module
+        for card, px in zip(cards[pixels > receiving_card_capacity_px].tolist(),
+                            pixels[pixels > receiving_card_capacity_px].tolist()):
+            violations.append(Violation(
+                OVER_CAPACITY, card,
+                f"کارت {card} دارای {px:,} پیکسل است (ظرفیت {receiving_card_capacity_px:,})",
+                _cells(np.flatnonzero(flat == card), width),
+            ))
+
+    missing = np.flatnonzero(counts[1:] == 0) + 1
+    if missing.size:
+        shown = "، ".join(str(card) for card in missing[:20].tolist())
+        violations.append(Violation(
+            SKIPPED_IDS, None,
+            f"{missing.size} شماره کارت استفاده نشده است: {shown}" + ("…" if missing.size > 20 else ""),
+        ))
+
+    orphans = flat == 0 if mask is None else (flat == 0) & np.asarray(mask, dtype=bool).ravel()
+    orphans = np.flatnonzero(orphans)
+    if orphans.size:
+        violations.append(Violation(
+            ORPHAN, None,
+            f"{orphans.size} ماژول به هیچ کارتی وصل نیست",
+            _cells(orphans, width),
+        ))
+
+    return ValidationReport(violations=violations, components=int(roots.size), shape=grid.shape)